@@ -1,15 +1,26 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Set
+import asyncio
+import os
 import uuid
 import logging
 from app.models import (
     ReferenceSplitRequest, ReferenceSplitResponse, ReferenceItem,
-    ReferenceKeyword, PubMedArticle
+    ReferenceKeyword, PubMedArticle, ReferenceBatchSearchRequest, JobCreateRequest,
+    ValidateRequest
 )
 from app.services.llm_service import LLMService
 from app.services.pubmed_service import PubMedService
 from app.services.similarity_service import SimilarityService
 from app.services.format_service import FormatService
+from app.services.job_service import JobService
+from app.services.validation_service import ValidationService
+from app.services.presearch_service import PreSearchService
+from app.services.reference_dedup import DuplicateResolver
+from app.services.metrics import DUPLICATE_REFERENCES, timed_stage
+from app.services import tracing
+from app.responses import FastJSONResponse, dumps
 
 logger = logging.getLogger(__name__)
 
@@ -17,20 +28,39 @@ router = APIRouter()
 llm_service = LLMService()
 pubmed_service = PubMedService()
 similarity_service = SimilarityService()
+# 拆分后的预检索（工作协程在应用启动时创建）；检索接口通过它使用预检索结果
+presearch_service = PreSearchService(pubmed_service)
 format_service = FormatService()
 
+# 批量检索时同时进行的参考文献检索数
+BATCH_SEARCH_CONCURRENCY = int(os.getenv("BATCH_SEARCH_CONCURRENCY", "8"))
+
+validation_service = ValidationService(
+    llm_service, pubmed_service, similarity_service, format_service, concurrency=BATCH_SEARCH_CONCURRENCY
+)
+
+# 检索结果中文章的字段（fields= 只返回其中指定的字段）
+ARTICLE_FIELDS = frozenset(PubMedArticle.model_fields)
+# 精简模式（compact）不返回的字段：keywords 与顶层字段重复，摘要通过 /api/articles/{pmid}/abstract 按需获取
+COMPACT_EXCLUDE = frozenset({"keywords", "abstract"})
+
 
 @router.post("/split", response_model=ReferenceSplitResponse)
 async def split_references(request: ReferenceSplitRequest):
-    """拆分参考文献列表"""
-    logger.info("\n" + "="*100)
+    """拆分参考文献列表
+
+    presearch=true 时在后台预检索拆分出的参考文献（低优先级，可通过 DELETE /api/presearch/{presearch_id} 取消），
+    用户核对拆分结果后发起的检索直接使用预检索结果，或等待进行中的预检索。
+    与前面某条参考文献为同一篇文献（DOI、PMID或标题+第一作者+年份相同）的参考文献，
+    duplicate_of 为该参考文献的ID，不做预检索。
+    """
     logger.info("【API /split】收到参考文献拆分请求")
-    logger.info(f"请求文本长度: {len(request.text)} 字符")
+    logger.info("请求文本长度: %s 字符", len(request.text))
     
     try:
-        # 使用LLM拆分参考文献
-        split_results = llm_service.split_references(request.text)
-        logger.info(f"拆分结果: 共 {len(split_results)} 条参考文献")
+        # 使用LLM拆分参考文献（大模型调用在线程中执行：并发配额占满时等待配额不阻塞事件循环）
+        split_results = await asyncio.to_thread(llm_service.split_references, request.text)
+        logger.info("拆分结果: 共 %s 条参考文献", len(split_results))
         
         references = []
         for idx, ref_data in enumerate(split_results):
@@ -38,10 +68,10 @@ async def split_references(request: ReferenceSplitRequest):
             ref_text = ref_data.get("text", "")
             format_type = ref_data.get("format_type", "unknown")
             
-            logger.info(f"\n处理第 {idx+1} 条参考文献: {ref_id}")
+            logger.debug("\n处理第 %s 条参考文献: %s", idx + 1, ref_id)
             
             # 提取关键词
-            keywords_dict = llm_service.extract_keywords(ref_text)
+            keywords_dict = await asyncio.to_thread(llm_service.extract_keywords, ref_text)
             keywords = ReferenceKeyword(**keywords_dict)
             
             reference = ReferenceItem(
@@ -53,123 +83,475 @@ async def split_references(request: ReferenceSplitRequest):
             )
             references.append(reference)
         
-        logger.info(f"\n【API /split】拆分完成，返回 {len(references)} 条参考文献")
-        return ReferenceSplitResponse(references=references)
+        resolver = DuplicateResolver()
+        for reference in references:
+            reference.duplicate_of = resolver.register(reference.id, reference.extracted_keywords.dict())
+        if resolver.duplicates:
+            DUPLICATE_REFERENCES.inc(len(resolver.duplicates), pipeline="split")
+            logger.info("检测到 %s 条重复参考文献", len(resolver.duplicates))
+        
+        presearch_id = None
+        if request.presearch:
+            presearch_id = await presearch_service.schedule(
+                [_to_keywords_dict(reference.extracted_keywords.dict())
+                 for reference in references if reference.duplicate_of is None],
+                use_smart_matching=request.use_smart_matching,
+                use_semantic_matching=request.use_semantic_matching
+            )
+        
+        logger.info("\n【API /split】拆分完成，返回 %s 条参考文献", len(references))
+        return ReferenceSplitResponse(references=references, presearch_id=presearch_id)
     except Exception as e:
-        logger.error(f"【API /split】拆分失败: {str(e)}", exc_info=True)
+        logger.error("【API /split】拆分失败: %s", str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"拆分参考文献失败: {str(e)}")
 
 
-@router.post("/search/{reference_id}")
-async def search_reference(reference_id: str, keywords: Dict[str, Any]):
-    """搜索参考文献"""
-    logger.info("\n" + "="*100)
-    logger.info(f"【API /search】收到参考文献检索请求: {reference_id}")
-    logger.info(f"输入关键词: {keywords}")
+def _to_keywords_dict(keywords: Dict[str, Any]) -> Dict[str, Any]:
+    """转换关键词格式（排除use_smart_matching等请求参数）"""
+    return {
+        "title": keywords.get("title"),
+        "authors": keywords.get("authors"),
+        "journal": keywords.get("journal"),
+        "year": keywords.get("year"),
+        "volume": keywords.get("volume"),
+        "issue": keywords.get("issue"),
+        "pages": keywords.get("pages"),
+        "pmid": keywords.get("pmid"),
+        "doi": keywords.get("doi")
+    }
+
+
+def _article_projection(fields: Optional[str] = None, compact: bool = False) -> Optional[Set[str]]:
+    """解析 fields=（逗号分隔的文章字段名）和 compact，返回需要输出的文章字段，None 表示全部字段
+
+    指定 fields 时只返回这些字段（优先于 compact）；compact 时返回除 COMPACT_EXCLUDE 外的字段。
+    """
+    if fields:
+        selected = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = selected - ARTICLE_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"未知的文章字段: {', '.join(sorted(unknown))}（可选: {', '.join(sorted(ARTICLE_FIELDS))}）"
+            )
+        return selected
+    if compact:
+        return set(ARTICLE_FIELDS - COMPACT_EXCLUDE)
+    return None
+
+
+def _project_result(result: Dict[str, Any], include: Optional[Set[str]]) -> Dict[str, Any]:
+    """对已构建的检索响应（如任务中保存的结果）应用字段投影"""
+    if include is None or not result:
+        return result
+    return {
+        **result,
+        "matched_articles": [
+            {name: value for name, value in article.items() if name in include}
+            for article in result.get("matched_articles") or []
+        ]
+    }
+
+
+def _search_id(search_id: Optional[str], incremental: bool) -> Optional[str]:
+    """增量检索的会话ID：使用请求中的ID（上次检索返回的 search_id）；没有时只在请求 incremental 时生成新的ID，
+    否则不保存检索会话（返回 None）"""
+    if search_id:
+        return search_id
+    return uuid.uuid4().hex if incremental else None
+
+
+def _with_search_id(result: Dict[str, Any], search_id: Optional[str]) -> Dict[str, Any]:
+    if search_id is not None:
+        result["search_id"] = search_id
+    return result
+
+
+@timed_stage("build_response")
+def _build_search_result(reference_id: str, keywords_dict: Dict[str, Any], articles: List[Dict[str, Any]],
+                         include: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """根据 search_articles 的结果构建检索响应
+
+    include 为需要输出的文章字段（见 _article_projection），None 时输出全部字段；
+    不输出的 differences 不会生成。文章的字段与 PubMedArticle 相同。
+    """
+    if not articles:
+        logger.info("【API /search】未找到匹配文章: %s", reference_id)
+        return {
+            "reference_id": reference_id,
+            "matched_articles": [],
+            "status": "not_found"
+        }
     
-    # 提取智能匹配参数
-    use_smart_matching = keywords.get("use_smart_matching", False)
-    logger.info(f"智能匹配: {'启用' if use_smart_matching else '禁用'}")
+    logger.info("【API /search】检索服务返回 %s 篇文章（已内部评估和筛选）", len(articles))
     
-    try:
-        # 转换关键词格式（排除use_smart_matching）
-        keywords_dict = {
-            "title": keywords.get("title"),
-            "authors": keywords.get("authors"),
-            "journal": keywords.get("journal"),
-            "year": keywords.get("year"),
-            "volume": keywords.get("volume"),
-            "issue": keywords.get("issue"),
-            "pages": keywords.get("pages"),
-            "pmid": keywords.get("pmid"),
-            "doi": keywords.get("doi")
+    # search_articles 已经在内部完成了评估和筛选，这里只需要构建响应对象
+    # 文章数据来自内部检索结果，直接按 PubMedArticle 的字段构建字典，不做 pydantic 校验
+    matched_articles = []
+    for article in articles:
+        article_keywords = {
+            "title": article.get("title"),
+            "authors": article.get("authors", []),
+            "journal": article.get("journal"),
+            "year": article.get("year"),
+            "volume": article.get("volume"),
+            "issue": article.get("issue"),
+            "pages": article.get("pages"),
+            "pmid": article.get("pmid"),
+            "doi": article.get("doi")
+        }
+        
+        # 使用文章中的相似度信息（如果存在），否则重新计算
+        similarity = article.pop("_similarity_score", None)
+        if similarity is None:
+            similarity = similarity_service.calculate_similarity(keywords_dict, article_keywords)
+        
+        # 获取匹配类型（如果存在）并移除临时字段
+        match_type = article.pop("_match_type", None)
+        
+        # 字段差异已在评分时同时生成，只有直接返回的文章（如PMID直接命中）需要在此计算
+        differences = article.pop("_differences", None)
+        if differences is None and (include is None or "differences" in include):
+            differences = similarity_service.find_differences(keywords_dict, article_keywords)
+        
+        matched_article = {
+            "pmid": article_keywords["pmid"],
+            "title": article_keywords["title"],
+            "authors": article_keywords["authors"],
+            "journal": article_keywords["journal"],
+            "year": article_keywords["year"],
+            "volume": article_keywords["volume"],
+            "issue": article_keywords["issue"],
+            "pages": article_keywords["pages"],
+            "doi": article_keywords["doi"],
+            "abstract": article.get("abstract"),
+            "keywords": article_keywords,
+            "similarity_score": float(similarity),
+            "differences": differences or {},
+            "match_type": match_type
         }
+        if include is not None:
+            matched_article = {name: value for name, value in matched_article.items() if name in include}
+        matched_articles.append(matched_article)
+        logger.debug("  文章 PMID=%s, 相似度=%.4f, 匹配类型=%s", article.get("pmid"), similarity, match_type)
+    logger.info("\n相似度排序后，共 %s 篇匹配文章", len(matched_articles))
+    
+    # 注意：不再截断结果，即使相似度100%也返回所有匹配的文章（包括DOI匹配的文章）
+    # 这样用户可以看到所有可能的匹配结果并选择
+    
+    status = "matched" if matched_articles else "not_found"
+    
+    logger.info("【API /search】检索完成: %s, 状态=%s, 返回 %s 篇文章", reference_id, status, len(matched_articles))
+    return {
+        "reference_id": reference_id,
+        "matched_articles": matched_articles,
+        "status": status
+    }
+
+
+@router.post("/search/batch")
+async def search_references_batch(request: ReferenceBatchSearchRequest):
+    """批量检索参考文献
+
+    所有参考文献并发检索（受全局NCBI/大模型配额限制），共享文章缓存和进行中的相同请求，
+    总耗时接近最慢的一条参考文献，而不是所有参考文献之和。
+    同一篇文献的多条参考文献只检索一次，重复的参考文献的结果带有 duplicate_of（见 _search_duplicates）。
+    fields / compact / incremental 的含义与 /api/search/{reference_id} 相同。
+    """
+    logger.info("【API /search/batch】收到批量检索请求: %s 条参考文献", len(request.references))
+    logger.info("智能匹配: %s", '启用' if request.use_smart_matching else '禁用')
+    include = _article_projection(request.fields, request.compact)
+    
+    semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+    resolver = _search_duplicates(request.references, "batch")
+    
+    async def search_one(reference: ReferenceItem) -> Dict[str, Any]:
+        keywords_dict = _to_keywords_dict(reference.extracted_keywords.dict())
+        search_id = _search_id(reference.search_id, request.incremental)
         
-        # 搜索文章
-        articles = await pubmed_service.search_articles(keywords_dict, use_smart_matching=use_smart_matching)
+        async def search() -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await presearch_service.search(
+                    keywords_dict,
+                    use_smart_matching=request.use_smart_matching,
+                    use_semantic_matching=request.use_semantic_matching,
+                    session_id=search_id
+                )
         
-        if not articles:
-            logger.info(f"【API /search】未找到匹配文章: {reference_id}")
-            return {
-                "reference_id": reference_id,
+        try:
+            articles = await resolver.resolve(reference.id, keywords_dict, search)
+            result = _with_search_id(_build_search_result(reference.id, keywords_dict, articles, include), search_id)
+        except Exception as e:
+            logger.error("【API /search/batch】检索失败: %s, 错误: %s", reference.id, str(e), exc_info=True)
+            result = {
+                "reference_id": reference.id,
                 "matched_articles": [],
-                "status": "not_found"
+                "status": "not_found",
+                "error": f"搜索参考文献失败: {str(e)}"
             }
+        if resolver.duplicate_of(reference.id):
+            result["duplicate_of"] = resolver.duplicate_of(reference.id)
+        return result
+    
+    results = await asyncio.gather(*(search_one(reference) for reference in request.references))
+    logger.info("【API /search/batch】批量检索完成: %s 条参考文献", len(results))
+    return FastJSONResponse({"results": {result["reference_id"]: result for result in results}})
+
+
+def _search_duplicates(references: List[ReferenceItem], pipeline: str) -> DuplicateResolver:
+    """登记批量检索的参考文献，检测重复（同一篇文献只检索一次，以列表中第一条为准）"""
+    resolver = DuplicateResolver()
+    for reference in references:
+        resolver.register(reference.id, reference.extracted_keywords.dict())
+    if resolver.duplicates:
+        DUPLICATE_REFERENCES.inc(len(resolver.duplicates), pipeline=pipeline)
+        logger.info("检测到 %s 条重复参考文献，共 %s 篇不同文献",
+                    len(resolver.duplicates), len(references) - len(resolver.duplicates))
+    return resolver
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """构建一条 Server-Sent Events 消息"""
+    return f"event: {event}\ndata: {dumps(data).decode('utf-8')}\n\n"
+
+
+@router.post("/search/stream")
+async def search_references_stream(request: Request, body: ReferenceBatchSearchRequest):
+    """流式批量检索参考文献（Server-Sent Events）
+
+    事件类型：
+    - progress: 检索进度（开始执行的策略、获取到的候选文章数）
+    - result: 单条参考文献的检索结果，格式与 /api/search/{reference_id} 相同，检索完成后立即推送；
+      同一篇文献的多条参考文献只检索一次（进度事件只针对第一条），重复的参考文献的结果带有 duplicate_of
+    - done: 全部参考文献检索完成
+    客户端断开连接时取消尚未完成的检索。fields / compact / incremental 的含义与 /api/search/{reference_id} 相同。
+    """
+    logger.info("【API /search/stream】收到流式检索请求: %s 条参考文献", len(body.references))
+    include = _article_projection(body.fields, body.compact)
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    semaphore = asyncio.Semaphore(BATCH_SEARCH_CONCURRENCY)
+    resolver = _search_duplicates(body.references, "stream")
+    
+    async def search_one(reference: ReferenceItem) -> None:
+        keywords_dict = _to_keywords_dict(reference.extracted_keywords.dict())
+        search_id = _search_id(reference.search_id, body.incremental)
         
-        logger.info(f"【API /search】检索服务返回 {len(articles)} 篇文章（已内部评估和筛选）")
+        def on_progress(event: Dict[str, Any]) -> None:
+            queue.put_nowait(("progress", {"reference_id": reference.id, **event}))
         
-        # search_articles 已经在内部完成了评估和筛选，这里只需要构建响应对象
-        # 使用文章中的相似度信息（如果存在），否则重新计算
-        matched_articles = []
-        for article in articles:
-            article_keywords = {
-                "title": article.get("title"),
-                "authors": article.get("authors", []),
-                "journal": article.get("journal"),
-                "year": article.get("year"),
-                "volume": article.get("volume"),
-                "issue": article.get("issue"),
-                "pages": article.get("pages"),
-                "pmid": article.get("pmid"),
-                "doi": article.get("doi")
-            }
-            
-            # 使用文章中的相似度信息（如果存在），否则重新计算
-            if "_similarity_score" in article:
-                similarity = article["_similarity_score"]
-                # 移除临时字段
-                del article["_similarity_score"]
-            else:
-                similarity = similarity_service.calculate_similarity(keywords_dict, article_keywords)
-            
-            # 获取匹配类型（如果存在）
-            match_type = article.get("_match_type")
-            if match_type and "_match_type" in article:
-                # 移除临时字段
-                del article["_match_type"]
-            
-            differences = similarity_service.find_differences(keywords_dict, article_keywords)
-            
-            matched_article = PubMedArticle(
-                pmid=article.get("pmid"),
-                title=article.get("title"),
-                authors=article.get("authors", []),
-                journal=article.get("journal"),
-                year=article.get("year"),
-                volume=article.get("volume"),
-                issue=article.get("issue"),
-                pages=article.get("pages"),
-                doi=article.get("doi"),
-                abstract=article.get("abstract"),
-                keywords=ReferenceKeyword(**article_keywords),
-                similarity_score=similarity,
-                differences=differences,
-                match_type=match_type
-            )
-            matched_articles.append(matched_article)
-            match_type_str = f" ({match_type})" if match_type else ""
-            logger.info(f"  文章 PMID={article.get('pmid')}, 相似度={similarity:.4f}{match_type_str}")
-        logger.info(f"\n相似度排序后，共 {len(matched_articles)} 篇匹配文章")
-        for idx, art in enumerate(matched_articles, 1):
-            match_type_info = f", 匹配类型={art.match_type}" if art.match_type else ""
-            logger.info(f"  [{idx}] PMID={art.pmid}, 相似度={art.similarity_score:.4f}{match_type_info}, 标题={art.title[:60]}...")
+        async def search() -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await presearch_service.search(
+                    keywords_dict,
+                    use_smart_matching=body.use_smart_matching,
+                    use_semantic_matching=body.use_semantic_matching,
+                    on_progress=on_progress,
+                    session_id=search_id
+                )
         
-        # 注意：不再截断结果，即使相似度100%也返回所有匹配的文章（包括DOI匹配的文章）
-        # 这样用户可以看到所有可能的匹配结果并选择
+        try:
+            articles = await resolver.resolve(reference.id, keywords_dict, search)
+            result = _with_search_id(_build_search_result(reference.id, keywords_dict, articles, include), search_id)
+        except Exception as e:
+            logger.error("【API /search/stream】检索失败: %s, 错误: %s", reference.id, str(e), exc_info=True)
+            result = {
+                "reference_id": reference.id,
+                "matched_articles": [],
+                "status": "not_found",
+                "error": f"搜索参考文献失败: {str(e)}"
+            }
+        if resolver.duplicate_of(reference.id):
+            result["duplicate_of"] = resolver.duplicate_of(reference.id)
+        queue.put_nowait(("result", result))
+    
+    async def event_stream():
+        tasks = [asyncio.ensure_future(search_one(reference)) for reference in body.references]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        logger.info("【API /search/stream】客户端已断开连接，取消剩余检索")
+                        return
+                    continue
+                if event == "result":
+                    remaining -= 1
+                yield _sse_event(event, data)
+            yield _sse_event("done", {"count": len(tasks)})
+            logger.info("【API /search/stream】流式检索完成: %s 条参考文献", len(tasks))
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/search/{reference_id}")
+async def search_reference(reference_id: str, keywords: Dict[str, Any], debug: Optional[str] = None,
+                           fields: Optional[str] = None, compact: bool = False, search_id: Optional[str] = None,
+                           incremental: bool = False):
+    """搜索参考文献
+
+    响应头 Server-Timing 包含各顶层阶段的耗时；debug=timings（查询参数或请求体字段）时
+    在结果中附加完整的耗时区间树（各优先级/策略、上游请求、评分）。
+    fields=pmid,title,similarity_score（查询参数或请求体字段）时每篇文章只返回指定字段；
+    compact=true 时不返回 keywords（与顶层字段重复）和 abstract（通过 /api/articles/{pmid}/abstract 获取）。
+    incremental=true（查询参数或请求体字段）时保存检索会话，响应中的 search_id 为增量检索的会话ID：
+    修改个别字段后再次检索时传回（查询参数或请求体字段），上次获取的候选文章重新评分，只执行检索条件变化的策略。
+    """
+    logger.info("【API /search】收到参考文献检索请求: %s", reference_id)
+    logger.debug("输入关键词: %s", keywords)
+    
+    # 提取智能匹配参数
+    use_smart_matching = keywords.get("use_smart_matching", False)
+    use_semantic_matching = keywords.get("use_semantic_matching", False)
+    debug = debug or keywords.get("debug")
+    include = _article_projection(fields or keywords.get("fields"), compact or bool(keywords.get("compact")))
+    search_id = _search_id(search_id or keywords.get("search_id"), incremental or bool(keywords.get("incremental")))
+    logger.info("智能匹配: %s", '启用' if use_smart_matching else '禁用')
+    logger.info("本地语义重排序: %s", '启用' if use_semantic_matching else '禁用')
+    
+    try:
+        keywords_dict = _to_keywords_dict(keywords)
         
-        status = "matched" if matched_articles else "not_found"
+        with tracing.trace("search", reference_id=reference_id) as root:
+            # 搜索文章
+            articles = await presearch_service.search(
+                keywords_dict, use_smart_matching=use_smart_matching, use_semantic_matching=use_semantic_matching,
+                session_id=search_id
+            )
+            
+            result = _with_search_id(_build_search_result(reference_id, keywords_dict, articles, include), search_id)
         
-        logger.info(f"【API /search】检索完成: {reference_id}, 状态={status}, 返回 {len(matched_articles)} 篇文章")
-        return {
-            "reference_id": reference_id,
-            "matched_articles": [article.dict() for article in matched_articles],
-            "status": status
-        }
+        if debug == "timings":
+            result["timings"] = root.to_dict()
+        return FastJSONResponse(result, headers={"Server-Timing": tracing.server_timing(root)})
     except Exception as e:
-        logger.error(f"【API /search】检索失败: {reference_id}, 错误: {str(e)}", exc_info=True)
+        logger.error("【API /search】检索失败: %s, 错误: %s", reference_id, str(e), exc_info=True)
         raise HTTPException(status_code=500, detail=f"搜索参考文献失败: {str(e)}")
 
 
+@router.delete("/presearch/{presearch_id}")
+async def cancel_presearch(presearch_id: str):
+    """取消 /api/split 安排的预检索（已完成的预检索结果保留在缓存中）"""
+    cancelled = presearch_service.cancel(presearch_id)
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail=f"预检索不存在或已全部完成: {presearch_id}")
+    return {"presearch_id": presearch_id, "cancelled": cancelled}
+
+
+@router.delete("/cache/results")
+async def clear_result_cache():
+    """清空检索结果缓存（文章缓存保留）"""
+    await pubmed_service.result_cache.clear()
+    logger.info("【API /cache/results】已清空检索结果缓存")
+    return {"cleared": True}
+
+
+@router.post("/cache/results/invalidate")
+async def invalidate_result_cache(keywords: ReferenceKeyword):
+    """删除一条参考文献（按关键词指纹）在所有匹配模式下的缓存结果，之后的检索重新执行完整检索"""
+    invalidated = await pubmed_service.result_cache.invalidate(_to_keywords_dict(keywords.dict()))
+    logger.info("【API /cache/results】删除 %s 条缓存的检索结果", invalidated)
+    return {"invalidated": invalidated}
+
+
+@router.get("/articles/{pmid}/abstract")
+async def get_article_abstract(pmid: str):
+    """获取文章摘要（检索结果使用 compact 或 fields 省略摘要时按需加载）
+
+    优先从本地文章存储读取（检索过程中获取过完整记录的文章无需访问PubMed）。
+    """
+    pmid = pmid.strip()
+    if not pmid.isdigit():
+        raise HTTPException(status_code=400, detail=f"无效的PMID: {pmid}")
+    article = await pubmed_service.fetch_article_details(pmid)
+    if not article:
+        raise HTTPException(status_code=404, detail=f"文章不存在: {pmid}")
+    return {"pmid": pmid, "abstract": article.get("abstract")}
+
+
+# 批量校验任务服务（工作协程在应用启动时创建）
+job_service = JobService(llm_service, pubmed_service, _build_search_result)
+
+
+@router.post("/jobs")
+async def create_job(request: JobCreateRequest):
+    """提交批量校验任务，立即返回任务ID
+
+    任务在后台按参考文献逐条处理，结果持久化，服务重启后自动继续。
+    通过 GET /api/jobs/{job_id} 查询进度，GET /api/jobs/{job_id}/results 获取结果。
+    """
+    if not request.references and not (request.text and request.text.strip()):
+        raise HTTPException(status_code=400, detail="请提供参考文献列表原文（text）或已拆分的参考文献（references）")
+    
+    references = [reference.dict() for reference in request.references] if request.references else None
+    job_id = job_service.submit(
+        text=request.text,
+        references=references,
+        use_smart_matching=request.use_smart_matching,
+        use_semantic_matching=request.use_semantic_matching
+    )
+    logger.info("【API /jobs】已创建任务: %s", job_id)
+    return job_service.get_job(job_id)
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """查询任务进度"""
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    return job
+
+
+@router.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, fields: Optional[str] = None, compact: bool = False):
+    """获取任务结果（已完成的参考文献包含检索结果，未完成的 result 为空）
+
+    fields / compact 的含义与 /api/search/{reference_id} 相同。
+    """
+    include = _article_projection(fields, compact)
+    results = job_service.get_results(job_id)
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"任务不存在: {job_id}")
+    if include is not None:
+        for reference in results.get("references") or []:
+            reference["result"] = _project_result(reference.get("result"), include)
+    return FastJSONResponse(results)
+
+
+@router.post("/validate")
+async def validate_references(request: ValidateRequest):
+    """一次性校验参考文献列表
+
+    服务端流水线完成拆分、关键词提取、检索、纠正和格式化，各条参考文献的阶段重叠执行。
+    每条参考文献返回最佳匹配文章和校验状态（verified / corrected / unverified / not_found），
+    formatted_text 为纠正后按 target_format 格式化的参考文献列表。
+    """
+    logger.info("【API /validate】收到校验请求: 文本长度 %s 字符, 目标格式 %s", len(request.text), request.target_format)
+    
+    try:
+        return await validation_service.validate(
+            request.text,
+            target_format=request.target_format,
+            use_smart_matching=request.use_smart_matching,
+            use_semantic_matching=request.use_semantic_matching,
+            correction_threshold=request.correction_threshold
+        )
+    except Exception as e:
+        logger.error("【API /validate】校验失败: %s", str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail=f"校验参考文献失败: {str(e)}")
+
+
 @router.post("/format")
 async def format_references(request: Dict[str, Any]):
     """格式化参考文献"""
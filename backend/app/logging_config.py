@@ -0,0 +1,81 @@
+from typing import Dict
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# 全局日志级别
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").strip().upper()
+# 按模块设置日志级别，如 "app.services.similarity_service=DEBUG,httpx=WARNING"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# 日志格式：text（默认，便于阅读）或 json（每行一个JSON对象，便于日志系统采集）
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").strip().lower()
+# 相似度评分调试日志的采样率（0~1）：相似度模块为DEBUG级别时，只详细记录该比例的评分过程
+SCORING_LOG_SAMPLE_RATE = float(os.getenv("SCORING_LOG_SAMPLE_RATE", "0.01"))
+
+# 第三方库的默认级别（httpx 在INFO级别会为每个E-utilities请求输出一行），可被 LOG_LEVELS 覆盖
+DEFAULT_MODULE_LEVELS = {"httpx": logging.WARNING, "httpcore": logging.WARNING}
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# LogRecord 的标准属性，其余属性（通过 extra 传入）作为结构化字段输出
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，extra 传入的字段原样作为顶层字段"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                    + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """解析 "模块=级别,模块=级别" 格式的配置，忽略无法识别的条目"""
+    levels: Dict[str, int] = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        name, level = name.strip(), level.strip().upper()
+        if not sep or not name:
+            continue
+        value = logging.getLevelName(level)
+        if isinstance(value, int):
+            levels[name] = value
+    return levels
+
+
+def configure_logging() -> None:
+    """按环境变量配置日志（应用启动时调用一次）"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    level = logging.getLevelName(LOG_LEVEL)
+    root.setLevel(level if isinstance(level, int) else logging.INFO)
+
+    for name, module_level in {**DEFAULT_MODULE_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+        logging.getLogger(name).setLevel(module_level)
+
+
+def sampled_debug(logger: logging.Logger, rate: float = SCORING_LOG_SAMPLE_RATE) -> bool:
+    """是否为本次调用记录详细调试日志
+
+    只有 logger 启用了DEBUG级别时才按采样率抽样；默认配置下直接返回False，调用方不做任何格式化工作。
+    """
+    return logger.isEnabledFor(logging.DEBUG) and random.random() < rate
@@ -1,25 +1,27 @@
+from app.logging_config import configure_logging
+
+# 配置日志（级别、格式由环境变量控制，见 app/logging_config.py）；在导入各服务模块前配置，以免丢失导入时的日志
+configure_logging()
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from app.api.routes import router, job_service, presearch_service, pubmed_service
+from app.responses import FastJSONResponse, CompressionMiddleware
+from app.services.scoring_executor import shutdown_scoring_pool
+from app.services.metrics import render_metrics, HTTP_REQUESTS, HTTP_DURATION, INFLIGHT_REQUESTS
 import logging
-import sys
 import os
-
-# 配置日志 - 输出到控制台
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+import time
+import weakref
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="参考文献校验工具API",
     description="医学科研参考文献校验、补全和纠正工具",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 logger.info("="*80)
@@ -43,25 +45,86 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 较大的JSON响应按 Accept-Encoding 压缩（br/gzip），SSE等流式响应不压缩
+app.add_middleware(CompressionMiddleware)
+
 app.include_router(router, prefix="/api", tags=["references"])
 
 
 @app.on_event("startup")
 async def startup_event():
+    await job_service.start()
+    await presearch_service.start()
     logger.info("FastAPI 应用启动完成")
     logger.info("API 文档地址: http://localhost:8000/docs")
     logger.info("等待请求...")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await presearch_service.stop()
+    await job_service.stop()
+    shutdown_scoring_pool()
+    pubmed_service.close()
+    logger.info("FastAPI 应用已关闭")
+
+
+def _track_inflight():
+    """进行中的HTTP请求数加一，返回只生效一次的减一函数"""
+    INFLIGHT_REQUESTS.inc(kind="http")
+    finished = False
+
+    def finish():
+        nonlocal finished
+        if not finished:
+            finished = True
+            INFLIGHT_REQUESTS.dec(kind="http")
+    return finish
+
+
+async def _tracked_body(body_iterator, finish):
+    """响应体发送完毕、出错或连接断开（迭代器被关闭）时调用 finish"""
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        finish()
+
+
 @app.middleware("http")
 async def log_requests(request, call_next):
-    logger.info(f"\n{'='*80}")
-    logger.info(f"收到请求: {request.method} {request.url.path}")
-    logger.info(f"客户端: {request.client.host if request.client else 'unknown'}")
-    
-    response = await call_next(request)
+    start = time.perf_counter()
+    status = "500"
+    # call_next 在响应头就绪时即返回：流式响应（如 /api/search/stream 的SSE）在响应体发送完毕后才算完成
+    finish = _track_inflight()
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+    except BaseException:
+        finish()
+        raise
+    finally:
+        # 按路由模板统计（如 /api/search/{reference_id}），避免标签基数随路径参数增长
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status)
+        HTTP_DURATION.observe(time.perf_counter() - start, method=request.method, route=route_path)
+    response.body_iterator = _tracked_body(response.body_iterator, finish)
+    # 发送响应头前连接已断开时响应体不会被迭代，响应对象释放时减一
+    weakref.finalize(response, finish)
     
-    logger.info(f"响应状态: {response.status_code}")
+    if logger.isEnabledFor(logging.DEBUG):
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.debug(
+            "%s %s -> %s (%.1fms)", request.method, request.url.path, response.status_code, duration_ms,
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": duration_ms,
+                "client": request.client.host if request.client else "unknown"
+            }
+        )
     return response
 
 
@@ -74,3 +137,8 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 指标（文本格式，进程内统计）"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -41,16 +41,53 @@ class ReferenceItem(BaseModel):
     extracted_keywords: ReferenceKeyword = Field(default_factory=ReferenceKeyword)
     matched_articles: List[PubMedArticle] = Field(default_factory=list)
     status: str = "pending"  # pending, matched, not_found, completed
+    search_id: Optional[str] = None  # 增量检索的会话ID，由检索响应返回，修改关键词后再次检索时传回
+    duplicate_of: Optional[str] = None  # 与列表中前面的某条参考文献为同一篇文献时，为该参考文献的ID
 
 
 class ReferenceSplitRequest(BaseModel):
-    """参考文献拆分请求"""
+    """参考文献拆分请求
+
+    presearch=True 时拆分完成后立即在后台预检索每条参考文献（匹配模式按 use_smart_matching /
+    use_semantic_matching），之后以相同关键词和匹配模式发起的检索直接使用预检索结果。
+    """
     text: str
+    presearch: bool = False
+    use_smart_matching: bool = False
+    use_semantic_matching: bool = False
 
 
 class ReferenceSplitResponse(BaseModel):
-    """参考文献拆分响应"""
+    """参考文献拆分响应（presearch_id 用于取消预检索）"""
     references: List[ReferenceItem]
+    presearch_id: Optional[str] = None
+
+
+class ReferenceBatchSearchRequest(BaseModel):
+    """批量检索请求（/api/split 返回的全部参考文献）"""
+    references: List[ReferenceItem]
+    use_smart_matching: bool = False
+    use_semantic_matching: bool = False
+    fields: Optional[str] = None  # 逗号分隔的文章字段，只返回这些字段
+    compact: bool = False  # 不返回 keywords 和 abstract
+    incremental: bool = False  # 保存检索会话，结果带 search_id（之后修改关键词时增量检索）
+
+
+class JobCreateRequest(BaseModel):
+    """批量校验任务请求（提供参考文献列表原文，或 /api/split 返回的参考文献）"""
+    text: Optional[str] = None
+    references: Optional[List[ReferenceItem]] = None
+    use_smart_matching: bool = False
+    use_semantic_matching: bool = False
+
+
+class ValidateRequest(BaseModel):
+    """一次性校验请求（拆分、提取、检索、纠正、格式化）"""
+    text: str
+    target_format: str = "original"  # original, apa, mla, ama, nlm, gb2015, numeric, author_year
+    use_smart_matching: bool = False
+    use_semantic_matching: bool = False
+    correction_threshold: float = 0.9  # 相似度达到该阈值（或DOI/PMID匹配）时自动纠正
 
 
 class ReferenceProcessRequest(BaseModel):
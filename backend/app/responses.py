@@ -0,0 +1,140 @@
+"""快速JSON响应和响应压缩
+
+- FastJSONResponse：安装了 orjson 时用 orjson 序列化（比标准库 json 快数倍），否则退回标准库。
+  路由直接返回 FastJSONResponse 时，FastAPI 不再对返回值做 jsonable_encoder 转换。
+- CompressionMiddleware：按 Accept-Encoding 协商 br（安装了 brotli 时）或 gzip，
+  只压缩一次性返回、超过 RESPONSE_COMPRESSION_MIN_SIZE 字节的JSON响应；流式响应（如SSE）原样透传。
+"""
+from typing import Any, Optional
+import gzip
+import json
+import os
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 是可选依赖
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 是可选依赖
+    brotli = None
+
+# 响应体超过该大小（字节）时压缩，0 表示不压缩
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+# 压缩级别：gzip 1~9，brotli 0~11（检索响应为一次性生成，选择速度与压缩率平衡的级别）
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/plain")
+
+
+def _default(obj: Any) -> Any:
+    """orjson 不支持的类型（numpy 数值、pydantic 模型等）"""
+    if hasattr(obj, "item"):
+        return obj.item()
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为UTF-8编码的JSON（不转义非ASCII字符）"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """用 dumps 序列化的JSON响应（内容须为 dict/list 等可直接序列化的数据）"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    """按 Accept-Encoding 选择压缩方式（br 优先），q=0 表示不接受"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """压缩较大的JSON响应（ASGI中间件）
+
+    只处理响应体在一条消息中发送完毕的响应，分块发送的流式响应不缓冲、不压缩，
+    保证SSE事件即时送达（与Starlette版本无关）。
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = RESPONSE_COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.minimum_size <= 0:
+            await self.app(scope, receive, send)
+            return
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or not content_type.startswith(_COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # 流式响应或小响应：原样发送
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+            compressed = compress(body, encoding)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,136 @@
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+import copy
+import logging
+import os
+import threading
+
+from app.services.title_index import TitleLSHIndex
+from app.services.cache_backend import CacheBackend
+from app.services.metrics import record_cache, CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# 本地文章缓存的最大文章数（按最近使用淘汰）
+ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "20000"))
+
+
+class ArticleStore:
+    """已获取文章的本地存储
+
+    按PMID保存 fetch_article_details 解析出的文章，并维护标题的MinHash/LSH索引，
+    使重复出现的参考文献可以在本地解析，无需访问PubMed。
+    配置共享缓存后端时，文章同时写入后端，其他工作进程获取过的文章按PMID也能命中
+    （标题索引只包含本进程见过的文章）。
+
+    候选文章的摘要信息（esummary，不含摘要正文）单独保存，不进入标题索引，get 不会返回摘要信息。
+    读写共享缓存后端的方法是协程（SQLite后端在线程中读写）。
+    """
+
+    def __init__(self, max_size: int = ARTICLE_CACHE_SIZE, backend: Optional[CacheBackend] = None):
+        self.max_size = max_size
+        self.backend = backend
+        self._articles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._title_index = TitleLSHIndex()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    async def get(self, pmid: str) -> Optional[Dict[str, Any]]:
+        """按PMID获取文章（返回副本，调用方可以自由修改）"""
+        with self._lock:
+            article = self._articles.get(pmid)
+            if article is not None:
+                self._articles.move_to_end(pmid)
+                self.hits += 1
+                record_cache("article", True)
+                return copy.deepcopy(article)
+        shared = await self.backend.aget("article", pmid) if self.backend is not None else None
+        if shared is None:
+            with self._lock:
+                self.misses += 1
+            record_cache("article", False)
+            return None
+        with self._lock:
+            self.hits += 1
+            self._insert(pmid, shared)
+        # 本进程未命中，由其他工作进程写入的共享缓存命中
+        CACHE_REQUESTS.inc(cache="article", result="shared_hit")
+        return copy.deepcopy(shared)
+
+    async def put(self, article: Dict[str, Any]) -> None:
+        """保存文章，并增量更新标题索引"""
+        pmid = article.get("pmid")
+        if not pmid or self.max_size <= 0:
+            return
+        # 不保存检索过程中添加的临时字段
+        stored = {k: copy.deepcopy(v) for k, v in article.items() if not k.startswith("_")}
+        with self._lock:
+            self._insert(pmid, stored)
+        if self.backend is not None:
+            await self.backend.aset("article", pmid, stored)
+
+    def _insert(self, pmid: str, stored: Dict[str, Any]) -> None:
+        """写入本进程的存储和标题索引（调用方持有锁）"""
+        self._articles[pmid] = stored
+        self._articles.move_to_end(pmid)
+        self._title_index.add(pmid, stored.get("title") or "")
+        while len(self._articles) > self.max_size:
+            evicted, _ = self._articles.popitem(last=False)
+            self._title_index.remove(evicted)
+
+    async def get_summary(self, pmid: str) -> Optional[Dict[str, Any]]:
+        """按PMID获取用于评分的文章记录：有完整记录时返回完整记录，否则返回摘要信息（返回副本）
+
+        只记录 article_summary 缓存的命中率：未获取完整记录不是文章缓存的未命中。
+        """
+        with self._lock:
+            summary = self._articles.get(pmid)
+            if summary is not None:
+                self._articles.move_to_end(pmid)
+            else:
+                summary = self._summaries.get(pmid)
+                if summary is not None:
+                    self._summaries.move_to_end(pmid)
+        if summary is None and self.backend is not None:
+            article = await self.backend.aget("article", pmid)
+            if article is not None:
+                summary = article
+                with self._lock:
+                    self._insert(pmid, article)
+            else:
+                summary = await self.backend.aget("article_summary", pmid)
+                if summary is not None:
+                    with self._lock:
+                        self._insert_summary(pmid, summary)
+        record_cache("article_summary", summary is not None)
+        return copy.deepcopy(summary) if summary is not None else None
+
+    async def put_summary(self, summary: Dict[str, Any]) -> None:
+        """保存文章的摘要信息"""
+        pmid = summary.get("pmid")
+        if not pmid or self.max_size <= 0:
+            return
+        stored = {k: copy.deepcopy(v) for k, v in summary.items() if not k.startswith("_")}
+        with self._lock:
+            self._insert_summary(pmid, stored)
+        if self.backend is not None:
+            await self.backend.aset("article_summary", pmid, stored)
+
+    def _insert_summary(self, pmid: str, stored: Dict[str, Any]) -> None:
+        self._summaries[pmid] = stored
+        self._summaries.move_to_end(pmid)
+        while len(self._summaries) > self.max_size:
+            self._summaries.popitem(last=False)
+
+    def find_similar_titles(self, title: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        """通过LSH索引查找标题近似的已缓存文章（返回副本），供相似度服务精确评分"""
+        if not title:
+            return []
+        with self._lock:
+            matches = self._title_index.query(title, max_results=max_results)
+            return [copy.deepcopy(self._articles[pmid]) for _, pmid in matches if pmid in self._articles]
@@ -0,0 +1,231 @@
+from typing import Any, Optional
+from collections import OrderedDict
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 缓存后端：memory（进程内，默认）或 sqlite（多个工作进程共享同一个数据库文件）
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+# sqlite 缓存数据库路径
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join("data", "cache.db"))
+# 进程内缓存的最大条目数（按最近使用淘汰）
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+
+
+class CacheBackend:
+    """缓存后端接口
+
+    按命名空间（如 article、eutils、llm）存取可JSON序列化的值，支持过期时间。
+    get 返回的总是新对象，调用方可以自由修改。
+    在事件循环中使用 aget、aset 等异步方法：读写需要磁盘I/O的后端（blocking）在线程中执行，不阻塞事件循环。
+    """
+
+    # 是否跨进程共享（共享后端同时提供跨进程的NCBI请求配额）
+    shared = False
+    # 读写是否阻塞（磁盘I/O、等待其他进程的写锁）
+    blocking = False
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    def trim(self, namespace: str, max_entries: int) -> None:
+        """命名空间中的条目超过 max_entries 时删除最早过期（同一TTL即最早写入）的条目"""
+        raise NotImplementedError
+
+    async def _run(self, method, *args, **kwargs) -> Any:
+        if self.blocking:
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return method(*args, **kwargs)
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        return await self._run(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self._run(self.set, namespace, key, value, ttl)
+
+    async def adelete(self, namespace: str, key: str) -> None:
+        await self._run(self.delete, namespace, key)
+
+    async def aclear(self, namespace: Optional[str] = None) -> None:
+        await self._run(self.clear, namespace)
+
+    async def atrim(self, namespace: str, max_entries: int) -> None:
+        await self._run(self.trim, namespace, max_entries)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内缓存（LRU），单进程部署使用"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # (命名空间, 键) -> (过期时间, JSON文本)
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + ttl if ttl else None
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._entries[(namespace, key)] = (expires_at, serialized)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for entry_key in [k for k in self._entries if k[0] == namespace]:
+                    del self._entries[entry_key]
+
+    def trim(self, namespace: str, max_entries: int) -> None:
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == namespace]
+            # 按最近使用排序，淘汰最久未使用的条目
+            for entry_key in keys[:max(len(keys) - max_entries, 0)]:
+                del self._entries[entry_key]
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """基于SQLite（WAL模式）的共享缓存
+
+    多个工作进程打开同一个数据库文件，共享文章、查询和大模型缓存。
+    WAL模式下读操作不阻塞写操作；每个线程使用独立的连接，异步方法在线程中执行。
+    """
+
+    shared = True
+    blocking = True
+
+    # 每写入多少次清理一次过期条目
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, db_path: str = CACHE_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # fork 出的子进程不能复用父进程的连接
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_INTERVAL == 0:
+                    conn.execute(
+                        "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),)
+                    )
+        except sqlite3.Error as e:
+            # 缓存写入失败不影响检索
+            logger.warning("写入共享缓存失败: %s/%s, 错误: %s", namespace, key, str(e))
+
+    def delete(self, namespace: str, key: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        conn = self._connection()
+        with conn:
+            if namespace is None:
+                conn.execute("DELETE FROM cache_entries")
+            else:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (namespace,))
+
+    def trim(self, namespace: str, max_entries: int) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_entries)
+            )
+
+
+_cache_backend: Optional[CacheBackend] = None
+_cache_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """获取全局缓存后端（按 CACHE_BACKEND 配置，首次使用时创建）"""
+    global _cache_backend
+    if _cache_backend is None:
+        with _cache_backend_lock:
+            if _cache_backend is None:
+                if CACHE_BACKEND == "sqlite":
+                    logger.info("使用共享缓存: SQLite %s", CACHE_DB_PATH)
+                    _cache_backend = SQLiteCacheBackend(CACHE_DB_PATH)
+                else:
+                    if CACHE_BACKEND != "memory":
+                        logger.warning("未知的缓存后端 %s，使用进程内缓存", CACHE_BACKEND)
+                    _cache_backend = MemoryCacheBackend()
+    return _cache_backend
@@ -0,0 +1,126 @@
+from typing import Dict, Any, List, Optional, Tuple
+import heapq
+import itertools
+
+
+class CandidateEntry:
+    """候选池中的一篇文章"""
+
+    __slots__ = ("pmid", "article", "score", "match_type", "seq")
+
+    def __init__(self, pmid: str, article: Dict[str, Any], score: float, match_type: Optional[str], seq: int):
+        self.pmid = pmid
+        self.article = article
+        self.score = score
+        self.match_type = match_type
+        self.seq = seq
+
+
+class CandidatePool:
+    """单次检索的候选文章池
+
+    按PMID索引，保存每篇文章的最高相似度和匹配类型（doi_match/pmid_match），
+    合并为O(1)操作，并通过堆提供按相似度排序的Top-K访问。
+    同时记录本次检索已获取过的PMID（包括被丢弃的文章），避免重复获取。
+    """
+
+    MATCH_TYPES = ("doi_match", "pmid_match")
+
+    def __init__(self):
+        self._entries: Dict[str, CandidateEntry] = {}
+        self._seen: set = set()
+        # 惰性堆：元素为 (-相似度, 序号, PMID)，文章分数更新后旧元素作废
+        self._heap: List[Tuple[float, int, str]] = []
+        self._stale = 0
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, pmid: str) -> bool:
+        return pmid in self._entries
+
+    def get(self, pmid: str) -> Optional[CandidateEntry]:
+        return self._entries.get(pmid)
+
+    def mark_seen(self, pmid: str) -> None:
+        """记录已获取过的PMID"""
+        self._seen.add(pmid)
+
+    def is_seen(self, pmid: str) -> bool:
+        return pmid in self._seen or pmid in self._entries
+
+    def seen_pmids(self) -> List[str]:
+        """本次检索获取过的全部PMID（包括被丢弃的文章）"""
+        return [pmid for pmid in self._seen | set(self._entries) if pmid]
+
+    def add(self, article: Dict[str, Any], score: float, match_type: Optional[str] = None) -> bool:
+        """合并一篇文章，保留最高相似度；已有匹配类型时不会被清除
+
+        Returns:
+            是否新增或提升了该文章的相似度
+        """
+        pmid = article.get("pmid")
+        self._seen.add(pmid)
+        match_type = match_type or article.get("_match_type")
+        if match_type not in self.MATCH_TYPES:
+            match_type = None
+
+        entry = self._entries.get(pmid)
+        if entry is not None:
+            if match_type and not entry.match_type:
+                entry.match_type = match_type
+            if score <= entry.score:
+                return False
+            entry.score = score
+            entry.seq = next(self._counter)
+            self._stale += 1
+        else:
+            entry = CandidateEntry(pmid, article, score, match_type, next(self._counter))
+            self._entries[pmid] = entry
+
+        heapq.heappush(self._heap, (-entry.score, entry.seq, pmid))
+        if self._stale > len(self._entries):
+            self._compact()
+        return True
+
+    def add_all(self, scored: List[Tuple[float, Dict[str, Any]]]) -> None:
+        for score, article in scored:
+            self.add(article, score)
+
+    def _compact(self) -> None:
+        """清理堆中作废的元素"""
+        self._heap = [(-e.score, e.seq, e.pmid) for e in self._entries.values()]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def top_k(self, k: Optional[int] = None) -> List[CandidateEntry]:
+        """按相似度降序返回前K篇文章（相同分数按加入顺序）"""
+        if k is None:
+            k = len(self._entries)
+        # 作废元素最多 self._stale 个，多取这些即可保证结果完整
+        result = []
+        for neg_score, seq, pmid in heapq.nsmallest(k + self._stale, self._heap):
+            entry = self._entries.get(pmid)
+            if entry is None or entry.seq != seq:
+                continue
+            result.append(entry)
+            if len(result) >= k:
+                break
+        return result
+
+    def matched(self) -> List[CandidateEntry]:
+        """DOI/PMID匹配的文章（按加入顺序）"""
+        return [e for e in self._entries.values() if e.match_type]
+
+    def candidates(self) -> List[CandidateEntry]:
+        """非DOI/PMID匹配的候选文章（按加入顺序）"""
+        return [e for e in self._entries.values() if not e.match_type]
+
+    def annotate(self, entry: CandidateEntry, score: Optional[float] = None) -> Dict[str, Any]:
+        """在文章对象中写入相似度和匹配类型（临时字段），返回文章对象"""
+        article = entry.article
+        article["_similarity_score"] = entry.score if score is None else score
+        if entry.match_type:
+            article["_match_type"] = entry.match_type
+        return article
@@ -0,0 +1,49 @@
+from typing import Optional
+import logging
+import os
+
+import httpx
+
+from app.services.literature_backend import BackendError, LiteratureBackend, clean_doi
+from app.services.metrics import UPSTREAM_RESPONSES, INFLIGHT_REQUESTS
+from app.services import tracing
+
+logger = logging.getLogger(__name__)
+
+# DOI -> PMID 转换服务（NCBI PMC ID Converter，不占用E-utilities配额；可指向本地模拟服务）
+DOI_RESOLVER_URL = os.getenv("DOI_RESOLVER_URL", "https://pmc.ncbi.nlm.nih.gov/tools/idconv/api/v1/articles/")
+PUBMED_EMAIL = os.getenv("PUBMED_EMAIL", "")
+
+
+class DoiResolverBackend(LiteratureBackend):
+    """只解析DOI的文献来源（NCBI ID Converter）
+
+    只收录PMC中的文章，查不到不代表PubMed中没有（authoritative=False），适合与其他来源竞速。
+    """
+
+    name = "doi_resolver"
+    operations = frozenset({"resolve_doi"})
+
+    def __init__(self, url: str = DOI_RESOLVER_URL):
+        self.url = url
+
+    async def resolve_doi(self, doi: str) -> Optional[str]:
+        doi = clean_doi(doi)
+        params = {"ids": doi, "idtype": "doi", "format": "json", "tool": "reference-validator"}
+        if PUBMED_EMAIL:
+            params["email"] = PUBMED_EMAIL
+        with INFLIGHT_REQUESTS.track(kind="doi_resolver"), tracing.span("doi_resolver"):
+            try:
+                async with httpx.AsyncClient(follow_redirects=True) as client:
+                    response = await client.get(self.url, params=params, timeout=10.0)
+            except Exception:
+                UPSTREAM_RESPONSES.inc(upstream="doi_resolver", endpoint="idconv", status="error")
+                raise
+        UPSTREAM_RESPONSES.inc(upstream="doi_resolver", endpoint="idconv", status=str(response.status_code))
+        if response.status_code != 200:
+            raise BackendError(f"DOI转换服务返回 HTTP {response.status_code}")
+        for record in response.json().get("records") or []:
+            if record.get("pmid"):
+                logger.info("  DOI转换服务找到 PMID: %s", record["pmid"])
+                return str(record["pmid"])
+        return None
@@ -0,0 +1,338 @@
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import asyncio
+import logging
+import os
+import re
+
+import httpx
+from dotenv import load_dotenv
+
+from app.services.literature_backend import BackendError, LiteratureBackend, SearchQuery, clean_doi
+from app.services.pubmed_xml import XML_ERRORS, iter_articles
+from app.services.rate_limiter import AsyncRateLimiter, SharedRateLimiter
+from app.services.cache_backend import CacheBackend, get_cache_backend
+from app.services.metrics import timed_stage, record_cache, UPSTREAM_RESPONSES, INFLIGHT_REQUESTS
+from app.services import tracing
+
+# 加载 .env 文件
+env_path = Path(__file__).parent.parent.parent / '.env'
+if not env_path.exists():
+    env_path = Path(__file__).parent.parent / '.env'
+load_dotenv(env_path)
+
+# E-utilities 地址（可指向镜像或基准测试的本地模拟服务）
+PUBMED_BASE_URL = os.getenv("PUBMED_BASE_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils").rstrip("/")
+PUBMED_EMAIL = os.getenv("PUBMED_EMAIL", "")
+NCBI_API_KEY = os.getenv("NCBI_API_KEY", "")
+# NCBI 限制：无API Key时每秒3次请求，有API Key时每秒10次
+NCBI_RATE_LIMIT = float(os.getenv("NCBI_RATE_LIMIT", "10" if NCBI_API_KEY else "3"))
+# esearch 查询结果的缓存时间（秒），0表示不缓存
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "86400"))
+
+logger = logging.getLogger(__name__)
+
+_TITLE_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'for', 'of', 'in', 'on', 'at', 'to', 'by', 'with', 'is', 'are', 'was', 'were', 'from'}
+
+
+class EutilsBackend(LiteratureBackend):
+    """NCBI E-utilities（esearch / efetch / ecitmatch）"""
+
+    name = "eutils"
+    authoritative = True
+
+    def __init__(self, cache: Optional[CacheBackend] = None):
+        self.email = PUBMED_EMAIL
+        self.cache = cache or get_cache_backend()
+        # 全局NCBI请求配额，所有并发检索（共享缓存时包括所有工作进程）共享
+        if self.cache.shared:
+            self.rate_limiter = SharedRateLimiter(NCBI_RATE_LIMIT, self.cache.db_path)
+        else:
+            self.rate_limiter = AsyncRateLimiter(NCBI_RATE_LIMIT)
+        # 进行中的相同请求（URL+参数），并发检索共享同一个结果
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+
+    async def _eutils_get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        """发送E-utilities请求，返回状态码为200的响应
+
+        受全局NCBI配额限制；并发检索发出的相同请求只发送一次，共享响应。
+        esearch 的成功响应写入查询缓存（efetch 的结果由文章存储缓存）。
+        网络错误原样抛出，非200响应抛出 BackendError：只有成功响应中的空结果才是可信的"未找到"。
+        """
+        cache_key = None
+        if QUERY_CACHE_TTL > 0 and url.endswith("esearch.fcgi"):
+            cache_key = f"{url}?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+            cached = await self.cache.aget("eutils", cache_key)
+            record_cache("eutils_query", cached is not None)
+            if cached is not None:
+                logger.debug("  命中查询缓存: GET %s", url)
+                return httpx.Response(200, text=cached, request=httpx.Request("GET", url, params=params))
+
+        if NCBI_API_KEY:
+            params = {**params, "api_key": NCBI_API_KEY}
+        key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+        task = self._inflight.get(key)
+        record_cache("eutils_inflight", task is not None)
+        if task is None:
+            task = asyncio.ensure_future(self._send_eutils_request(url, params))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        else:
+            logger.debug("  复用进行中的相同请求: GET %s", url)
+        # shield：某个调用方被取消时（包括竞速中落后被取消）不影响共享同一请求的其他调用方
+        response = await asyncio.shield(task)
+        if response.status_code != 200:
+            # 限流（429）、服务端错误等不是"未找到"，由调用方记为出错并查询其他来源
+            raise BackendError(f"{url.rsplit('/', 1)[-1]} 返回 HTTP {response.status_code}")
+        if cache_key is not None:
+            await self.cache.aset("eutils", cache_key, response.text, ttl=QUERY_CACHE_TTL)
+        return response
+
+    def _request_done(self, key: tuple, task: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # 调用方都已取消（如竞速中落后）时由这里取走异常，不记录"未获取的异常"
+        if not task.cancelled():
+            task.exception()
+
+    async def _send_eutils_request(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        endpoint = url.rsplit("/", 1)[-1].replace(".fcgi", "").replace(".cgi", "")
+        await self.rate_limiter.acquire()
+        with INFLIGHT_REQUESTS.track(kind="eutils"), tracing.span(f"eutils.{endpoint}"):
+            try:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url, params=params, timeout=10.0)
+            except Exception:
+                UPSTREAM_RESPONSES.inc(upstream="eutils", endpoint=endpoint, status="error")
+                tracing.annotate(status="error")
+                raise
+            tracing.annotate(status=response.status_code, bytes=len(response.content))
+        UPSTREAM_RESPONSES.inc(upstream="eutils", endpoint=endpoint, status=str(response.status_code))
+        return response
+
+    async def _esearch(self, term: str, retmax: int) -> List[str]:
+        search_url = f"{PUBMED_BASE_URL}/esearch.fcgi"
+        params = {
+            "db": "pubmed",
+            "term": term,
+            "retmode": "json",
+            "retmax": retmax,
+            "sort": "relevance",  # 按最佳匹配排序
+        }
+
+        logger.debug("  发送请求: GET %s", search_url)
+        logger.debug("  请求参数: %s", params)
+
+        response = await self._eutils_get(search_url, params)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  响应内容: %s...", response.text[:500])
+
+        return response.json().get("esearchresult", {}).get("idlist", [])
+
+    async def resolve_doi(self, doi: str) -> Optional[str]:
+        """通过DOI搜索PMID"""
+        doi = clean_doi(doi)
+        logger.info("  通过 DOI 搜索: %s", doi)
+        id_list = await self._esearch(f"{doi}[DOI]", retmax=1)
+        if id_list:
+            logger.info("  找到 PMID: %s", id_list[0])
+            return id_list[0]
+        logger.info("  未找到匹配的 PMID")
+        return None
+
+    @staticmethod
+    def _journal_clause(journal: str, exact_match: bool) -> str:
+        if exact_match:
+            # 精确匹配：使用引号
+            return f'"{journal}"[Journal]'
+        # 模糊匹配：使用关键词，关键词之间用空格分隔（不用AND）
+        journal_words = journal.split()
+        if len(journal_words) > 1:
+            # 多个词，用空格分隔，不用AND
+            return f'({" ".join(journal_words)})[Journal]'
+        # 单个词，直接使用
+        return f'{journal}[Journal]'
+
+    @classmethod
+    def _title_term(cls, query: SearchQuery) -> str:
+        """有标题时的检索式：标题 + 第一作者 + 期刊 + 年份"""
+        # 清理标题：去除末尾句号，因为PubMed可能存储时没有句号
+        title_clean = query.title.rstrip('.')
+
+        if query.exact_match:
+            # 精确匹配：根据 use_quotes 参数决定是否使用引号
+            # use_quotes=None 时默认使用引号（保持向后兼容）
+            if query.use_quotes is None or query.use_quotes:
+                query_parts = [f'"{title_clean}"[Title]']
+            else:
+                # 不带引号的精确匹配（更灵活，能匹配略有差异的标题）
+                query_parts = [f'{title_clean}[Title]']
+        else:
+            # 部分匹配：使用关键词，关键词之间用空格分隔（不用AND）
+            # 去除停用词，避免查询过长导致失败
+            title_words = title_clean.split()
+            keywords_list = [w for w in title_words if w.lower() not in _TITLE_STOP_WORDS and len(w) > 2]
+
+            # 如果去除停用词后还有足够的关键词，使用关键词；否则使用所有词（最多15个，避免查询过长）
+            words = keywords_list if len(keywords_list) >= 3 else title_words
+            query_parts = [f'({" ".join(words[:15])})[Title]']
+
+        if query.authors:
+            # 只取第一作者
+            first_author = query.authors[0].split(",")[0].strip()
+            if query.exact_match:
+                # 精确匹配：使用引号
+                query_parts.append(f'"{first_author}"[Author]')
+            else:
+                # 模糊匹配：不使用引号，允许部分匹配
+                query_parts.append(f'{first_author}[Author]')
+
+        if query.journal:
+            query_parts.append(cls._journal_clause(query.journal, query.exact_match))
+
+        if query.year:
+            query_parts.append(f'{query.year}[Publication Date]')
+
+        return " AND ".join(query_parts)
+
+    @classmethod
+    def _author_journal_term(cls, query: SearchQuery) -> str:
+        """无标题时的检索式：全部作者 + 期刊 + 年份 + 卷期"""
+        query_parts = []
+
+        if query.authors:
+            # 使用全部作者，多个作者用空格连接
+            authors_str = " ".join(a.strip() for a in query.authors)
+            if query.exact_match:
+                # 精确匹配：使用引号
+                query_parts.append(f'"{authors_str}"[Author]')
+            else:
+                # 模糊匹配：多个作者用空格连接（等同于AND）
+                query_parts.append(f'({authors_str})[Author]')
+
+        if query.journal:
+            query_parts.append(cls._journal_clause(query.journal, query.exact_match))
+
+        if query.year:
+            query_parts.append(f'{query.year}[Publication Date]')
+
+        if query.volume:
+            query_parts.append(f'{query.volume}[Volume]')
+
+        if query.issue:
+            query_parts.append(f'{query.issue}[Issue]')
+
+        return " AND ".join(query_parts)
+
+    async def search(self, query: SearchQuery) -> List[str]:
+        """按检索条件搜索PMID列表（按相关度排序，最多 query.limit 篇）"""
+        if query.title:
+            term = self._title_term(query)
+            logger.debug("  PubMed 搜索查询: %s", term)
+        else:
+            term = self._author_journal_term(query)
+            # 至少需要作者或期刊之一
+            if not term:
+                logger.info("  无标题搜索：至少需要作者或期刊信息")
+                return []
+            logger.debug("  PubMed 无标题搜索查询: %s", term)
+
+        id_list = await self._esearch(term, retmax=query.limit)
+        logger.info("  找到 %s 个 PMID", len(id_list))
+        return id_list
+
+    async def fetch_many(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """一次 efetch 请求获取多篇文章"""
+        if not pmids:
+            return {}
+        logger.debug("  获取文章详情: PMID=%s", ",".join(pmids))
+
+        fetch_url = f"{PUBMED_BASE_URL}/efetch.fcgi"
+        params = {
+            "db": "pubmed",
+            "id": ",".join(pmids),
+            "retmode": "xml",
+            "email": self.email
+        }
+
+        logger.debug("  发送请求: GET %s", fetch_url)
+        logger.debug("  请求参数: %s", params)
+
+        response = await self._eutils_get(fetch_url, params)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  响应内容长度: %s 字节", len(response.content))
+
+        return self._parse_xml(response.content)
+
+    async def summarize(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """一次 esummary 请求获取多篇文章的评分字段（JSON，不含摘要、MeSH、基金和参考文献，比 efetch 小得多）"""
+        if not pmids:
+            return {}
+        logger.debug("  获取文章摘要信息: PMID=%s", ",".join(pmids))
+        params = {"db": "pubmed", "id": ",".join(pmids), "retmode": "json", "email": self.email}
+        response = await self._eutils_get(f"{PUBMED_BASE_URL}/esummary.fcgi", params)
+        with tracing.span("parse_summary"):
+            result = response.json().get("result") or {}
+            summaries = {}
+            for uid in result.get("uids") or []:
+                summary = self._parse_summary(result.get(uid) or {})
+                if summary:
+                    summaries[summary["pmid"]] = summary
+            return summaries
+
+    @staticmethod
+    def _parse_summary(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """把 esummary 的文档转换为文章记录（字段与 extract_article 相同，不含 abstract）"""
+        if not doc.get("uid") or doc.get("error"):
+            return None
+        year_match = re.match(r"\d{4}", doc.get("pubdate") or doc.get("sortpubdate") or "")
+        doi = next((item.get("value") for item in doc.get("articleids") or [] if item.get("idtype") == "doi"), None)
+        return {
+            "pmid": str(doc["uid"]),
+            "title": doc.get("title") or None,
+            "authors": [a["name"] for a in doc.get("authors") or [] if a.get("name") and a.get("authtype") == "Author"],
+            "journal": doc.get("fulljournalname") or doc.get("source") or None,
+            "year": int(year_match.group()) if year_match else None,
+            "volume": doc.get("volume") or None,
+            "issue": doc.get("issue") or None,
+            "pages": doc.get("pages") or None,
+            "doi": doi or None,
+        }
+
+    @timed_stage("parse_xml")
+    def _parse_xml(self, xml_content: bytes) -> Dict[str, Dict[str, Any]]:
+        """流式解析PubMed XML响应（直接解析字节，不先解码为字符串），返回 PMID -> 文章
+
+        字段提取与本地镜像导入共用 pubmed_xml.extract_article；响应被截断时保留已解析出的文章。
+        """
+        articles: Dict[str, Dict[str, Any]] = {}
+        try:
+            for article in iter_articles(xml_content):
+                if article.get("pmid"):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("  解析成功: 标题=%s...", (article.get('title') or 'N/A')[:60])
+                    articles[article["pmid"]] = article
+        except XML_ERRORS as e:
+            logger.error("解析XML出错（已解析 %s 篇）: %s", len(articles), str(e))
+        return articles
+
+    async def match_citations(self, citations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """ECitMatch：按期刊、年份、卷号、首页、第一作者匹配PMID（一次请求匹配多条引文）"""
+        if not citations:
+            return []
+        lines = []
+        for idx, citation in enumerate(citations):
+            fields = [citation.get(name) or "" for name in ("journal", "year", "volume", "first_page", "author")]
+            lines.append("|".join(str(f).replace("|", " ") for f in fields) + f"|{idx}|")
+        response = await self._eutils_get(
+            f"{PUBMED_BASE_URL}/ecitmatch.cgi", {"db": "pubmed", "retmode": "xml", "bdata": "\r".join(lines)}
+        )
+        results: List[Optional[str]] = [None] * len(citations)
+        for line in response.text.splitlines():
+            fields = line.strip().split("|")
+            if len(fields) >= 7 and fields[5].isdigit() and fields[6].strip().isdigit():
+                idx = int(fields[5])
+                if idx < len(results):
+                    results[idx] = fields[6].strip()
+        return results
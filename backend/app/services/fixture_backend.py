@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+import atexit
+import json
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from app.services.literature_backend import LiteratureBackend, SearchQuery, clean_doi
+
+logger = logging.getLogger(__name__)
+
+# 录制文件路径（PUBMED_BACKEND 中包含 fixture 时使用）
+PUBMED_FIXTURE_PATH = os.getenv("PUBMED_FIXTURE_PATH", os.path.join("data", "pubmed_fixture.json"))
+
+_SECTIONS = ("dois", "searches", "articles", "summaries", "citations")
+
+
+@contextmanager
+def _file_lock(path: str):
+    """录制文件的跨进程锁（锁文件 path.lock），多个工作进程录制到同一文件时依次合并写入"""
+    with open(f"{path}.lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _load(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _citation_key(citation: Dict[str, Any]) -> str:
+    return "|".join(str(citation.get(name) or "").strip().lower()
+                    for name in ("journal", "year", "volume", "first_page", "author"))
+
+
+class FixtureBackend(LiteratureBackend):
+    """录制的文献来源
+
+    回放JSON文件中记录的查询结果（DOI、检索、文章、文章摘要信息、引文匹配），用于离线测试和复现问题；
+    指定 source 时，未录制的查询转发给 source，并把结果写入文件（录制模式）。
+    录制的结果先保存在内存中，close()（应用关闭时）或进程退出时与文件中已有的结果合并后一次写入。
+    只录制 source 成功返回的结果：source 出错（抛出异常）时不录制，下次仍转发给 source。
+    """
+
+    name = "fixture"
+
+    def __init__(self, path: str = PUBMED_FIXTURE_PATH, source: Optional[LiteratureBackend] = None):
+        self.path = path
+        self.source = source
+        # 录制模式下与被录制的来源一样可信
+        self.authoritative = bool(source and source.authoritative)
+        self._lock = threading.Lock()
+        self._data: Dict[str, Dict[str, Any]] = {section: {} for section in _SECTIONS}
+        # 本进程录制、尚未写入文件的结果
+        self._pending: Dict[str, Dict[str, Any]] = {section: {} for section in _SECTIONS}
+        if os.path.exists(path):
+            stored = _load(path)
+            for section in _SECTIONS:
+                self._data[section].update(stored.get(section) or {})
+        elif source is None:
+            logger.warning("录制文件不存在: %s，所有查询都将返回空结果", path)
+        if source is not None:
+            atexit.register(self.flush)
+
+    def _record(self, section: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[section][key] = value
+            self._pending[section][key] = value
+
+    def flush(self) -> None:
+        """把录制的结果合并写入文件（没有新录制的结果时不写入）
+
+        在文件锁内重新读取文件，只加入本进程录制的结果，其他工作进程已写入的结果不会被覆盖。
+        """
+        with self._lock:
+            if not any(self._pending.values()):
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with _file_lock(self.path):
+                stored = _load(self.path)
+                merged = {section: {**(stored.get(section) or {}), **self._pending[section]} for section in _SECTIONS}
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+            recorded = sum(len(entries) for entries in self._pending.values())
+            for section in _SECTIONS:
+                self._data[section].update(merged[section])
+                self._pending[section] = {}
+        logger.info("录制文件已保存: %s（本进程录制 %s 条）", self.path, recorded)
+
+    def close(self) -> None:
+        self.flush()
+
+    async def resolve_doi(self, doi: str) -> Optional[str]:
+        key = clean_doi(doi).lower()
+        if key in self._data["dois"] or self.source is None:
+            return self._data["dois"].get(key)
+        pmid = await self.source.resolve_doi(doi)
+        self._record("dois", key, pmid)
+        return pmid
+
+    async def search(self, query: SearchQuery) -> List[str]:
+        key = query.key()
+        if key in self._data["searches"] or self.source is None:
+            return list(self._data["searches"].get(key) or [])
+        pmids = await self.source.search(query)
+        self._record("searches", key, pmids)
+        return pmids
+
+    async def _fetch(self, section: str, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        stored = self._data[section]
+        articles = {pmid: dict(stored[pmid]) for pmid in pmids if pmid in stored}
+        missing = [pmid for pmid in pmids if pmid not in articles]
+        if missing and self.source is not None:
+            fetch = self.source.fetch_many if section == "articles" else self.source.summarize
+            for pmid, article in (await fetch(missing)).items():
+                self._record(section, pmid, article)
+                articles[pmid] = dict(article)
+        return articles
+
+    async def fetch_many(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self._fetch("articles", pmids)
+
+    async def summarize(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        # 录制文件中已有完整记录的文章直接使用完整记录
+        full = {pmid: dict(self._data["articles"][pmid]) for pmid in pmids if pmid in self._data["articles"]}
+        summaries = await self._fetch("summaries", [pmid for pmid in pmids if pmid not in full])
+        return {**summaries, **full}
+
+    async def match_citations(self, citations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        keys = [_citation_key(citation) for citation in citations]
+        missing = [idx for idx, key in enumerate(keys) if key not in self._data["citations"]]
+        if missing and self.source is not None:
+            matched = await self.source.match_citations([citations[idx] for idx in missing])
+            for idx, pmid in zip(missing, matched):
+                self._record("citations", keys[idx], pmid)
+        return [self._data["citations"].get(key) for key in keys]
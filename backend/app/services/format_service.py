@@ -4,6 +4,8 @@ from typing import List, Dict, Any, Optional
 class FormatService:
     """参考文献格式化服务"""
     
+    SUPPORTED_FORMATS = ("apa", "mla", "ama", "nlm", "gb2015", "numeric", "author_year")
+    
     def _format_author_apa(self, authors: List[str]) -> str:
         """格式化APA格式的作者"""
         if not authors:
@@ -321,28 +323,31 @@ class FormatService:
             result += "."
         return result
     
+    def format_reference(self, ref: Dict[str, Any], target_format: str, index: int = 1) -> str:
+        """格式化单条参考文献（index 为在列表中的序号，顺序编码制使用）"""
+        if target_format == "apa":
+            return self.format_apa(ref)
+        elif target_format == "mla":
+            return self.format_mla(ref)
+        elif target_format == "ama":
+            return self.format_ama(ref)
+        elif target_format == "nlm":
+            return self.format_nlm(ref)
+        elif target_format == "gb2015":
+            return self.format_gb2015(ref, index)
+        elif target_format == "numeric":
+            return self.format_numeric(ref, index)
+        elif target_format == "author_year":
+            return self.format_author_year(ref)
+        else:
+            # 原始格式
+            return ref.get("text", "")
+    
     def format_references(self, references: List[Dict[str, Any]], target_format: str) -> str:
         """格式化参考文献列表"""
         formatted = []
         
         for idx, ref in enumerate(references, 1):
-            if target_format == "apa":
-                formatted.append(self.format_apa(ref))
-            elif target_format == "mla":
-                formatted.append(self.format_mla(ref))
-            elif target_format == "ama":
-                formatted.append(self.format_ama(ref))
-            elif target_format == "nlm":
-                formatted.append(self.format_nlm(ref))
-            elif target_format == "gb2015":
-                formatted.append(self.format_gb2015(ref, idx))
-            elif target_format == "numeric":
-                formatted.append(self.format_numeric(ref, idx))
-            elif target_format == "author_year":
-                formatted.append(self.format_author_year(ref))
-            else:
-                # 原始格式
-                formatted.append(ref.get("text", ""))
+            formatted.append(self.format_reference(ref, target_format, idx))
         
         return "\n".join(formatted)
-
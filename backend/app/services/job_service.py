@@ -0,0 +1,461 @@
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 任务数据库路径
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join("data", "jobs.db"))
+# 同时处理的参考文献数（实际吞吐量由NCBI/大模型全局配额限制）
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))
+# 处理中的参考文献超过该时间（秒）未完成时视为被中断，可由其他工作进程重新领取
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+
+# 任务状态
+JOB_QUEUED = "queued"
+JOB_SPLITTING = "splitting"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# 参考文献状态
+REF_PENDING = "pending"
+REF_PROCESSING = "processing"
+REF_COMPLETED = "completed"
+REF_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    text TEXT,
+    use_smart_matching INTEGER NOT NULL DEFAULT 0,
+    use_semantic_matching INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_references (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    reference_id TEXT NOT NULL,
+    original_text TEXT,
+    format_type TEXT,
+    keywords TEXT,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_job_references_status ON job_references (job_id, status);
+"""
+
+
+class JobStore:
+    """任务的SQLite持久化存储
+
+    每条参考文献完成后立即写入，服务重启后可以从最后完成的参考文献继续。
+    多个工作进程共享同一个数据库时，通过领取（claim）保证每条参考文献只由一个进程处理。
+    """
+
+    def __init__(self, db_path: str = JOB_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create_job(
+        self,
+        job_id: str,
+        text: Optional[str],
+        references: List[Dict[str, Any]],
+        use_smart_matching: bool,
+        use_semantic_matching: bool
+    ) -> None:
+        """创建任务；提供 references 时直接进入检索，否则先拆分 text"""
+        now = time.time()
+        status = JOB_RUNNING if references else JOB_QUEUED
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, text, use_smart_matching, use_semantic_matching, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, status, text, int(use_smart_matching), int(use_semantic_matching), len(references), now, now)
+            )
+            self._insert_references(job_id, references, now)
+
+    def _insert_references(self, job_id: str, references: List[Dict[str, Any]], now: float) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO job_references "
+            "(job_id, position, reference_id, original_text, format_type, keywords, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    job_id, position, ref["id"], ref.get("original_text"), ref.get("format_type"),
+                    json.dumps(ref["extracted_keywords"], ensure_ascii=False) if ref.get("extracted_keywords") else None,
+                    REF_PENDING, now
+                )
+                for position, ref in enumerate(references)
+            ]
+        )
+
+    def set_references(self, job_id: str, references: List[Dict[str, Any]]) -> None:
+        """写入拆分结果，任务进入检索阶段"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_references WHERE job_id = ?", (job_id,))
+            self._insert_references(job_id, references, now)
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, total = ?, updated_at = ? WHERE id = ?",
+                (JOB_RUNNING, len(references), now, job_id)
+            )
+
+    def claim_split(self, job_id: str, lease: float = JOB_LEASE_SECONDS) -> bool:
+        """领取任务的拆分工作（其他进程已领取且未超时时返回False）"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? "
+                "AND (status = ? OR (status = ? AND updated_at < ?))",
+                (JOB_SPLITTING, now, job_id, JOB_QUEUED, JOB_SPLITTING, now - lease)
+            )
+        return cursor.rowcount == 1
+
+    def claim_reference(self, job_id: str, position: int, lease: float = JOB_LEASE_SECONDS) -> bool:
+        """领取一条参考文献（已完成或其他进程正在处理时返回False）"""
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE job_references SET status = ?, updated_at = ? WHERE job_id = ? AND position = ? "
+                "AND (status = ? OR (status = ? AND updated_at < ?))",
+                (REF_PROCESSING, now, job_id, position, REF_PENDING, REF_PROCESSING, now - lease)
+            )
+        return cursor.rowcount == 1
+
+    def release_reference(self, job_id: str, position: int) -> None:
+        """释放领取（处理被中断时调用）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_references SET status = ?, updated_at = ? WHERE job_id = ? AND position = ? AND status = ?",
+                (REF_PENDING, time.time(), job_id, position, REF_PROCESSING)
+            )
+
+    def set_job_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def set_keywords(self, job_id: str, position: int, keywords: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_references SET keywords = ?, updated_at = ? WHERE job_id = ? AND position = ?",
+                (json.dumps(keywords, ensure_ascii=False), time.time(), job_id, position)
+            )
+
+    def finish_reference(
+        self,
+        job_id: str,
+        position: int,
+        result: Dict[str, Any],
+        error: Optional[str] = None
+    ) -> bool:
+        """保存单条参考文献的结果
+
+        Returns:
+            该任务是否已全部完成（完成时同时更新任务状态）
+        """
+        now = time.time()
+        status = REF_FAILED if error else REF_COMPLETED
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE job_references SET status = ?, result = ?, error = ?, updated_at = ? "
+                "WHERE job_id = ? AND position = ?",
+                (status, json.dumps(result, ensure_ascii=False), error, now, job_id, position)
+            )
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM job_references WHERE job_id = ? AND status IN (?, ?)",
+                (job_id, REF_PENDING, REF_PROCESSING)
+            ).fetchone()[0]
+            if pending == 0:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?", (JOB_COMPLETED, now, job_id)
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+        return pending == 0
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务信息及各状态的参考文献数"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_references WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "text": row["text"],
+            "use_smart_matching": bool(row["use_smart_matching"]),
+            "use_semantic_matching": bool(row["use_semantic_matching"]),
+            "total": row["total"],
+            "completed": counts.get(REF_COMPLETED, 0),
+            "failed": counts.get(REF_FAILED, 0),
+            "pending": counts.get(REF_PENDING, 0),
+            "processing": counts.get(REF_PROCESSING, 0),
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+
+    @staticmethod
+    def _reference_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "position": row["position"],
+            "reference_id": row["reference_id"],
+            "original_text": row["original_text"],
+            "format_type": row["format_type"],
+            "extracted_keywords": json.loads(row["keywords"]) if row["keywords"] else None,
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"]
+        }
+
+    def get_reference(self, job_id: str, position: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM job_references WHERE job_id = ? AND position = ?", (job_id, position)
+            ).fetchone()
+        return self._reference_from_row(row) if row is not None else None
+
+    def get_references(self, job_id: str, statuses: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """获取任务的参考文献（按原始顺序），可按状态筛选"""
+        query = "SELECT * FROM job_references WHERE job_id = ?"
+        params: tuple = (job_id,)
+        if statuses:
+            query += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params += tuple(statuses)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY position", params).fetchall()
+        return [self._reference_from_row(row) for row in rows]
+
+    def unfinished_jobs(self) -> List[str]:
+        """未完成的任务（按创建时间）"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?, ?) ORDER BY created_at",
+                (JOB_QUEUED, JOB_SPLITTING, JOB_RUNNING)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobService:
+    """批量校验任务服务
+
+    提交参考文献列表后立即返回任务ID，由固定数量的后台工作协程逐条处理
+    （拆分、关键词提取、PubMed检索），每条参考文献的结果持久化到SQLite。
+    服务重启后自动恢复未完成的任务，从最后完成的参考文献继续。
+    多工作进程部署时各进程共享任务数据库，参考文献按领取结果只处理一次。
+    """
+
+    def __init__(
+        self,
+        llm_service,
+        pubmed_service,
+        build_result: Callable[[str, Dict[str, Any], List[Dict[str, Any]]], Dict[str, Any]],
+        store: Optional[JobStore] = None,
+        num_workers: int = JOB_WORKERS
+    ):
+        """
+        Args:
+            llm_service: 大模型服务（拆分参考文献、提取关键词）
+            pubmed_service: PubMed检索服务
+            build_result: 根据检索结果构建单条参考文献响应的函数（与 /api/search 相同）
+            store: 任务存储，默认使用 JOB_DB_PATH
+            num_workers: 工作协程数
+        """
+        self.llm_service = llm_service
+        self.pubmed_service = pubmed_service
+        self.build_result = build_result
+        self._store = store
+        self.num_workers = max(1, num_workers)
+        # 队列和工作协程在 start() 中创建（需要运行中的事件循环）
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def store(self) -> JobStore:
+        # 首次使用时创建，避免导入模块时就创建数据库文件
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    async def start(self) -> None:
+        """启动工作协程，并恢复未完成的任务"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.ensure_future(self._worker(i)) for i in range(self.num_workers)]
+        unfinished = self.store.unfinished_jobs()
+        for job_id in unfinished:
+            self._enqueue_job(job_id)
+        logger.info("任务服务已启动: %s 个工作协程，恢复 %s 个未完成任务", self.num_workers, len(unfinished))
+
+    async def stop(self) -> None:
+        """停止工作协程（未完成的参考文献保持 pending，下次启动时继续）"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def submit(
+        self,
+        text: Optional[str] = None,
+        references: Optional[List[Dict[str, Any]]] = None,
+        use_smart_matching: bool = False,
+        use_semantic_matching: bool = False
+    ) -> str:
+        """提交任务，返回任务ID
+
+        Args:
+            text: 参考文献列表原文（由任务拆分并提取关键词）
+            references: 已拆分的参考文献（/api/split 的返回格式）
+        """
+        if self._queue is None:
+            raise RuntimeError("任务服务未启动")
+        job_id = uuid.uuid4().hex
+        self.store.create_job(job_id, text, references or [], use_smart_matching, use_semantic_matching)
+        logger.info("创建任务: %s, 参考文献数: %s", job_id, len(references) if references else '待拆分')
+        self._enqueue_job(job_id)
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get_job(job_id)
+        if job is not None:
+            job.pop("text", None)
+        return job
+
+    def get_results(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务信息和已完成参考文献的结果"""
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        job["references"] = self.store.get_references(job_id)
+        return job
+
+    def _enqueue_job(self, job_id: str) -> None:
+        """将任务中尚未完成的工作放入队列"""
+        job = self.store.get_job(job_id)
+        if job is None:
+            return
+        if job["status"] in (JOB_QUEUED, JOB_SPLITTING):
+            self._queue.put_nowait((job_id, None))
+            return
+        for ref in self.store.get_references(job_id, statuses=(REF_PENDING, REF_PROCESSING)):
+            self._queue.put_nowait((job_id, ref["position"]))
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id, position = await self._queue.get()
+            try:
+                if position is None:
+                    await self._split_job(job_id)
+                else:
+                    await self._process_reference(job_id, position)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("任务工作协程 %s 处理失败: %s, 错误: %s", index, job_id, str(e), exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _split_job(self, job_id: str) -> None:
+        """拆分任务中的参考文献列表（关键词在各条参考文献处理时提取）"""
+        if not self.store.claim_split(job_id):
+            return
+        job = self.store.get_job(job_id)
+        logger.info("任务 %s: 拆分参考文献", job_id)
+        try:
+            split_results = await asyncio.to_thread(self.llm_service.split_references, job["text"] or "")
+        except asyncio.CancelledError:
+            self.store.set_job_status(job_id, JOB_QUEUED)
+            raise
+        except Exception as e:
+            logger.error("任务 %s: 拆分失败: %s", job_id, str(e), exc_info=True)
+            self.store.set_job_status(job_id, JOB_FAILED, error=f"拆分参考文献失败: {str(e)}")
+            return
+
+        references = [
+            {
+                "id": ref_data.get("id", f"ref_{idx+1}"),
+                "original_text": ref_data.get("text", ""),
+                "format_type": ref_data.get("format_type", "unknown")
+            }
+            for idx, ref_data in enumerate(split_results)
+        ]
+        self.store.set_references(job_id, references)
+        logger.info("任务 %s: 拆分完成，共 %s 条参考文献", job_id, len(references))
+        if not references:
+            self.store.set_job_status(job_id, JOB_COMPLETED)
+            return
+        for position in range(len(references)):
+            self._queue.put_nowait((job_id, position))
+
+    async def _process_reference(self, job_id: str, position: int) -> None:
+        """处理单条参考文献：提取关键词（如尚未提取）并检索PubMed"""
+        if not self.store.claim_reference(job_id, position):
+            return
+        job = self.store.get_job(job_id)
+        ref = self.store.get_reference(job_id, position)
+        reference_id = ref["reference_id"]
+        try:
+            keywords = ref["extracted_keywords"]
+            if keywords is None:
+                keywords = await asyncio.to_thread(self.llm_service.extract_keywords, ref["original_text"] or "")
+                self.store.set_keywords(job_id, position, keywords)
+            keywords_dict = {
+                field: keywords.get(field)
+                for field in ("title", "authors", "journal", "year", "volume", "issue", "pages", "pmid", "doi")
+            }
+            articles = await self.pubmed_service.search_articles(
+                keywords_dict,
+                use_smart_matching=job["use_smart_matching"],
+                use_semantic_matching=job["use_semantic_matching"]
+            )
+            result = self.build_result(reference_id, keywords_dict, articles)
+            finished = self.store.finish_reference(job_id, position, result)
+        except asyncio.CancelledError:
+            # 服务关闭：释放领取，下次启动（或其他工作进程）立即继续
+            self.store.release_reference(job_id, position)
+            raise
+        except Exception as e:
+            logger.error("任务 %s: 参考文献 %s 处理失败: %s", job_id, reference_id, str(e), exc_info=True)
+            result = {"reference_id": reference_id, "matched_articles": [], "status": "not_found"}
+            finished = self.store.finish_reference(job_id, position, result, error=str(e))
+        if finished:
+            logger.info("任务 %s: 全部参考文献处理完成", job_id)
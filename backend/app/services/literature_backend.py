@@ -0,0 +1,242 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import time
+
+from app.services.metrics import BACKEND_LOOKUPS, BACKEND_DURATION
+
+logger = logging.getLogger(__name__)
+
+# 每次检索最多返回的PMID数（E-utilities 的 retmax），即每个检索策略一批评分的候选文章数上限
+SEARCH_LIMIT = 20
+
+
+class SearchQuery:
+    """文献检索条件
+
+    有标题时按标题检索（作者只取第一作者），否则按作者、期刊、年份、卷期检索。
+    exact_match 为精确匹配（短语），否则为关键词匹配；use_quotes=False 时标题精确匹配不加引号。
+    """
+
+    def __init__(
+        self,
+        title: Optional[str] = None,
+        authors: Optional[List[str]] = None,
+        journal: Optional[str] = None,
+        year: Optional[int] = None,
+        volume: Optional[str] = None,
+        issue: Optional[str] = None,
+        exact_match: bool = True,
+        use_quotes: Optional[bool] = None,
+        limit: int = SEARCH_LIMIT
+    ):
+        self.title = title
+        self.authors = [a for a in (authors or []) if a]
+        self.journal = journal
+        self.year = year
+        self.volume = volume
+        self.issue = issue
+        self.exact_match = exact_match
+        self.use_quotes = use_quotes
+        self.limit = limit
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+    def key(self) -> str:
+        """检索条件的稳定表示（录制的检索结果按此索引）"""
+        return "|".join(f"{name}={value}" for name, value in sorted(self.to_dict().items()))
+
+
+class BackendError(Exception):
+    """文献来源查询失败（限流、服务端错误等非成功响应），与"未找到"区分：调用方记为出错并查询其他来源"""
+
+
+class LiteratureBackend:
+    """文献来源接口
+
+    - resolve_doi: DOI -> PMID
+    - search: 按检索条件返回PMID列表（按相关度排序）
+    - fetch_many: 按PMID批量获取文章记录（与 pubmed_xml.extract_article 的结果格式相同），返回 PMID -> 文章
+    - summarize: 按PMID批量获取用于评分的元数据（标题、作者、期刊、年份、卷期、页码、DOI），返回 PMID -> 文章；
+      不含 "abstract" 键的记录为摘要信息，返回结果前再获取完整记录。默认返回 fetch_many 的完整记录
+    - match_citations: 引文匹配（期刊、年份、卷号、首页、第一作者 -> PMID，与 ECitMatch 相同）
+    - close: 释放资源、保存未写入的数据（应用关闭时调用），默认不做任何事
+
+    operations 列出实现了的操作；authoritative 表示"未找到"的结果是否可信
+    （例如 E-utilities 查不到即PubMed中没有；本地镜像可能尚未导入最新的文章）。
+    查询失败（网络错误、非成功响应）时抛出异常（如 BackendError），不要返回空结果，否则会被当作"未找到"。
+    """
+
+    name = ""
+    operations = frozenset({"resolve_doi", "search", "fetch_many", "summarize", "match_citations"})
+    authoritative = False
+
+    def supports(self, operation: str) -> bool:
+        return operation in self.operations
+
+    async def resolve_doi(self, doi: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def search(self, query: SearchQuery) -> List[str]:
+        raise NotImplementedError
+
+    async def fetch_many(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    async def summarize(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self.fetch_many(pmids)
+
+    async def match_citations(self, citations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def clean_doi(doi: str) -> str:
+    return doi.strip().replace("https://doi.org/", "").replace("doi:", "").strip()
+
+
+async def _timed(backend: LiteratureBackend, operation: str, call: Callable[[LiteratureBackend], Awaitable[Any]]):
+    """调用一个后端并记录耗时和结果（按后端和操作），返回 (结果, found/empty/error)；出错时结果为 None"""
+    start = time.perf_counter()
+    try:
+        result = await call(backend)
+    except asyncio.CancelledError:
+        BACKEND_DURATION.observe(time.perf_counter() - start, backend=backend.name, operation=operation)
+        BACKEND_LOOKUPS.inc(backend=backend.name, operation=operation, outcome="cancelled")
+        raise
+    except Exception as e:
+        logger.error("文献来源 %s 的 %s 出错: %s", backend.name, operation, str(e))
+        result = None
+        outcome = "error"
+    else:
+        outcome = "found" if result else "empty"
+    elapsed = time.perf_counter() - start
+    BACKEND_DURATION.observe(elapsed, backend=backend.name, operation=operation)
+    BACKEND_LOOKUPS.inc(backend=backend.name, operation=operation, outcome=outcome)
+    return result, outcome
+
+
+async def lookup(
+    backends: Sequence[LiteratureBackend],
+    operation: str,
+    call: Callable[[LiteratureBackend], Awaitable[Any]],
+    race: bool = False
+) -> Any:
+    """在多个文献来源中查找（DOI、PMID等有唯一答案的查询）
+
+    race=False 时按顺序查询，采用第一个找到的结果；race=True 时同时查询所有来源，
+    采用最先返回的结果，其余查询取消。任一可信来源（authoritative）返回"未找到"时不再等待其他来源；
+    来源出错（抛出异常）不视为"未找到"，继续查询其他来源。
+    每个来源的耗时和结果（found/empty/error/cancelled）记录到 /metrics。
+    """
+    candidates = [backend for backend in backends if backend.supports(operation)]
+    if not race or len(candidates) <= 1:
+        for backend in candidates:
+            result, outcome = await _timed(backend, operation, call)
+            if result:
+                return result
+            if outcome == "empty" and backend.authoritative:
+                break
+        return None
+
+    tasks = {asyncio.ensure_future(_timed(backend, operation, call)): backend for backend in candidates}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result, outcome = task.result()
+                backend = tasks[task]
+                if result:
+                    logger.debug("  %s 竞速结果来自 %s", operation, backend.name)
+                    return result
+                if outcome == "empty" and backend.authoritative:
+                    return None
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def lookup_many(
+    backends: Sequence[LiteratureBackend],
+    operation: str,
+    keys: List[str],
+    call: Callable[[LiteratureBackend, List[str]], Awaitable[Optional[Dict[str, Any]]]],
+    race: bool = False
+) -> Dict[str, Any]:
+    """在多个文献来源中批量查找（fetch_many/summarize 等返回 键 -> 结果 的操作）
+
+    与 lookup 相同，但按键合并各来源的结果：race=False 时依次只向下一个来源查询仍缺少的键；
+    race=True 时同时查询所有来源，所有键都找到后取消其余查询。可信来源返回后，其中缺少的键视为不存在。
+    """
+    found: Dict[str, Any] = {}
+    candidates = [backend for backend in backends if backend.supports(operation)]
+    if not keys or not candidates:
+        return found
+    if not race or len(candidates) <= 1:
+        for backend in candidates:
+            missing = [key for key in keys if key not in found]
+            result, _ = await _timed(backend, operation, lambda b: call(b, missing))
+            found.update(result or {})
+            if len(found) >= len(keys) or (result is not None and backend.authoritative):
+                break
+        return found
+
+    tasks = {asyncio.ensure_future(_timed(backend, operation, lambda b: call(b, keys))): backend
+             for backend in candidates}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result, _ = task.result()
+                for key, value in (result or {}).items():
+                    found.setdefault(key, value)
+                if len(found) >= len(keys) or (result is not None and tasks[task].authoritative):
+                    return found
+        return found
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def create_backends(spec: str, cache=None, record_fixture: bool = False) -> List[LiteratureBackend]:
+    """按逗号分隔的配置创建文献来源（顺序即查询顺序，第一个支持检索的来源用于检索）
+
+    可选：eutils、local（本地PubMed镜像）、doi_resolver（只解析DOI）、fixture（录制文件）。
+    record_fixture 时 fixture 把未录制的查询转发给紧随其后的来源并录制结果（该来源不再单独出现在列表中）。
+    """
+    from app.services.eutils_backend import EutilsBackend
+    from app.services.local_pubmed import LocalPubMedBackend
+    from app.services.doi_resolver import DoiResolverBackend
+    from app.services.fixture_backend import FixtureBackend
+
+    factories = {
+        "eutils": lambda: EutilsBackend(cache),
+        "local": LocalPubMedBackend,
+        "doi_resolver": DoiResolverBackend,
+    }
+    names = [name.strip().lower() for name in spec.split(",") if name.strip()]
+    backends: List[LiteratureBackend] = []
+    idx = 0
+    while idx < len(names):
+        name = names[idx]
+        idx += 1
+        if name == "fixture":
+            source = None
+            if record_fixture and idx < len(names) and names[idx] in factories:
+                source = factories[names[idx]]()
+                idx += 1
+            backends.append(FixtureBackend(source=source))
+        elif name in factories:
+            backends.append(factories[name]())
+        else:
+            logger.warning("未知的文献来源 %s，已忽略", name)
+    if not any(backend.supports("search") for backend in backends):
+        logger.warning("文献来源 %s 中没有支持检索的来源，加入 E-utilities", spec)
+        backends.append(EutilsBackend(cache))
+    return backends
@@ -3,8 +3,13 @@ import json
 import dashscope
 from typing import List, Dict, Any
 from dotenv import load_dotenv
+import hashlib
 import logging
+import threading
 from pathlib import Path
+from types import SimpleNamespace
+from app.services.cache_backend import get_cache_backend
+from app.services.metrics import timed_stage, record_cache, UPSTREAM_RESPONSES, INFLIGHT_REQUESTS
 
 # 加载 .env 文件 - 明确指定 backend 目录，并处理 BOM
 backend_dir = Path(__file__).parent.parent.parent
@@ -32,17 +37,63 @@ api_key = os.getenv("DASHSCOPE_API_KEY", "").strip()
 dashscope.api_key = api_key
 
 if api_key:
-    logger.info(f"✓ 已加载 DASHSCOPE_API_KEY: {api_key[:10]}...")
+    logger.info("✓ 已加载 DASHSCOPE_API_KEY: %s...", api_key[:10])
 else:
     logger.warning("✗ 未配置 DASHSCOPE_API_KEY，将使用本地规则拆分")
 
+# 全局大模型并发配额：所有请求（包括批量检索中的并发检索）共享
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+_llm_budget = threading.BoundedSemaphore(max(1, LLM_MAX_CONCURRENCY))
+# 大模型响应的缓存时间（秒），0表示不缓存
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "604800"))
+
 
 class LLMService:
     """大模型服务，用于参考文献拆分和关键词提取"""
     
     def __init__(self):
         self.model = "qwen-plus"  # 使用Qwen3 Plus模型
+        self.cache = get_cache_backend()
+    
+    def _generate(self, **kwargs):
+        """调用大模型（受全局并发配额限制）
+
+        相同模型和参数的成功响应内容写入缓存（CACHE_BACKEND=sqlite 时各工作进程共享），
+        命中时返回只包含 output.text 的响应对象，调用方按原有方式解析。
+        """
+        cache_key = None
+        if LLM_CACHE_TTL > 0:
+            payload = json.dumps({"model": self.model, **kwargs}, ensure_ascii=False, sort_keys=True)
+            cache_key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            cached = self.cache.get("llm", cache_key)
+            record_cache("llm", cached is not None)
+            if cached is not None:
+                logger.info("命中大模型响应缓存")
+                return SimpleNamespace(status_code=200, output=SimpleNamespace(text=cached, choices=None))
+        
+        with _llm_budget, INFLIGHT_REQUESTS.track(kind="dashscope"):
+            try:
+                response = dashscope.Generation.call(model=self.model, **kwargs)
+            except Exception:
+                UPSTREAM_RESPONSES.inc(upstream="dashscope", endpoint="generation", status="error")
+                raise
+        UPSTREAM_RESPONSES.inc(
+            upstream="dashscope", endpoint="generation",
+            status=str(response.status_code) if response is not None else "none"
+        )
+        
+        if cache_key is not None and response is not None and response.status_code == 200 and response.output is not None:
+            content = None
+            if getattr(response.output, 'text', None):
+                content = response.output.text
+            elif getattr(response.output, 'choices', None):
+                message = getattr(response.output.choices[0], 'message', None)
+                content = getattr(message, 'content', None) if message else None
+            if content:
+                self.cache.set("llm", cache_key, content, ttl=LLM_CACHE_TTL)
+        return response
         
+    @timed_stage("split_references")
     def split_references(self, text: str) -> List[Dict[str, Any]]:
         """拆分参考文献列表"""
         prompt = f"""你是一个专业的医学科研论文专家，也是拥有多年经验的专业审稿人，熟悉常见参考文献著录格式的专家。请将以下文本拆分成独立的参考文献条目。
@@ -138,8 +189,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 return self._basic_split(text)
             
             logger.info("调用 LLM API 拆分参考文献...")
-            response = dashscope.Generation.call(
-                model=self.model,
+            response = self._generate(
                 prompt=prompt,
                 temperature=0.1,
                 max_tokens=4000
@@ -151,7 +201,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 logger.error("LLM API 返回 None，使用本地规则拆分")
                 return self._basic_split(text)
             
-            logger.info(f"LLM API 响应状态码: {response.status_code}")
+            logger.debug("LLM API 响应状态码: %s", response.status_code)
             
             if response.status_code == 200:
                 if response.output is None:
@@ -164,7 +214,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 # 方式1: 检查是否有 text 属性（json_object 格式可能直接返回 text）
                 if hasattr(response.output, 'text') and response.output.text:
                     content = response.output.text.strip()
-                    logger.info("从 response.output.text 获取内容")
+                    logger.debug("从 response.output.text 获取内容")
                 
                 # 方式2: 检查 choices 结构（标准格式）
                 elif hasattr(response.output, 'choices') and response.output.choices:
@@ -173,17 +223,17 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                         if hasattr(choice, 'message') and choice.message:
                             if hasattr(choice.message, 'content') and choice.message.content:
                                 content = choice.message.content.strip()
-                                logger.info("从 response.output.choices[0].message.content 获取内容")
+                                logger.debug("从 response.output.choices[0].message.content 获取内容")
                 
                 # 如果仍然没有内容，记录详细信息用于调试
                 if content is None:
                     logger.error("LLM API 响应中无法获取内容")
-                    logger.error(f"response.output 类型: {type(response.output)}")
-                    logger.error(f"response.output 属性: {dir(response.output)}")
+                    logger.error("response.output 类型: %s", type(response.output))
+                    logger.error("response.output 属性: %s", dir(response.output))
                     if hasattr(response.output, '__dict__'):
-                        logger.error(f"response.output.__dict__: {response.output.__dict__}")
+                        logger.error("response.output.__dict__: %s", response.output.__dict__)
                     return self._basic_split(text)
-                logger.info(f"LLM 返回内容长度: {len(content)} 字符")
+                logger.debug("LLM 返回内容长度: %s 字符", len(content))
                 
                 # 尝试提取JSON部分
                 if "```json" in content:
@@ -197,44 +247,45 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                     # 处理不同的 JSON 结构
                     if isinstance(parsed, list):
                         # 直接是数组
-                        logger.info(f"LLM 成功解析，返回 {len(parsed)} 条参考文献")
+                        logger.info("LLM 成功解析，返回 %s 条参考文献", len(parsed))
                         return parsed
                     elif isinstance(parsed, dict):
                         # 是对象，尝试查找常见的键
                         if "references" in parsed:
                             references = parsed["references"]
                             if isinstance(references, list):
-                                logger.info(f"LLM 成功解析，从 references 键获取 {len(references)} 条参考文献")
+                                logger.info("LLM 成功解析，从 references 键获取 %s 条参考文献", len(references))
                                 return references
                         elif "data" in parsed:
                             references = parsed["data"]
                             if isinstance(references, list):
-                                logger.info(f"LLM 成功解析，从 data 键获取 {len(references)} 条参考文献")
+                                logger.info("LLM 成功解析，从 data 键获取 %s 条参考文献", len(references))
                                 return references
                         else:
                             # 单个对象，转换为列表
                             logger.info("LLM 返回单个对象，转换为列表")
                             return [parsed]
                     else:
-                        logger.error(f"LLM 返回了意外的类型: {type(parsed)}")
+                        logger.error("LLM 返回了意外的类型: %s", type(parsed))
                         return self._basic_split(text)
                 except json.JSONDecodeError as e:
-                    logger.error(f"LLM 返回内容不是有效的 JSON: {e}")
-                    logger.error(f"内容预览: {content[:200]}...")
+                    logger.error("LLM 返回内容不是有效的 JSON: %s", e)
+                    logger.error("内容预览: %s...", content[:200])
                     logger.info("JSON 解析失败，使用本地规则拆分")
                     return self._basic_split(text)
             else:
                 error_msg = getattr(response, 'message', 'Unknown error')
-                logger.error(f"LLM API错误: status_code={response.status_code}, message={error_msg}")
+                logger.error("LLM API错误: status_code=%s, message=%s", response.status_code, error_msg)
                 # LLM 调用失败，使用本地规则作为后备
                 logger.info("LLM API 返回错误，使用本地规则拆分")
                 return self._basic_split(text)
         except Exception as e:
-            logger.error(f"拆分参考文献时出错: {str(e)}", exc_info=True)
+            logger.error("拆分参考文献时出错: %s", str(e), exc_info=True)
             # LLM 调用失败，使用本地规则作为后备
             logger.info("LLM 调用失败，使用本地规则拆分")
             return self._basic_split(text)
     
+    @timed_stage("extract_keywords")
     def extract_keywords(self, reference_text: str) -> Dict[str, Any]:
         """从参考文献文本中提取关键词"""
         prompt = f"""你是一个专业的医学科研论文专家，也是拥有多年经验的专业审稿人，熟悉常见参考文献著录格式的专家。请从以下参考文献文本中提取所有可识别的信息。
@@ -274,8 +325,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 return self._basic_extract_keywords(reference_text)
             
             logger.info("调用 LLM API 提取关键词...")
-            response = dashscope.Generation.call(
-                model=self.model,
+            response = self._generate(
                 prompt=prompt,
                 temperature=0.1,
                 max_tokens=2000,
@@ -286,7 +336,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 logger.error("LLM API 返回 None，使用本地规则提取")
                 return self._basic_extract_keywords(reference_text)
             
-            logger.info(f"LLM API 响应状态码: {response.status_code}")
+            logger.debug("LLM API 响应状态码: %s", response.status_code)
             
             if response.status_code == 200:
                 if response.output is None:
@@ -299,7 +349,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 # 方式1: 检查是否有 text 属性（json_object 格式可能直接返回 text）
                 if hasattr(response.output, 'text') and response.output.text:
                     content = response.output.text.strip()
-                    logger.info("从 response.output.text 获取内容")
+                    logger.debug("从 response.output.text 获取内容")
                 
                 # 方式2: 检查 choices 结构（标准格式）
                 elif hasattr(response.output, 'choices') and response.output.choices:
@@ -308,17 +358,17 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                         if hasattr(choice, 'message') and choice.message:
                             if hasattr(choice.message, 'content') and choice.message.content:
                                 content = choice.message.content.strip()
-                                logger.info("从 response.output.choices[0].message.content 获取内容")
+                                logger.debug("从 response.output.choices[0].message.content 获取内容")
                 
                 # 如果仍然没有内容，记录详细信息用于调试
                 if content is None:
                     logger.error("LLM API 响应中无法获取内容")
-                    logger.error(f"response.output 类型: {type(response.output)}")
-                    logger.error(f"response.output 属性: {dir(response.output)}")
+                    logger.error("response.output 类型: %s", type(response.output))
+                    logger.error("response.output 属性: %s", dir(response.output))
                     if hasattr(response.output, '__dict__'):
-                        logger.error(f"response.output.__dict__: {response.output.__dict__}")
+                        logger.error("response.output.__dict__: %s", response.output.__dict__)
                     return self._basic_extract_keywords(reference_text)
-                logger.info(f"LLM 返回内容长度: {len(content)} 字符")
+                logger.debug("LLM 返回内容长度: %s 字符", len(content))
                 
                 # 尝试提取JSON部分
                 if "```json" in content:
@@ -343,20 +393,20 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                         logger.info("LLM 成功解析关键词")
                         return parsed
                     else:
-                        logger.error(f"LLM 返回了意外的类型: {type(parsed)}，期望 dict")
+                        logger.error("LLM 返回了意外的类型: %s，期望 dict", type(parsed))
                         return self._basic_extract_keywords(reference_text)
                 except json.JSONDecodeError as e:
-                    logger.error(f"LLM 返回内容不是有效的 JSON: {e}")
-                    logger.error(f"内容预览: {content[:200]}...")
+                    logger.error("LLM 返回内容不是有效的 JSON: %s", e)
+                    logger.error("内容预览: %s...", content[:200])
                     logger.info("JSON 解析失败，使用本地规则提取")
                     return self._basic_extract_keywords(reference_text)
             else:
                 error_msg = getattr(response, 'message', 'Unknown error')
-                logger.error(f"LLM API错误: status_code={response.status_code}, message={error_msg}")
+                logger.error("LLM API错误: status_code=%s, message=%s", response.status_code, error_msg)
                 logger.info("LLM API 返回错误，使用本地规则提取")
                 return self._basic_extract_keywords(reference_text)
         except Exception as e:
-            logger.error(f"提取关键词时出错: {str(e)}", exc_info=True)
+            logger.error("提取关键词时出错: %s", str(e), exc_info=True)
             logger.info("LLM 调用失败，使用本地规则提取")
             return self._basic_extract_keywords(reference_text)
     
@@ -610,6 +660,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
 
         return result
     
+    @timed_stage("llm_evaluate")
     def evaluate_similarity_with_llm(self, original: Dict[str, Any], candidates: List[Dict[str, Any]], 
                                      is_final_evaluation: bool = False, exclude_doi_pmid: bool = False) -> List[tuple]:
         """使用大模型评估原始参考文献与候选文章的相似度
@@ -631,9 +682,9 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
         
         evaluation_type = "最终评估" if is_final_evaluation else "检索阶段评估"
         if exclude_doi_pmid:
-            logger.info(f"使用大模型进行{evaluation_type}，评估 {len(candidates)} 篇候选文章的相似度（排除DOI/PMID字段）")
+            logger.info("使用大模型进行%s，评估 %s 篇候选文章的相似度（排除DOI/PMID字段）", evaluation_type, len(candidates))
         else:
-            logger.info(f"使用大模型进行{evaluation_type}，评估 {len(candidates)} 篇候选文章的相似度")
+            logger.info("使用大模型进行%s，评估 %s 篇候选文章的相似度", evaluation_type, len(candidates))
         
         # 构建提示词
         original_text = self._format_reference_for_llm(original)
@@ -784,8 +835,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
         
         try:
             logger.info("调用 LLM API 评估相似度...")
-            response = dashscope.Generation.call(
-                model=self.model,
+            response = self._generate(
                 prompt=prompt,
                 temperature=0.1,
                 max_tokens=2000,
@@ -793,7 +843,7 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
             )
             
             if response is None or response.status_code != 200:
-                logger.error(f"LLM API 返回错误: {response.status_code if response else 'None'}")
+                logger.error("LLM API 返回错误: %s", response.status_code if response else 'None')
                 return []
             
             # 获取响应内容
@@ -837,17 +887,17 @@ NLM格式采用PubMed标准，期刊名需使用NLM官方缩写
                 reason = result.get("reason", "")
                 
                 if 0 <= idx < len(candidates):
-                    logger.info(f"  候选文章 {idx + 1}: 相似度={similarity:.4f}, 原因={reason}")
+                    logger.debug("  候选文章 %s: 相似度=%.4f, 原因=%s", idx + 1, similarity, reason)
                     scored_results.append((similarity, candidates[idx]))
             
             # 按相似度降序排序
             scored_results.sort(key=lambda x: x[0], reverse=True)
-            logger.info(f"大模型评估完成，共评估 {len(scored_results)} 篇文章")
+            logger.info("大模型评估完成，共评估 %s 篇文章", len(scored_results))
             
             return scored_results
             
         except Exception as e:
-            logger.error(f"大模型评估相似度时出错: {str(e)}", exc_info=True)
+            logger.error("大模型评估相似度时出错: %s", str(e), exc_info=True)
             return []
     
     def _format_reference_for_llm(self, ref: Dict[str, Any]) -> str:
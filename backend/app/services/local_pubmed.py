@@ -0,0 +1,338 @@
+from typing import Any, Dict, IO, Iterable, List, Optional, Tuple, Union
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from app.services.literature_backend import SEARCH_LIMIT, LiteratureBackend, SearchQuery, clean_doi
+from app.services.pubmed_xml import extract_article, iter_pubmed_xml
+
+logger = logging.getLogger(__name__)
+
+# 本地PubMed镜像的数据库路径（由 tools/ingest_pubmed.py 导入年度基线和每日更新文件）
+LOCAL_PUBMED_DB = os.getenv("LOCAL_PUBMED_DB", os.path.join("data", "pubmed.db"))
+
+# 每批写入的文章数
+INGEST_BATCH_SIZE = 1000
+
+_TITLE_STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'for', 'of', 'in', 'on', 'at', 'to', 'by', 'with', 'is', 'are', 'was', 'were', 'from'}
+
+# articles 保存完整文章记录（record，与 efetch 响应解析的结果相同）及检索字段；
+# articles_fts 是以 articles 为外部内容表的FTS5索引，由触发器同步
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS articles ("
+    "pmid INTEGER PRIMARY KEY, title TEXT, authors TEXT, journal TEXT, year INTEGER, "
+    "volume TEXT, issue TEXT, doi TEXT, record TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_articles_doi ON articles (doi COLLATE NOCASE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+    "title, authors, journal, year, volume, doi, pmid, "
+    "content='articles', content_rowid='pmid', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN "
+    "INSERT INTO articles_fts (rowid, title, authors, journal, year, volume, doi, pmid) "
+    "VALUES (new.pmid, new.title, new.authors, new.journal, new.year, new.volume, new.doi, new.pmid); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN "
+    "INSERT INTO articles_fts (articles_fts, rowid, title, authors, journal, year, volume, doi, pmid) "
+    "VALUES ('delete', old.pmid, old.title, old.authors, old.journal, old.year, old.volume, old.doi, old.pmid); END",
+    "CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN "
+    "INSERT INTO articles_fts (articles_fts, rowid, title, authors, journal, year, volume, doi, pmid) "
+    "VALUES ('delete', old.pmid, old.title, old.authors, old.journal, old.year, old.volume, old.doi, old.pmid); "
+    "INSERT INTO articles_fts (rowid, title, authors, journal, year, volume, doi, pmid) "
+    "VALUES (new.pmid, new.title, new.authors, new.journal, new.year, new.volume, new.doi, new.pmid); END",
+    "CREATE TABLE IF NOT EXISTS ingested_files ("
+    "name TEXT PRIMARY KEY, articles INTEGER NOT NULL, deleted INTEGER NOT NULL, ingested_at REAL NOT NULL)",
+)
+
+_UPSERT = (
+    "INSERT INTO articles (pmid, title, authors, journal, year, volume, issue, doi, record) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (pmid) DO UPDATE SET "
+    "title = excluded.title, authors = excluded.authors, journal = excluded.journal, year = excluded.year, "
+    "volume = excluded.volume, issue = excluded.issue, doi = excluded.doi, record = excluded.record"
+)
+
+
+def _index_row(element: ET.Element, record: Dict[str, Any]) -> Optional[Tuple]:
+    """由 PubmedArticle 元素和提取出的文章记录生成 articles 表的一行
+
+    作者检索字段包含姓、名和缩写（"Smith John JA"），期刊检索字段包含全称、ISO缩写和MedlineTA，
+    与PubMed的 [Author]、[Journal] 检索一样可以用缩写形式匹配。
+    """
+    try:
+        pmid = int(record.get("pmid") or "")
+    except ValueError:
+        return None
+    names = []
+    for author in element.findall("./MedlineCitation/Article/AuthorList/Author"):
+        parts = [author.findtext(tag) for tag in ("LastName", "ForeName", "Initials", "CollectiveName")]
+        name = " ".join(part for part in parts if part)
+        if name:
+            names.append(name)
+    journal_names = [
+        record.get("journal"),
+        element.findtext("./MedlineCitation/Article/Journal/ISOAbbreviation"),
+        element.findtext("./MedlineCitation/MedlineJournalInfo/MedlineTA"),
+    ]
+    return (
+        pmid,
+        record.get("title"),
+        " ; ".join(names),
+        " ; ".join(dict.fromkeys(name for name in journal_names if name)),
+        record.get("year"),
+        record.get("volume"),
+        record.get("issue"),
+        record.get("doi"),
+        json.dumps(record, ensure_ascii=False),
+    )
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _column_query(column: str, text: str, exact: bool, prefix: bool = False) -> Optional[str]:
+    """生成FTS5列检索式：精确匹配为短语，模糊匹配为各词AND；prefix 时按前缀匹配（作者名缩写）"""
+    tokens = _tokens(text)
+    if not tokens:
+        return None
+    star = "*" if prefix else ""
+    if exact:
+        phrase = " ".join(tokens)
+        return f'{column} : "{phrase}"{star}'
+    terms = " AND ".join(f'"{token}"{star}' for token in tokens)
+    return f"{column} : ({terms})"
+
+
+class LocalPubMedStore:
+    """本地PubMed镜像（SQLite + FTS5全文索引）
+
+    FTS5索引覆盖标题、作者、期刊、年份、卷号、DOI和PMID；DOI另有不区分大小写的B树索引。
+    WAL模式下导入新的更新文件时不阻塞检索；每个线程使用独立的连接。
+    """
+
+    def __init__(self, db_path: str = LOCAL_PUBMED_DB, readonly: bool = False):
+        self.db_path = db_path
+        self.readonly = readonly
+        if readonly:
+            if not os.path.exists(db_path):
+                raise FileNotFoundError(f"本地PubMed镜像不存在: {db_path}（请先用 tools/ingest_pubmed.py 导入）")
+        else:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        if not readonly:
+            conn = self._connection()
+            with conn:
+                for statement in _SCHEMA:
+                    conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # fork 出的子进程不能复用父进程的连接
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30.0, check_same_thread=False)
+            if self.readonly:
+                conn.execute("PRAGMA query_only = ON")
+            else:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    # ---------- 导入 ----------
+
+    def is_ingested(self, name: str) -> bool:
+        row = self._connection().execute("SELECT 1 FROM ingested_files WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def ingest(self, source: Union[str, IO[bytes]], name: Optional[str] = None) -> Tuple[int, int]:
+        """导入一个PubMed XML文件（.xml 或 .xml.gz），返回 (写入的文章数, 删除的文章数)
+
+        整个文件在一个事务中导入，中断时不会留下导入了一半的文件；
+        按文件名记录已导入的文件，更新文件须按文件名顺序导入（后导入的版本覆盖之前的版本）。
+        """
+        name = name or os.path.basename(str(source))
+        if isinstance(source, str) and source.endswith(".gz"):
+            stream = gzip.open(source, "rb")
+        elif isinstance(source, str):
+            stream = open(source, "rb")
+        else:
+            stream = source
+        conn = self._connection()
+        written = deleted = 0
+        rows: List[Tuple] = []
+        try:
+            with conn:
+                for kind, payload in iter_pubmed_xml(stream):
+                    if kind == "article":
+                        row = _index_row(payload, extract_article(payload))
+                        if row is not None:
+                            rows.append(row)
+                        if len(rows) >= INGEST_BATCH_SIZE:
+                            conn.executemany(_UPSERT, rows)
+                            written += len(rows)
+                            rows = []
+                    elif kind == "delete":
+                        if rows:
+                            # 删除记录可能针对同一文件中之前出现的文章，先写入
+                            conn.executemany(_UPSERT, rows)
+                            written += len(rows)
+                            rows = []
+                        conn.executemany("DELETE FROM articles WHERE pmid = ?", [(int(p),) for p in payload if p.isdigit()])
+                        deleted += len(payload)
+                if rows:
+                    conn.executemany(_UPSERT, rows)
+                    written += len(rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO ingested_files (name, articles, deleted, ingested_at) VALUES (?, ?, ?, ?)",
+                    (name, written, deleted, time.time())
+                )
+        finally:
+            if stream is not source:
+                stream.close()
+        logger.info("导入 %s: 写入 %s 篇文章，删除 %s 篇", name, written, deleted)
+        return written, deleted
+
+    def optimize(self) -> None:
+        """合并FTS5索引段（大批量导入后执行，加快检索）"""
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('optimize')")
+
+    # ---------- 检索 ----------
+
+    def find_by_doi(self, doi: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT pmid FROM articles WHERE doi = ? COLLATE NOCASE LIMIT 1", (doi,)
+        ).fetchone()
+        return str(row[0]) if row else None
+
+    def search(self, clauses: Iterable[Optional[str]], issue: Optional[str] = None,
+               limit: int = SEARCH_LIMIT) -> List[str]:
+        """按FTS5列检索式（AND连接）检索，按BM25相关度排序返回PMID"""
+        expression = " AND ".join(f"({clause})" for clause in clauses if clause)
+        if not expression:
+            return []
+        query = "SELECT articles_fts.rowid FROM articles_fts"
+        params: List[Any] = [expression]
+        if issue:
+            query += " JOIN articles ON articles.pmid = articles_fts.rowid"
+        query += " WHERE articles_fts MATCH ?"
+        if issue:
+            query += " AND articles.issue = ?"
+            params.append(str(issue))
+        query += " ORDER BY articles_fts.rank LIMIT ?"
+        params.append(limit)
+        try:
+            rows = self._connection().execute(query, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error("本地镜像检索式无效: %s, 错误: %s", expression, str(e))
+            return []
+        return [str(row[0]) for row in rows]
+
+    def get(self, pmid: str) -> Optional[Dict[str, Any]]:
+        return self.get_many([pmid]).get(str(pmid).strip())
+
+    def get_many(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        keys = [int(p) for p in (str(p).strip() for p in pmids) if p.isdigit()]
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        rows = self._connection().execute(
+            f"SELECT pmid, record FROM articles WHERE pmid IN ({placeholders})", keys
+        ).fetchall()
+        return {str(pmid): json.loads(record) for pmid, record in rows}
+
+
+class LocalPubMedBackend(LiteratureBackend):
+    """以本地PubMed镜像为来源的文献来源
+
+    检索条件的含义与E-utilities检索式一致（精确匹配为短语，模糊匹配为各词AND），不受NCBI配额限制。
+    镜像可能尚未导入最新的文章，因此"未找到"不是最终结果（authoritative=False）。
+    SQLite查询在线程中执行，不阻塞事件循环。
+    """
+
+    name = "local"
+
+    def __init__(self, store: Optional[LocalPubMedStore] = None):
+        self.store = store or LocalPubMedStore(readonly=True)
+
+    async def resolve_doi(self, doi: str) -> Optional[str]:
+        doi = clean_doi(doi)
+        pmid = await asyncio.to_thread(self.store.find_by_doi, doi)
+        logger.info("  本地镜像通过 DOI 搜索: %s, %s", doi, f"找到 PMID: {pmid}" if pmid else "未找到")
+        return pmid
+
+    @staticmethod
+    def _clauses(query: SearchQuery) -> List[Optional[str]]:
+        clauses: List[Optional[str]] = []
+        if query.title:
+            title_clean = query.title.rstrip('.')
+            if query.exact_match:
+                exact = query.use_quotes is None or bool(query.use_quotes)
+                clauses.append(_column_query("title", title_clean, exact=exact))
+            else:
+                title_words = title_clean.split()
+                keywords_list = [w for w in title_words if w.lower() not in _TITLE_STOP_WORDS and len(w) > 2]
+                words = keywords_list if len(keywords_list) >= 3 else title_words
+                clauses.append(_column_query("title", " ".join(words[:15]), exact=False))
+            if query.authors:
+                # 有标题时只取第一作者
+                first_author = query.authors[0].split(",")[0].strip()
+                clauses.append(_column_query("authors", first_author, exact=query.exact_match, prefix=True))
+        elif query.authors:
+            clauses.append(_column_query("authors", " ".join(query.authors), exact=query.exact_match, prefix=True))
+        if query.journal:
+            clauses.append(_column_query("journal", query.journal, exact=query.exact_match))
+        if not query.title and not any(clauses):
+            return []
+        if query.year:
+            clauses.append(_column_query("year", str(query.year), exact=True))
+        if query.volume and not query.title:
+            clauses.append(_column_query("volume", str(query.volume), exact=True))
+        return clauses
+
+    async def search(self, query: SearchQuery) -> List[str]:
+        clauses = self._clauses(query)
+        if not clauses:
+            logger.info("  无标题搜索：至少需要作者或期刊信息")
+            return []
+        issue = query.issue if not query.title else None
+        pmids = await asyncio.to_thread(self.store.search, clauses, issue, query.limit)
+        logger.info("  本地镜像找到 %s 个 PMID", len(pmids))
+        return pmids
+
+    async def fetch_many(self, pmids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get_many, pmids)
+
+    async def match_citations(self, citations: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """按期刊、年份、卷号、第一作者检索，再按首页确认"""
+        results: List[Optional[str]] = []
+        for citation in citations:
+            query = SearchQuery(
+                authors=[citation["author"]] if citation.get("author") else None, journal=citation.get("journal"),
+                year=citation.get("year"), volume=citation.get("volume"), exact_match=False
+            )
+            pmids = await self.search(query)
+            first_page = str(citation.get("first_page") or "").strip()
+            match = None
+            if pmids and first_page:
+                articles = await self.fetch_many(pmids)
+                for pmid in pmids:
+                    pages = (articles.get(pmid) or {}).get("pages") or ""
+                    if pages.split("-")[0].strip() == first_page:
+                        match = pmid
+                        break
+            elif len(pmids) == 1:
+                match = pmids[0]
+            results.append(match)
+        return results
@@ -0,0 +1,263 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+import bisect
+import functools
+import inspect
+import threading
+import time
+
+from app.services.tracing import current_strategy, span
+
+# 默认的耗时分桶（秒）：覆盖本地计算（毫秒级）到大模型调用（数十秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """带标签的指标基类（线程安全，进程内统计）"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值（如进行中的请求数）"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """在代码块执行期间计数加一"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """分桶直方图（累计分桶，含 _sum 和 _count）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各分桶计数（非累计，最后一个为 +Inf）, 总和, 总数]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """统计代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，按 Prometheus 文本格式输出"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = Histogram(
+    "refval_stage_duration_seconds", "各处理阶段耗时（按阶段和检索策略）", ("stage", "strategy")
+)
+CACHE_REQUESTS = Counter(
+    "refval_cache_requests_total", "缓存查询次数（按缓存和命中结果）", ("cache", "result")
+)
+UPSTREAM_RESPONSES = Counter(
+    "refval_upstream_responses_total", "上游服务响应次数（按服务、接口和状态码）", ("upstream", "endpoint", "status")
+)
+INFLIGHT_REQUESTS = Gauge(
+    "refval_inflight_requests", "进行中的请求数（http为本服务收到的请求，其余为发往上游的请求）", ("kind",)
+)
+BACKEND_LOOKUPS = Counter(
+    "refval_backend_lookups_total", "文献来源查询次数（按来源、操作和结果：found/empty/error/cancelled）",
+    ("backend", "operation", "outcome")
+)
+BACKEND_DURATION = Histogram(
+    "refval_backend_duration_seconds", "文献来源查询耗时（按来源和操作，竞速中被取消的查询记录到取消时）",
+    ("backend", "operation")
+)
+PRESEARCH_TASKS = Counter(
+    "refval_presearch_tasks_total",
+    "预检索数（按结果：scheduled/skipped/completed/attached/superseded/cancelled/error）", ("outcome",)
+)
+DUPLICATE_REFERENCES = Counter(
+    "refval_duplicate_references_total", "检测到的重复参考文献数（按处理流程：split/batch/stream/validate）",
+    ("pipeline",)
+)
+HTTP_REQUESTS = Counter(
+    "refval_http_requests_total", "本服务处理的HTTP请求数", ("method", "route", "status")
+)
+HTTP_DURATION = Histogram(
+    "refval_http_request_duration_seconds", "本服务HTTP请求耗时", ("method", "route")
+)
+
+
+@contextmanager
+def stage_timer(stage: str, strategy: Optional[str] = None):
+    """统计一个处理阶段的耗时（未指定策略时使用当前检索策略），启用追踪时同时记录区间"""
+    if strategy is None:
+        strategy = current_strategy.get()
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage, strategy=strategy)
+
+
+def timed_stage(stage: str):
+    """装饰器：统计函数（同步或异步）的执行耗时
+
+    函数内设置的检索策略（current_strategy）在函数返回后恢复，不影响调用方。
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = current_strategy.set(current_strategy.get())
+                try:
+                    with stage_timer(stage):
+                        return await func(*args, **kwargs)
+                finally:
+                    current_strategy.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = current_strategy.set(current_strategy.get())
+            try:
+                with stage_timer(stage):
+                    return func(*args, **kwargs)
+            finally:
+                current_strategy.reset(token)
+        return wrapper
+    return decorator
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,215 @@
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import copy
+import logging
+import os
+import uuid
+
+from app.services.metrics import PRESEARCH_TASKS, record_cache
+from app.services.result_cache import keywords_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 同时进行的预检索数（预检索只在没有前台检索时开始，与前台检索共享NCBI/大模型配额）
+PRESEARCH_CONCURRENCY = int(os.getenv("PRESEARCH_CONCURRENCY", "2"))
+# 单次拆分最多预检索的参考文献数
+PRESEARCH_MAX_REFERENCES = int(os.getenv("PRESEARCH_MAX_REFERENCES", "200"))
+# 排队中的预检索上限，超过时不再接受新的预检索
+PRESEARCH_MAX_PENDING = int(os.getenv("PRESEARCH_MAX_PENDING", "1000"))
+
+# 有前台检索进行时，预检索开始前的等待间隔（秒）
+_IDLE_POLL_INTERVAL = 0.05
+
+
+class _PreSearch:
+    """一条参考文献的预检索"""
+
+    __slots__ = ("key", "keywords", "use_smart_matching", "use_semantic_matching", "task", "cancelled")
+
+    def __init__(self, key: str, keywords: Dict[str, Any], use_smart_matching: bool, use_semantic_matching: bool):
+        self.key = key
+        self.keywords = keywords
+        self.use_smart_matching = use_smart_matching
+        self.use_semantic_matching = use_semantic_matching
+        # 开始执行后为检索任务
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+
+    @property
+    def finished(self) -> bool:
+        return self.cancelled or (self.task is not None and self.task.done())
+
+
+class PreSearchService:
+    """拆分后的预检索
+
+    /api/split 返回拆分结果后，用户通常会先核对一段时间再发起检索。预检索在此期间以低优先级
+    在后台为每条参考文献执行 search_articles：只在没有前台检索进行时开始，同时最多
+    PRESEARCH_CONCURRENCY 条，与前台检索共享全局NCBI/大模型配额。结果写入检索结果缓存
+    （pubmed_service.result_cache，按关键词指纹）。
+
+    之后的检索通过 search() 进行：相同条件的预检索正在执行时等待其结果；尚未开始的预检索被取消，
+    改为前台检索；预检索已完成时 search_articles 直接命中结果缓存。预检索可按拆分请求整体取消（cancel）。
+    """
+
+    def __init__(self, pubmed_service, concurrency: int = PRESEARCH_CONCURRENCY):
+        self.pubmed_service = pubmed_service
+        self.concurrency = max(1, concurrency)
+        # 未完成的预检索：指纹 -> 预检索
+        self._entries: Dict[str, _PreSearch] = {}
+        # 预检索ID（一次拆分请求） -> 预检索列表
+        self._groups: Dict[str, List[_PreSearch]] = {}
+        # 进行中的前台检索数
+        self._foreground = 0
+        # 队列和工作协程在 start() 中创建（需要运行中的事件循环）
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """停止工作协程并取消所有预检索"""
+        for entry in list(self._entries.values()):
+            self._cancel_entry(entry)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        self._entries.clear()
+        self._groups.clear()
+
+    async def schedule(self, keywords_list: List[Dict[str, Any]], use_smart_matching: bool = False,
+                       use_semantic_matching: bool = False) -> Optional[str]:
+        """为拆分结果安排预检索，返回预检索ID（用于取消）；服务未启动时返回 None
+
+        已缓存或已在预检索中的条件不重复安排；超过 PRESEARCH_MAX_REFERENCES 条或排队数达到
+        PRESEARCH_MAX_PENDING 时，多出的参考文献不做预检索。
+        """
+        if self._queue is None:
+            return None
+        self._prune_groups()
+        group_id = uuid.uuid4().hex
+        entries: List[_PreSearch] = []
+        for idx, keywords in enumerate(keywords_list):
+            if idx >= PRESEARCH_MAX_REFERENCES or len(self._entries) >= PRESEARCH_MAX_PENDING:
+                PRESEARCH_TASKS.inc(len(keywords_list) - idx, outcome="skipped")
+                break
+            if not any(keywords.get(field) for field in ("title", "authors", "journal", "pmid", "doi")):
+                continue
+            key = keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching)
+            if key in self._entries or await self.pubmed_service.result_cache.contains(
+                keywords, use_smart_matching, use_semantic_matching
+            ):
+                continue
+            # 读取缓存期间服务可能已停止，或其他请求已安排了相同的条件
+            if self._queue is None:
+                return None
+            if key in self._entries:
+                continue
+            entry = _PreSearch(key, keywords, use_smart_matching, use_semantic_matching)
+            self._entries[key] = entry
+            entries.append(entry)
+            self._queue.put_nowait(entry)
+        PRESEARCH_TASKS.inc(len(entries), outcome="scheduled")
+        self._groups[group_id] = entries
+        logger.info("安排预检索: %s 条参考文献（预检索ID: %s）", len(entries), group_id)
+        return group_id
+
+    def cancel(self, group_id: str) -> Optional[int]:
+        """取消一次拆分请求的预检索，返回取消的条数；预检索ID不存在时返回 None"""
+        entries = self._groups.pop(group_id, None)
+        if entries is None:
+            return None
+        cancelled = 0
+        for entry in entries:
+            if not entry.finished:
+                self._cancel_entry(entry)
+                cancelled += 1
+        logger.info("取消预检索 %s: %s 条", group_id, cancelled)
+        return cancelled
+
+    async def search(self, keywords: Dict[str, Any], use_smart_matching: bool = False,
+                     use_semantic_matching: bool = False,
+                     on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """检索文章（与 pubmed_service.search_articles 相同），优先使用预检索的结果"""
+        key = keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching)
+        entry = self._entries.get(key)
+        attach = entry is not None and entry.task is not None and not entry.task.done()
+        if entry is not None:
+            record_cache("presearch", attach)
+        if attach:
+            logger.info("  等待进行中的预检索")
+            articles = None
+            try:
+                # 调用方取消时预检索继续执行，结果仍写入缓存
+                articles = await asyncio.shield(entry.task)
+            except asyncio.CancelledError:
+                # 预检索被取消（而不是调用方被取消）时改为前台检索
+                if not entry.task.cancelled():
+                    raise
+            if articles is not None:
+                PRESEARCH_TASKS.inc(outcome="attached")
+                # 字段差异由调用方按实际请求的关键词生成
+                return [{k: v for k, v in copy.deepcopy(article).items() if k != "_differences"}
+                        for article in articles]
+        elif entry is not None and entry.task is None:
+            # 尚未开始的预检索改为前台检索
+            self._cancel_entry(entry, outcome="superseded")
+
+        self._foreground += 1
+        try:
+            return await self.pubmed_service.search_articles(
+                keywords, use_smart_matching=use_smart_matching,
+                use_semantic_matching=use_semantic_matching, on_progress=on_progress,
+                session_id=session_id
+            )
+        finally:
+            self._foreground -= 1
+
+    def _cancel_entry(self, entry: _PreSearch, outcome: str = "cancelled") -> None:
+        if entry.finished:
+            return
+        entry.cancelled = True
+        if entry.task is not None:
+            entry.task.cancel()
+        if self._entries.get(entry.key) is entry:
+            del self._entries[entry.key]
+        PRESEARCH_TASKS.inc(outcome=outcome)
+
+    def _prune_groups(self) -> None:
+        for group_id in [gid for gid, entries in self._groups.items() if all(e.finished for e in entries)]:
+            del self._groups[group_id]
+
+    async def _worker(self) -> None:
+        while True:
+            entry = await self._queue.get()
+            # 有前台检索时等待，预检索不与用户发起的检索争用配额
+            while self._foreground and not entry.cancelled:
+                await asyncio.sleep(_IDLE_POLL_INTERVAL)
+            if entry.cancelled:
+                continue
+            entry.task = asyncio.ensure_future(self._run(entry))
+            await asyncio.wait([entry.task])
+
+    async def _run(self, entry: _PreSearch) -> Optional[List[Dict[str, Any]]]:
+        """执行一条预检索（search_articles 把结果写入检索结果缓存）；失败时返回 None（之后的检索改为前台检索）"""
+        try:
+            articles = await self.pubmed_service.search_articles(
+                entry.keywords, use_smart_matching=entry.use_smart_matching,
+                use_semantic_matching=entry.use_semantic_matching
+            )
+        except Exception as e:
+            logger.warning("预检索失败: %s, 错误: %s", (entry.keywords.get("title") or "")[:60], str(e))
+            PRESEARCH_TASKS.inc(outcome="error")
+            return None
+        finally:
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+        PRESEARCH_TASKS.inc(outcome="completed")
+        return articles
@@ -1,11 +1,20 @@
-import httpx
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Any, Optional
-from bs4 import BeautifulSoup
+import asyncio
+from typing import List, Dict, Any, Optional, Callable
 import os
+import re
 from dotenv import load_dotenv
 import logging
 from pathlib import Path
+from app.services.scoring_executor import score_batch
+from app.services.candidate_pool import CandidatePool
+from app.services.article_store import ArticleStore
+from app.services.cache_backend import get_cache_backend
+from app.services.literature_backend import SearchQuery, create_backends, lookup, lookup_many
+from app.services.result_cache import ResultCache
+from app.services.search_session import SearchSessionStore
+from app.services import search_session
+from app.services.metrics import timed_stage
+from app.services import tracing
 
 # 加载 .env 文件
 env_path = Path(__file__).parent.parent.parent / '.env'
@@ -13,8 +22,15 @@ if not env_path.exists():
     env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
 
-PUBMED_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
-PUBMED_EMAIL = os.getenv("PUBMED_EMAIL", "")
+# 文献来源（逗号分隔，按顺序查询）：eutils（NCBI E-utilities）、local（本地PubMed镜像，由 tools/ingest_pubmed.py 导入）、
+# doi_resolver（DOI转换服务）、fixture（录制文件）。第一个支持检索的来源用于检索
+PUBMED_BACKEND = os.getenv("PUBMED_BACKEND", "eutils")
+# DOI/PMID查询时同时查询所有来源，采用最先返回的结果（降低某个来源变慢时的尾延迟）
+LOOKUP_RACING = os.getenv("LOOKUP_RACING", "false").strip().lower() in ("1", "true", "yes")
+# fixture 来源录制模式：未录制的查询转发给紧随其后的来源并写入录制文件
+PUBMED_FIXTURE_RECORD = os.getenv("PUBMED_FIXTURE_RECORD", "false").strip().lower() in ("1", "true", "yes")
+# 候选文章先批量获取评分所需的摘要信息（esummary），只为返回的文章获取完整记录（含摘要正文）
+CANDIDATE_SUMMARIES = os.getenv("CANDIDATE_SUMMARIES", "true").strip().lower() in ("1", "true", "yes")
 
 logger = logging.getLogger(__name__)
 
@@ -23,51 +39,58 @@ class PubMedService:
     """PubMed API服务"""
     
     def __init__(self):
-        self.email = PUBMED_EMAIL
+        # 缓存后端（CACHE_BACKEND=sqlite 时多个工作进程共享）
+        self.cache = get_cache_backend()
+        # 已获取文章的本地存储（含标题LSH索引），重复引用可在本地解析
+        self.article_store = ArticleStore(backend=self.cache if self.cache.shared else None)
+        # 文献来源：DOI/PMID查询按顺序（或竞速）查询全部来源，检索使用第一个支持检索的来源
+        self.backends = create_backends(PUBMED_BACKEND, self.cache, record_fixture=PUBMED_FIXTURE_RECORD)
+        self.search_backends = [next(backend for backend in self.backends if backend.supports("search"))]
+        # 参考文献级检索结果缓存（按关键词指纹），重复引用直接返回上次的结果
+        self.result_cache = ResultCache(self.cache)
+        # 增量检索会话（只保存调用方指定了会话ID的检索）
+        self.sessions = SearchSessionStore(self.cache)
+        logger.info("文献来源: %s（检索: %s，DOI/PMID竞速: %s）",
+                    ", ".join(backend.name for backend in self.backends), self.search_backends[0].name,
+                    "启用" if LOOKUP_RACING else "禁用")
     
+    def close(self) -> None:
+        """关闭文献来源（保存录制文件等），应用关闭时调用"""
+        for backend in self.backends:
+            backend.close()
+    
+    @timed_stage("search_by_doi")
     async def search_by_doi(self, doi: str) -> Optional[str]:
         """通过DOI搜索PMID"""
         if not doi:
             return None
-        
-        # 清理DOI格式
-        doi = doi.strip().replace("https://doi.org/", "").replace("doi:", "").strip()
-        
-        logger.info(f"  通过 DOI 搜索: {doi}")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                # 使用esearch搜索
-                search_url = f"{PUBMED_BASE_URL}/esearch.fcgi"
-                params = {
-                    "db": "pubmed",
-                    "term": f"{doi}[DOI]",
-                    "retmode": "json",
-                    "retmax": 1,
-                    "sort": "relevance",  # 按最佳匹配排序
-                }
-                
-                logger.info(f"  发送请求: GET {search_url}")
-                logger.info(f"  请求参数: {params}")
-                
-                response = await client.get(search_url, params=params, timeout=10.0)
-                
-                logger.info(f"  响应状态码: {response.status_code}")
-                logger.info(f"  响应内容: {response.text[:300]}...")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    id_list = data.get("esearchresult", {}).get("idlist", [])
-                    if id_list:
-                        logger.info(f"  找到 PMID: {id_list[0]}")
-                        return id_list[0]
-                    else:
-                        logger.info(f"  未找到匹配的 PMID")
-            except Exception as e:
-                logger.error(f"DOI搜索出错: {str(e)}", exc_info=True)
-        
-        return None
+        session = search_session.current()
+        if session is not None and doi in session.previous_dois:
+            # 增量检索：DOI未变化，使用上次的解析结果
+            pmid = session.previous_dois[doi]
+        else:
+            pmid = await lookup(
+                self.backends, "resolve_doi", lambda backend: backend.resolve_doi(doi), race=LOOKUP_RACING
+            )
+        if session is not None:
+            session.dois[doi] = pmid
+        return pmid
+    
+    async def _search(self, query: SearchQuery) -> List[str]:
+        session = search_session.current()
+        key = query.key() if session is not None else None
+        if session is not None and key in session.previous_queries:
+            # 增量检索：检索条件未变化，这些文章已在重新评分时处理
+            logger.info("    检索条件未变化，使用上次的检索结果")
+            tracing.annotate(reused=True)
+            pmids = session.previous_queries[key]
+        else:
+            pmids = await lookup(self.search_backends, "search", lambda backend: backend.search(query)) or []
+        if session is not None:
+            session.queries[key] = pmids
+        return pmids
     
+    @timed_stage("search_by_title")
     async def search_by_title(self, title: str, author: Optional[str] = None, 
                              journal: Optional[str] = None, year: Optional[int] = None,
                              exact_match: bool = True, use_quotes: Optional[bool] = None) -> List[str]:
@@ -82,98 +105,12 @@ class PubMedService:
         """
         if not title:
             return []
-        
-        # 清理标题：去除末尾句号，因为PubMed可能存储时没有句号
-        title_clean = title.rstrip('.')
-        
-        # 构建搜索查询
-        if exact_match:
-            # 精确匹配：根据 use_quotes 参数决定是否使用引号
-            # use_quotes=None 时默认使用引号（保持向后兼容）
-            if use_quotes is None or use_quotes:
-                query_parts = [f'"{title_clean}"[Title]']
-            else:
-                # 不带引号的精确匹配（更灵活，能匹配略有差异的标题）
-                query_parts = [f'{title_clean}[Title]']
-        else:
-            # 部分匹配：使用关键词，关键词之间用空格分隔（不用AND）
-            # 去除停用词，避免查询过长导致失败
-            title_words = title_clean.split()
-            stop_words = {'the', 'a', 'an', 'and', 'or', 'for', 'of', 'in', 'on', 'at', 'to', 'by', 'with', 'is', 'are', 'was', 'were', 'from'}
-            keywords_list = [w for w in title_words if w.lower() not in stop_words and len(w) > 2]
-            
-            # 如果去除停用词后还有足够的关键词，使用关键词；否则使用所有词
-            if len(keywords_list) >= 3:
-                # 限制关键词数量，避免查询过长（最多15个关键词）
-                num_keywords = min(15, len(keywords_list))
-                # 关键词之间用空格分隔，不用AND
-                query_parts = [f'({" ".join(keywords_list[:num_keywords])})[Title]']
-            else:
-                # 如果关键词太少，使用所有词（但限制数量）
-                num_words = min(15, len(title_words))
-                # 关键词之间用空格分隔，不用AND
-                query_parts = [f'({" ".join(title_words[:num_words])})[Title]']
-        
-        if author:
-            # 只取第一作者
-            first_author = author.split(",")[0].strip() if "," in author else author.strip()
-            if exact_match:
-                # 精确匹配：使用引号
-                query_parts.append(f'"{first_author}"[Author]')
-            else:
-                # 模糊匹配：不使用引号，允许部分匹配
-                query_parts.append(f'{first_author}[Author]')
-        
-        if journal:
-            if exact_match:
-                # 精确匹配：使用引号
-                query_parts.append(f'"{journal}"[Journal]')
-            else:
-                # 模糊匹配：使用关键词，关键词之间用空格分隔（不用AND）
-                journal_words = journal.split()
-                if len(journal_words) > 1:
-                    # 多个词，用空格分隔，不用AND
-                    query_parts.append(f'({" ".join(journal_words)})[Journal]')
-                else:
-                    # 单个词，直接使用
-                    query_parts.append(f'{journal}[Journal]')
-        
-        if year:
-            query_parts.append(f'{year}[Publication Date]')
-        
-        query = " AND ".join(query_parts)
-        
-        logger.info(f"  PubMed 搜索查询: {query}")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                search_url = f"{PUBMED_BASE_URL}/esearch.fcgi"
-                params = {
-                    "db": "pubmed",
-                    "term": query,
-                    "retmode": "json",
-                    "retmax": 20,
-                    "sort": "relevance",  # 按最佳匹配排序
-                }
-                
-                logger.info(f"  发送请求: GET {search_url}")
-                logger.info(f"  请求参数: {params}")
-                
-                response = await client.get(search_url, params=params, timeout=10.0)
-                
-                logger.info(f"  响应状态码: {response.status_code}")
-                logger.info(f"  响应内容: {response.text[:500]}...")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    id_list = data.get("esearchresult", {}).get("idlist", [])
-                    logger.info(f"  找到 {len(id_list)} 个 PMID")
-                    return id_list
-            except Exception as e:
-                logger.error(f"标题搜索出错: {str(e)}", exc_info=True)
-        
-        return []
+        return await self._search(SearchQuery(
+            title=title, authors=[author] if author else None, journal=journal, year=year,
+            exact_match=exact_match, use_quotes=use_quotes
+        ))
     
+    @timed_stage("search_by_author_journal")
     async def search_by_author_journal(self, authors: Optional[List[str]] = None,
                                        author: Optional[str] = None,
                                        journal: Optional[str] = None,
@@ -192,214 +129,111 @@ class PubMedService:
             issue: 期号（可选）
             exact_match: 是否使用精确匹配（默认True，使用引号；False时使用关键词匹配）
         """
-        query_parts = []
-        
-        # 处理作者：优先使用authors列表，否则使用author字符串
-        if authors and len(authors) > 0:
-            # 使用全部作者，多个作者用空格连接
-            authors_str = " ".join(authors)
-            if exact_match:
-                # 精确匹配：使用引号
-                query_parts.append(f'"{authors_str}"[Author]')
-            else:
-                # 模糊匹配：多个作者用空格连接（等同于AND）
-                query_parts.append(f'({authors_str})[Author]')
-        elif author:
-            # 向后兼容：如果传入的是单个作者字符串
-            author_str = author.strip()
-            if exact_match:
-                # 精确匹配：使用引号
-                query_parts.append(f'"{author_str}"[Author]')
-            else:
-                # 模糊匹配：直接使用
-                query_parts.append(f'{author_str}[Author]')
-        
-        if journal:
-            if exact_match:
-                # 精确匹配：使用引号
-                query_parts.append(f'"{journal}"[Journal]')
-            else:
-                # 模糊匹配：使用关键词，关键词之间用空格分隔（不用AND）
-                journal_words = journal.split()
-                if len(journal_words) > 1:
-                    # 多个词，用空格分隔，不用AND
-                    query_parts.append(f'({" ".join(journal_words)})[Journal]')
-                else:
-                    # 单个词，直接使用
-                    query_parts.append(f'{journal}[Journal]')
-        
-        if year:
-            query_parts.append(f'{year}[Publication Date]')
-        
-        if volume:
-            query_parts.append(f'{volume}[Volume]')
-        
-        if issue:
-            query_parts.append(f'{issue}[Issue]')
-        
-        # 至少需要作者或期刊之一
-        if not query_parts:
-            logger.info("  无标题搜索：至少需要作者或期刊信息")
-            return []
-        
-        query = " AND ".join(query_parts)
-        
-        logger.info(f"  PubMed 无标题搜索查询: {query}")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                search_url = f"{PUBMED_BASE_URL}/esearch.fcgi"
-                params = {
-                    "db": "pubmed",
-                    "term": query,
-                    "retmode": "json",
-                    "retmax": 20,  # 统一限制为20篇
-                    "sort": "relevance",  # 按最佳匹配排序
-                }
-                
-                logger.info(f"  发送请求: GET {search_url}")
-                logger.info(f"  请求参数: {params}")
-                
-                response = await client.get(search_url, params=params, timeout=10.0)
-                
-                logger.info(f"  响应状态码: {response.status_code}")
-                logger.info(f"  响应内容: {response.text[:500]}...")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    id_list = data.get("esearchresult", {}).get("idlist", [])
-                    logger.info(f"  找到 {len(id_list)} 个 PMID")
-                    return id_list
-            except Exception as e:
-                logger.error(f"无标题搜索出错: {str(e)}", exc_info=True)
+        if not authors and author:
+            authors = [author.strip()]
+        return await self._search(SearchQuery(
+            authors=authors, journal=journal, year=year, volume=volume, issue=issue, exact_match=exact_match
+        ))
+    
+    @timed_stage("match_citation")
+    async def match_citation(self, keywords: Dict[str, Any]) -> Optional[str]:
+        """引文匹配：按期刊、年份、卷号、首页和第一作者的姓确定PMID（ECitMatch）
         
-        return []
+        缺少期刊、年份、卷号或页码时返回 None
+        """
+        first_page = str(keywords.get("pages") or "").split("-")[0].strip()
+        if not (keywords.get("journal") and keywords.get("year") and keywords.get("volume") and first_page):
+            return None
+        authors = keywords.get("authors") or []
+        if isinstance(authors, str):
+            authors = [authors]
+        citation = {
+            "journal": keywords["journal"],
+            "year": str(keywords["year"]),
+            "volume": str(keywords["volume"]),
+            "first_page": first_page,
+            "author": re.split(r"[,\s]+", authors[0].strip(), maxsplit=1)[0] if authors else "",
+        }
+        
+        async def match(backend):
+            return (await backend.match_citations([citation]) or [None])[0]
+        
+        return await lookup(self.backends, "match_citations", match, race=LOOKUP_RACING)
     
+    @timed_stage("fetch_article_details")
     async def fetch_article_details(self, pmid: str) -> Optional[Dict[str, Any]]:
-        """获取文章详细信息"""
-        logger.info(f"  获取文章详情: PMID={pmid}")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                fetch_url = f"{PUBMED_BASE_URL}/efetch.fcgi"
-                params = {
-                    "db": "pubmed",
-                    "id": pmid,
-                    "retmode": "xml",
-                    "email": self.email
-                }
-                
-                logger.info(f"  发送请求: GET {fetch_url}")
-                logger.info(f"  请求参数: {params}")
-                
-                response = await client.get(fetch_url, params=params, timeout=10.0)
-                
-                logger.info(f"  响应状态码: {response.status_code}")
-                logger.info(f"  响应内容长度: {len(response.text)} 字符")
-                
-                if response.status_code == 200:
-                    article = self._parse_xml(response.text)
-                    if article:
-                        logger.info(f"  解析成功: 标题={article.get('title', 'N/A')[:60]}...")
-                    return article
-            except Exception as e:
-                logger.error(f"获取文章详情出错: {str(e)}", exc_info=True)
+        """获取文章详细信息（优先从本地存储读取）"""
+        cached = await self.article_store.get(pmid)
+        tracing.annotate(pmid=pmid, cached=cached is not None)
+        if cached is not None:
+            logger.debug("  从本地存储获取文章详情: PMID=%s", pmid)
+            return cached
+        
+        articles = await lookup(
+            self.backends, "fetch_many", lambda backend: backend.fetch_many([pmid]), race=LOOKUP_RACING
+        )
+        article = (articles or {}).get(pmid)
+        if article:
+            await self.article_store.put(article)
+        return article
+    
+    @timed_stage("fetch_candidates")
+    async def fetch_candidates(self, pmids: List[str], full: bool = False) -> List[Dict[str, Any]]:
+        """批量获取候选文章，按 pmids 的顺序返回找到的文章（优先从本地存储读取）
         
-        return None
+        默认只获取评分所需的字段（E-utilities 为一次 esummary 请求），没有摘要正文（不含 "abstract" 键）；
+        full=True（语义重排序需要摘要）或 CANDIDATE_SUMMARIES=false 时获取完整记录（一次 efetch 请求）。
+        只缺一篇时直接获取完整记录：请求数相同，且返回该文章时不必再获取一次。
+        """
+        full = full or not CANDIDATE_SUMMARIES
+        found: Dict[str, Dict[str, Any]] = {}
+        for pmid in pmids:
+            article = await (self.article_store.get(pmid) if full else self.article_store.get_summary(pmid))
+            if article is not None:
+                found[pmid] = article
+        missing = [pmid for pmid in pmids if pmid not in found]
+        full = full or len(missing) == 1
+        tracing.annotate(pmids=len(pmids), cached=len(found), full=full)
+        if missing:
+            operation = "fetch_many" if full else "summarize"
+            fetched = await lookup_many(
+                self.backends, operation, missing,
+                lambda backend, keys: getattr(backend, operation)(keys), race=LOOKUP_RACING
+            )
+            for pmid, article in fetched.items():
+                if "abstract" in article:
+                    await self.article_store.put(article)
+                else:
+                    await self.article_store.put_summary(article)
+                found[pmid] = article
+        return [found[pmid] for pmid in pmids if pmid in found]
     
-    def _parse_xml(self, xml_content: str) -> Dict[str, Any]:
-        """解析PubMed XML响应"""
-        try:
-            root = ET.fromstring(xml_content)
-            article = root.find(".//PubmedArticle")
-            if article is None:
-                return {}
-            
-            medline = article.find(".//MedlineCitation")
-            if medline is None:
-                return {}
-            
-            pmid_elem = medline.find(".//PMID")
-            pmid = pmid_elem.text if pmid_elem is not None else None
-            
-            # 标题
-            title_elem = medline.find(".//ArticleTitle")
-            title = title_elem.text if title_elem is not None else None
-            
-            # 作者
-            authors = []
-            author_list = medline.find(".//AuthorList")
-            if author_list is not None:
-                for author in author_list.findall(".//Author"):
-                    last_name = author.find(".//LastName")
-                    first_name = author.find(".//ForeName")
-                    if last_name is not None:
-                        name = last_name.text
-                        if first_name is not None:
-                            name += f", {first_name.text}"
-                        authors.append(name)
-            
-            # 期刊
-            journal_elem = medline.find(".//Journal/Title")
-            journal = journal_elem.text if journal_elem is not None else None
-            
-            # 年份
-            pub_date = medline.find(".//PubDate")
-            year = None
-            if pub_date is not None:
-                year_elem = pub_date.find(".//Year")
-                if year_elem is not None:
-                    try:
-                        year = int(year_elem.text)
-                    except:
-                        pass
-            
-            # 卷期
-            volume_elem = medline.find(".//Volume")
-            volume = volume_elem.text if volume_elem is not None else None
-            
-            issue_elem = medline.find(".//Issue")
-            issue = issue_elem.text if issue_elem is not None else None
-            
-            # 页码
-            pagination = medline.find(".//Pagination")
-            pages = None
-            if pagination is not None:
-                start_page = pagination.find(".//StartPage")
-                end_page = pagination.find(".//EndPage")
-                if start_page is not None:
-                    pages = start_page.text
-                    if end_page is not None:
-                        pages += f"-{end_page.text}"
-            
-            # DOI
-            article_id_list = medline.find(".//ArticleIdList")
-            doi = None
-            if article_id_list is not None:
-                for article_id in article_id_list.findall(".//ArticleId"):
-                    if article_id.get("IdType") == "doi":
-                        doi = article_id.text
-                        break
-            
-            # 摘要
-            abstract_elem = medline.find(".//Abstract/AbstractText")
-            abstract = abstract_elem.text if abstract_elem is not None else None
-            
-            return {
-                "pmid": pmid,
-                "title": title,
-                "authors": authors,
-                "journal": journal,
-                "year": year,
-                "volume": volume,
-                "issue": issue,
-                "pages": pages,
-                "doi": doi,
-                "abstract": abstract
-            }
-        except Exception as e:
-            print(f"解析XML出错: {str(e)}")
-            return {}
+    @timed_stage("complete_articles")
+    async def complete_articles(self, articles: List[Dict[str, Any]], keywords: Dict[str, Any],
+                                similarity_service) -> List[Dict[str, Any]]:
+        """把检索结果中只有摘要信息的文章替换为完整记录（一次批量获取）
+        
+        保留检索过程中添加的临时字段（相似度、匹配类型），字段差异按完整记录重新生成；
+        获取失败时保留摘要信息。被丢弃的候选文章不会获取完整记录。
+        """
+        partial = [article for article in articles if "abstract" not in article]
+        if not partial:
+            return articles
+        records = {
+            article["pmid"]: article
+            for article in await self.fetch_candidates([article["pmid"] for article in partial], full=True)
+        }
+        for article in partial:
+            record = records.get(article["pmid"])
+            if record is None:
+                continue
+            temporary = {k: v for k, v in article.items() if k.startswith("_")}
+            article.clear()
+            article.update(record)
+            article.update(temporary)
+            if "_differences" in temporary:
+                article["_differences"] = similarity_service.find_differences(keywords, article)
+        return articles
     
     async def _evaluate_and_classify_articles(
         self, 
@@ -407,7 +241,8 @@ class PubMedService:
         keywords: Dict[str, Any],
         use_smart_matching: bool,
         similarity_service,
-        exclude_doi_pmid: bool = False
+        exclude_doi_pmid: bool = False,
+        use_semantic_matching: bool = False
     ) -> tuple:
         """评估文章并分类
         
@@ -435,6 +270,9 @@ class PubMedService:
                 "pmid": article.get("pmid"),
                 "doi": article.get("doi")
             }
+            if use_semantic_matching:
+                # 语义重排序需要摘要
+                article_keywords["abstract"] = article.get("abstract")
             candidate_keywords.append(article_keywords)
         
         # 如果已通过DOI/PMID检索过，后续检索阶段排除DOI/PMID字段
@@ -442,16 +280,22 @@ class PubMedService:
         if exclude_doi_pmid:
             # 移除DOI/PMID字段，只关注其他字段
             evaluation_keywords = {k: v for k, v in keywords.items() if k not in ["doi", "pmid"]}
-            logger.info(f"  已通过DOI/PMID检索过，后续检索阶段排除DOI/PMID字段，专注于其他字段匹配")
+            logger.info("  已通过DOI/PMID检索过，后续检索阶段排除DOI/PMID字段，专注于其他字段匹配")
         
         # 批量计算相似度
         if use_smart_matching:
-            scored_results = similarity_service.calculate_similarity_batch(
+            # 大模型调用是同步阻塞的，放到线程中执行，避免阻塞其他并发检索
+            scored_results = await asyncio.to_thread(
+                similarity_service.calculate_similarity_batch,
                 evaluation_keywords, candidate_keywords, use_smart_matching=True, exclude_doi_pmid=exclude_doi_pmid
             )
         else:
-            scored_results = similarity_service.calculate_similarity_batch(
-                evaluation_keywords, candidate_keywords, use_smart_matching=False, exclude_doi_pmid=exclude_doi_pmid
+            # 传统方法/本地语义重排序为CPU密集型计算，大批量交给进程池，避免阻塞事件循环
+            # 同一遍计算中生成与完整关键词的字段差异，响应阶段无需再次比较
+            scored_results = await score_batch(
+                similarity_service, evaluation_keywords, candidate_keywords,
+                exclude_doi_pmid=exclude_doi_pmid, use_semantic_matching=use_semantic_matching,
+                diff_original=keywords
             )
         
         # 分类文章
@@ -464,15 +308,23 @@ class PubMedService:
         has_doi_match = bool(keywords.get("doi")) and not exclude_doi_pmid
         has_pmid_match = bool(keywords.get("pmid")) and not exclude_doi_pmid
         
+        # 按PMID索引原始文章对象（保留第一次出现的文章）
+        articles_by_pmid = {}
+        for a in articles:
+            articles_by_pmid.setdefault(a.get("pmid"), a)
+        
         for similarity, article_keywords in scored_results:
             # 找到对应的原始文章对象
-            article = next(
-                (a for a in articles if a.get("pmid") == article_keywords.get("pmid")),
-                None
-            )
+            article = articles_by_pmid.get(article_keywords.get("pmid"))
             if not article:
                 continue
             
+            # 保存字段差异（大模型评估时在此生成，与评分同一遍）
+            if "_differences" in article_keywords:
+                article["_differences"] = article_keywords.pop("_differences")
+            else:
+                article["_differences"] = similarity_service.find_differences(keywords, article_keywords)
+            
             # 检查是否是DOI/PMID匹配（如果已排除DOI/PMID，则不会匹配）
             is_doi_pmid_match = False
             match_type = None  # "doi_match" 或 "pmid_match"
@@ -481,7 +333,7 @@ class PubMedService:
             if article.get("_match_type") in ["doi_match", "pmid_match"]:
                 is_doi_pmid_match = True
                 match_type = article.get("_match_type")
-                logger.info(f"  文章已有匹配类型标记: {match_type}, PMID={article.get('pmid')}")
+                logger.debug("  文章已有匹配类型标记: %s, PMID=%s", match_type, article.get('pmid'))
             elif not exclude_doi_pmid:
                 # 如果没有匹配类型标记，则通过比较DOI/PMID来判断
                 if has_doi_match and article_keywords.get("doi"):
@@ -502,60 +354,147 @@ class PubMedService:
                 if is_doi_pmid_match and not article.get("_match_type"):
                     article["_match_type"] = match_type
                 high_confidence.append((similarity, article))
-                match_type_info = f" ({match_type})" if match_type else ""
-                logger.info(f"  高置信度文章 (相似度={similarity:.4f}{match_type_info}): PMID={article.get('pmid')}")
+                logger.debug("  高置信度文章 (相似度=%.4f, 匹配类型=%s): PMID=%s", similarity, match_type, article.get('pmid'))
             elif similarity >= 0.5:
                 if is_doi_pmid_match:
                     # DOI/PMID匹配但相似度<0.9，加入特殊列表
                     doi_pmid_matched.append((similarity, article))
-                    logger.info(f"  DOI/PMID匹配文章 (相似度={similarity:.4f}): PMID={article.get('pmid')}")
+                    logger.debug("  DOI/PMID匹配文章 (相似度=%.4f): PMID=%s", similarity, article.get('pmid'))
                 else:
                     candidates.append((similarity, article))
-                    logger.info(f"  候选文章 (相似度={similarity:.4f}): PMID={article.get('pmid')}")
+                    logger.debug("  候选文章 (相似度=%.4f): PMID=%s", similarity, article.get('pmid'))
             else:
                 # 即使相似度<0.5，只要DOI/PMID匹配，也要加入特殊列表
                 if is_doi_pmid_match:
                     doi_pmid_matched.append((similarity, article))
-                    logger.info(f"  DOI/PMID匹配文章（相似度较低={similarity:.4f}，但DOI/PMID匹配）: PMID={article.get('pmid')}")
+                    logger.debug("  DOI/PMID匹配文章（相似度较低=%.4f，但DOI/PMID匹配）: PMID=%s", similarity, article.get('pmid'))
                 else:
                     discarded.append((similarity, article))
-                    logger.info(f"  丢弃文章 (相似度={similarity:.4f}): PMID={article.get('pmid')}")
+                    logger.debug("  丢弃文章 (相似度=%.4f): PMID=%s", similarity, article.get('pmid'))
         
         return high_confidence, candidates, discarded, doi_pmid_matched
     
-    async def search_articles(self, keywords: Dict[str, Any], use_smart_matching: bool = False) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _report_progress(on_progress: Optional[Callable[[Dict[str, Any]], None]], stage: str, **data) -> None:
+        """报告检索进度（回调出错不影响检索），获取到的候选数同时记录到追踪区间"""
+        if stage == "candidates_fetched":
+            tracing.annotate(pmids=data.get("pmids"), fetched=data.get("fetched"))
+        if on_progress is None:
+            return
+        try:
+            on_progress({"stage": stage, **data})
+        except Exception as e:
+            logger.error("进度回调出错: %s", str(e))
+    
+    @timed_stage("search_articles")
+    async def search_articles(self, keywords: Dict[str, Any], use_smart_matching: bool = False,
+                              use_semantic_matching: bool = False,
+                              on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                              session_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """根据关键词搜索文章，按优先级顺序，使用优化的检索策略
         
         Args:
             keywords: 检索关键词
             use_smart_matching: 是否使用大模型智能匹配（启用时会在每个优先级检索后立即评估）
+            use_semantic_matching: 是否使用本地语义重排序（纯CPU，智能匹配启用时忽略）
+            on_progress: 进度回调，参数为事件字典：
+                {"stage": "strategy", "priority": ..., "strategy": ...} 开始执行某个检索策略；
+                {"stage": "candidates_fetched", "priority": ..., "strategy": ..., "pmids": ..., "fetched": ...} 获取候选文章完成
+            session_id: 增量检索的会话ID。检索状态（候选文章、执行过的检索条件）按会话ID保存，
+                同一会话再次检索（如用户修改了某个字段）时上次的候选文章重新评分，只执行检索条件变化的策略；
+                不会再次检索的调用方（批量任务、预检索等）不指定，不保存检索状态
         """
-        logger.info("*" * 80)
-        logger.info("开始 PubMed 检索（优化策略）")
-        logger.info(f"检索关键词: {keywords}")
-        logger.info(f"智能匹配: {'启用' if use_smart_matching else '禁用'}")
+        session = token = None
+        if session_id and self.sessions.enabled:
+            session = await self.sessions.load(session_id)
+            token = search_session.activate(session)
+            tracing.annotate(incremental=session.incremental)
+        try:
+            cached = await self._cached_result(keywords, use_smart_matching, use_semantic_matching)
+            if cached is not None:
+                return cached
+            
+            # 导入相似度服务（延迟导入避免循环依赖）
+            from app.services.similarity_service import SimilarityService
+            similarity_service = SimilarityService()
+            
+            articles = await self._search_articles(
+                keywords, use_smart_matching, use_semantic_matching, on_progress, similarity_service
+            )
+            # 只为返回的文章获取完整记录
+            articles = await self.complete_articles(articles, keywords, similarity_service)
+            await self.result_cache.put(keywords, use_smart_matching, use_semantic_matching, articles)
+            return articles
+        finally:
+            if session is not None:
+                search_session.deactivate(token)
+                # 命中结果缓存时没有执行检索流程，保留上次的状态
+                if session.pool is not None:
+                    await self.sessions.save(session_id, session)
+    
+    async def _cached_result(self, keywords: Dict[str, Any], use_smart_matching: bool,
+                             use_semantic_matching: bool) -> Optional[List[Dict[str, Any]]]:
+        """按检索结果缓存重建结果文章（文章内容从文章存储读取），未缓存或文章获取不全时返回 None
         
-        # 导入相似度服务（延迟导入避免循环依赖）
-        from app.services.similarity_service import SimilarityService
-        similarity_service = SimilarityService()
+        字段差异不缓存，由调用方按实际请求的关键词生成。
+        """
+        entries = await self.result_cache.get(keywords, use_smart_matching, use_semantic_matching)
+        if entries is None:
+            return None
+        tracing.annotate(result_cache="hit", articles=len(entries))
+        records = {
+            article["pmid"]: article
+            for article in await self.fetch_candidates([entry["pmid"] for entry in entries], full=True)
+        }
+        if len(records) < len(entries):
+            return None
+        articles = []
+        for entry in entries:
+            article = records[entry["pmid"]]
+            if entry.get("score") is not None:
+                article["_similarity_score"] = entry["score"]
+            if entry.get("match_type"):
+                article["_match_type"] = entry["match_type"]
+            articles.append(article)
+        logger.info("使用缓存的检索结果: %s 篇文章", len(articles))
+        return articles
+    
+    async def _search_articles(self, keywords: Dict[str, Any], use_smart_matching: bool,
+                               use_semantic_matching: bool,
+                               on_progress: Optional[Callable[[Dict[str, Any]], None]],
+                               similarity_service) -> List[Dict[str, Any]]:
+        """按优先级执行各检索策略，返回结果文章（候选文章可能只有摘要信息）"""
+        logger.info("开始 PubMed 检索（优化策略）")
+        logger.debug("检索关键词: %s", keywords)
+        logger.info("智能匹配: %s", '启用' if use_smart_matching else '禁用')
+        if use_semantic_matching and not use_smart_matching:
+            logger.info("本地语义重排序: 启用")
         
-        seen_pmids = set()
-        candidate_list = []  # 存储相似度 0.5-0.9 的候选文章
-        doi_pmid_matched_articles = []  # 存储DOI/PMID匹配但相似度<0.9的文章
+        # 本次检索的候选池：按PMID索引，保存相似度 0.5-0.9 的候选文章和DOI/PMID匹配但相似度<0.9的文章
+        pool = CandidatePool()
         has_doi_pmid_searched = False  # 标记是否已经通过DOI/PMID检索过
+        session = search_session.current()
+        if session is not None:
+            session.pool = pool
         
         # 优先级0: PMID直接搜索（最可靠）
         if keywords.get("pmid"):
             has_doi_pmid_searched = True  # 标记已通过PMID检索
             pmid = str(keywords["pmid"]).strip()
-            logger.info(f"[优先级0] 使用 PMID 直接检索: {pmid}")
+            logger.info("[优先级0] 使用 PMID 直接检索: %s", pmid)
+            self._report_progress(on_progress, "strategy", priority=0, strategy="PMID")
+            tracing.enter_strategy("pmid", priority=0)
             article = await self.fetch_article_details(pmid)
+            self._report_progress(
+                on_progress, "candidates_fetched", priority=0, strategy="PMID",
+                pmids=1, fetched=1 if article else 0
+            )
             if article:
                 article["pmid"] = pmid
                 # 添加PMID匹配类型标记
                 article["_match_type"] = "pmid_match"
-                seen_pmids.add(pmid)
-                logger.info(f"  直接找到文章: {article.get('title', 'N/A')[:80]}...")
+                pool.mark_seen(pmid)
+                logger.info("  直接找到文章: %s...", article.get('title', 'N/A')[:80])
                 
                 # 立即评估（排除PMID字段，只看其他关键词的相似度）
                 if use_smart_matching:
@@ -566,22 +505,22 @@ class PubMedService:
                     if high_conf:
                         # 排除PMID后，其他关键词相似度>0.9，直接返回
                         high_conf_article = high_conf[0][1]
-                        logger.info(f"  排除PMID后，其他关键词相似度={high_conf[0][0]:.4f}>0.9，直接返回")
+                        logger.info("  排除PMID后，其他关键词相似度=%.4f>0.9，直接返回", high_conf[0][0])
                         return [high_conf_article]
                     elif doi_pmid:
                         # 排除PMID后，其他关键词相似度<0.9，继续关键词检索
-                        # 将PMID匹配的文章加入特殊列表
-                        doi_pmid_matched_articles.extend(doi_pmid)
-                        logger.info(f"  排除PMID后，其他关键词相似度<0.9，继续关键词检索。PMID匹配文章已加入列表")
+                        # 将PMID匹配的文章加入候选池
+                        pool.add_all(doi_pmid)
+                        logger.info("  排除PMID后，其他关键词相似度<0.9，继续关键词检索。PMID匹配文章已加入候选池")
                     elif cands:
                         # 这种情况不应该出现（因为文章是PMID匹配的）
-                        # 但为了安全，也加入PMID匹配列表
-                        doi_pmid_matched_articles.extend([(cands[0][0], article)])
-                        logger.info(f"  排除PMID后，其他关键词相似度<0.9，继续关键词检索")
+                        # 但为了安全，也作为PMID匹配加入候选池
+                        pool.add(article, cands[0][0], "pmid_match")
+                        logger.info("  排除PMID后，其他关键词相似度<0.9，继续关键词检索")
                     # 如果相似度<0.5，继续检索（虽然不太可能）
                 else:
                     # 传统方法：PMID匹配直接返回
-                    logger.info(f"PubMed 检索完成，共找到 1 篇文章")
+                    logger.info("PubMed 检索完成，共找到 1 篇文章")
                     return [article]
             else:
                 logger.info("  未找到对应的文章")
@@ -590,48 +529,106 @@ class PubMedService:
         doi_article = None
         if keywords.get("doi"):
             has_doi_pmid_searched = True  # 标记已通过DOI检索
-            logger.info(f"[优先级1] 使用 DOI 检索: {keywords['doi']}")
+            logger.info("[优先级1] 使用 DOI 检索: %s", keywords['doi'])
+            self._report_progress(on_progress, "strategy", priority=1, strategy="DOI")
+            tracing.enter_strategy("doi", priority=1)
             pmid = await self.search_by_doi(keywords["doi"])
-            if pmid and pmid not in seen_pmids:
-                logger.info(f"  找到 PMID: {pmid}")
+            if pmid and not pool.is_seen(pmid):
+                logger.info("  找到 PMID: %s", pmid)
                 article = await self.fetch_article_details(pmid)
                 if article:
                     article["pmid"] = pmid
                     # 添加DOI匹配类型标记
                     article["_match_type"] = "doi_match"
                     doi_article = article
-                    seen_pmids.add(pmid)
-                    logger.info(f"  检索到文章: {article.get('title', 'N/A')[:80]}...")
+                    pool.mark_seen(pmid)
+                    logger.info("  检索到文章: %s...", article.get('title', 'N/A')[:80])
+                    self._report_progress(
+                        on_progress, "candidates_fetched", priority=1, strategy="DOI", pmids=1, fetched=1
+                    )
                     
-                    # 立即评估（排除DOI字段，只看其他关键词的相似度）
-                    if use_smart_matching:
-                        # 排除DOI/PMID字段来评估相似度
-                        high_conf, cands, _, doi_pmid = await self._evaluate_and_classify_articles(
-                            [article], keywords, use_smart_matching, similarity_service, exclude_doi_pmid=True
-                        )
-                        if high_conf:
-                            # 排除DOI后，其他关键词相似度>0.9，直接返回
-                            high_conf_article = high_conf[0][1]
-                            logger.info(f"  排除DOI后，其他关键词相似度={high_conf[0][0]:.4f}>0.9，直接返回")
-                            return [high_conf_article]
-                        elif doi_pmid:
-                            # 排除DOI后，其他关键词相似度<0.9，继续关键词检索
-                            # 将DOI匹配的文章加入特殊列表
-                            doi_pmid_matched_articles.extend(doi_pmid)
-                            logger.info(f"  排除DOI后，其他关键词相似度<0.9，继续关键词检索。DOI匹配文章已加入列表")
-                        elif cands:
-                            # 这种情况不应该出现（因为文章是DOI匹配的）
-                            # 但为了安全，也加入DOI匹配列表
-                            doi_pmid_matched_articles.extend([(cands[0][0], article)])
-                            logger.info(f"  排除DOI后，其他关键词相似度<0.9，继续关键词检索")
-                    else:
-                        # 传统方法：如果只有DOI且无其他字段，直接返回
-                        if not (keywords.get("title") or keywords.get("authors") or keywords.get("journal")):
-                            logger.info(f"PubMed 检索完成，仅通过DOI找到文章，直接返回")
-                            return [article]
+                    # 传统方法：如果只有DOI且无其他字段，直接返回
+                    if not use_smart_matching and not (
+                        keywords.get("title") or keywords.get("authors") or keywords.get("journal")
+                    ):
+                        logger.info("PubMed 检索完成，仅通过DOI找到文章，直接返回")
+                        return [article]
+                    
+                    # 立即评估（排除DOI/PMID字段，只看其他关键词的相似度）
+                    # 文章已标记为已获取，之后的关键词检索不会再评估它，未达到高置信度时须加入候选池
+                    high_conf, cands, _, doi_pmid = await self._evaluate_and_classify_articles(
+                        [article], keywords, use_smart_matching, similarity_service, exclude_doi_pmid=True,
+                        use_semantic_matching=use_semantic_matching
+                    )
+                    if high_conf:
+                        # 排除DOI后，其他关键词相似度>0.9，直接返回
+                        high_conf_article = high_conf[0][1]
+                        logger.info("  排除DOI后，其他关键词相似度=%.4f>0.9，直接返回", high_conf[0][0])
+                        return [high_conf_article]
+                    elif doi_pmid:
+                        # 排除DOI后，其他关键词相似度<0.9，继续关键词检索
+                        # 将DOI匹配的文章加入候选池
+                        pool.add_all(doi_pmid)
+                        logger.info("  排除DOI后，其他关键词相似度<0.9，继续关键词检索。DOI匹配文章已加入候选池")
+                    elif cands:
+                        # 这种情况不应该出现（因为文章是DOI匹配的）
+                        # 但为了安全，也作为DOI匹配加入候选池
+                        pool.add(article, cands[0][0], "doi_match")
+                        logger.info("  排除DOI后，其他关键词相似度<0.9，继续关键词检索")
             else:
                 logger.info("  未找到匹配的 PMID")
         
+        # 优先级1.1: 没有PMID/DOI时，在本地已缓存的文章中查找近似标题（LSH索引，无需访问PubMed）
+        # 有PMID/DOI的参考文献以标识符为准，不用标题近似的文章（如同名的勘误、评论）作答
+        if keywords.get("title") and not has_doi_pmid_searched and len(self.article_store):
+            tracing.enter_strategy("local_store", priority=1.1)
+            local_articles = self.article_store.find_similar_titles(keywords["title"])
+            if local_articles:
+                logger.info("[优先级1.1] 本地存储中找到 %s 篇标题近似的文章，进行精确评分", len(local_articles))
+                self._report_progress(
+                    on_progress, "candidates_fetched", priority=1.1, strategy="本地存储",
+                    pmids=len(local_articles), fetched=len(local_articles)
+                )
+                high_conf, _, _, _ = await self._evaluate_and_classify_articles(
+                    local_articles, keywords, use_smart_matching, similarity_service,
+                    use_semantic_matching=use_semantic_matching
+                )
+                if high_conf:
+                    score, article = high_conf[0]
+                    article["_similarity_score"] = score
+                    logger.info("  本地存储高置信度匹配（相似度=%.4f），直接返回: PMID=%s", score, article.get('pmid'))
+                    return [article]
+                logger.info("  本地存储中无高置信度匹配，继续在线检索")
+        
+        # 增量检索：上次检索获取过的候选文章按新的关键词重新评分（文章从本地存储读取）
+        # 之后检索条件未变化的策略不再访问文献来源，只执行条件变化的策略
+        rescore = [pmid for pmid in session.rescore_pmids() if not pool.is_seen(pmid)] if session is not None else []
+        if rescore:
+            logger.info("[增量检索] 上次检索的 %s 篇候选文章按新的关键词重新评分", len(rescore))
+            self._report_progress(on_progress, "strategy", priority=1.2, strategy="增量检索")
+            tracing.enter_strategy("incremental", priority=1.2)
+            previous_articles = await self.fetch_candidates(rescore, full=use_semantic_matching and not use_smart_matching)
+            for article in previous_articles:
+                pool.mark_seen(article["pmid"])
+            self._report_progress(
+                on_progress, "candidates_fetched", priority=1.2, strategy="增量检索",
+                pmids=len(rescore), fetched=len(previous_articles)
+            )
+            if previous_articles:
+                high_conf, cands, discarded, doi_pmid = await self._evaluate_and_classify_articles(
+                    previous_articles, keywords, use_smart_matching, similarity_service,
+                    exclude_doi_pmid=has_doi_pmid_searched,
+                    use_semantic_matching=use_semantic_matching
+                )
+                if high_conf:
+                    logger.info("  找到高置信度匹配（相似度=%.4f），直接返回", high_conf[0][0])
+                    return [high_conf[0][1]]
+                if doi_pmid:
+                    pool.add_all(doi_pmid)
+                if cands:
+                    pool.add_all(cands)
+                    logger.info("  加入 %s 篇候选文章到候选池", len(cands))
+        
         # 提取关键词字段
         title = keywords.get("title")
         first_author = None
@@ -644,7 +641,7 @@ class PubMedService:
         
         # 优先级1.5: 无标题情况下的搜索（在优先级2之前处理）
         if not title:
-            logger.info(f"[优先级1.5] 无标题情况，使用作者+期刊+年份等字段搜索（模糊匹配）")
+            logger.info("[优先级1.5] 无标题情况，使用作者+期刊+年份等字段搜索（模糊匹配）")
             
             # 获取全部作者列表
             all_authors = None
@@ -654,6 +651,41 @@ class PubMedService:
                 else:
                     all_authors = [keywords["authors"]]
             
+            # 优先级1.4: 引文匹配（期刊+年份+卷号+首页+第一作者），可以唯一确定文章，先于字段组合检索
+            if journal and year and volume and keywords.get("pages"):
+                logger.info("[优先级1.4] 使用引文匹配（期刊+年份+卷号+首页+第一作者）")
+                self._report_progress(on_progress, "strategy", priority=1.4, strategy="引文匹配")
+                tracing.enter_strategy("citation_match", priority=1.4)
+                pmid = await self.match_citation(keywords)
+                batch_articles = []
+                if pmid and not pool.is_seen(pmid):
+                    logger.info("  找到 PMID: %s", pmid)
+                    batch_articles = await self.fetch_candidates(
+                        [pmid], full=use_semantic_matching and not use_smart_matching
+                    )
+                    for article in batch_articles:
+                        pool.mark_seen(article["pmid"])
+                self._report_progress(
+                    on_progress, "candidates_fetched", priority=1.4, strategy="引文匹配",
+                    pmids=1 if pmid else 0, fetched=len(batch_articles)
+                )
+                if batch_articles:
+                    high_conf, cands, _, doi_pmid = await self._evaluate_and_classify_articles(
+                        batch_articles, keywords, use_smart_matching, similarity_service,
+                        exclude_doi_pmid=has_doi_pmid_searched,
+                        use_semantic_matching=use_semantic_matching
+                    )
+                    if high_conf:
+                        logger.info("  找到高置信度匹配（相似度=%.4f），直接返回", high_conf[0][0])
+                        return [high_conf[0][1]]
+                    if doi_pmid:
+                        pool.add_all(doi_pmid)
+                    if cands:
+                        pool.add_all(cands)
+                        logger.info("  加入 %s 篇候选文章到候选池", len(cands))
+                elif not pmid:
+                    logger.info("  未找到匹配的 PMID")
+            
             # 至少需要作者或期刊之一才能搜索
             if all_authors or journal:
                 # 定义无标题模糊匹配策略（按可靠性从高到低）
@@ -687,47 +719,54 @@ class PubMedService:
                     if strategy_name == "期刊" and not j:
                         continue
                     
-                    logger.info(f"  策略: {strategy_name}")
+                    logger.info("  策略: %s", strategy_name)
+                    self._report_progress(on_progress, "strategy", priority=1.5, strategy=strategy_name)
+                    tracing.enter_strategy(strategy_name, priority=1.5)
                     pmids = await self.search_by_author_journal(
                         authors=authors_list, journal=j, year=y, volume=v, issue=i, exact_match=False
                     )
-                    logger.info(f"    找到 {len(pmids)} 个 PMID")
+                    logger.info("    找到 %s 个 PMID", len(pmids))
                     
-                    batch_articles = []
-                    for pmid in pmids:
-                        if pmid not in seen_pmids:
-                            article = await self.fetch_article_details(pmid)
-                            if article:
-                                article["pmid"] = pmid
-                                batch_articles.append(article)
-                                seen_pmids.add(pmid)
-                                logger.info(f"    检索到文章 [{pmid}]: {article.get('title', 'N/A')[:60]}...")
+                    # 一次批量获取本策略新出现的候选文章
+                    batch_articles = await self.fetch_candidates(
+                        [pmid for pmid in dict.fromkeys(pmids) if not pool.is_seen(pmid)],
+                        full=use_semantic_matching and not use_smart_matching
+                    )
+                    for article in batch_articles:
+                        pool.mark_seen(article["pmid"])
+                        logger.debug("    检索到文章 [%s]: %s...", article["pmid"], (article.get('title') or 'N/A')[:60])
+                    
+                    self._report_progress(
+                        on_progress, "candidates_fetched", priority=1.5, strategy=strategy_name,
+                        pmids=len(pmids), fetched=len(batch_articles)
+                    )
                     
                     # 立即评估这批文章（如果已通过DOI/PMID检索，排除DOI/PMID字段）
                     if batch_articles:
                         high_conf, cands, discarded, doi_pmid = await self._evaluate_and_classify_articles(
                             batch_articles, keywords, use_smart_matching, similarity_service,
-                            exclude_doi_pmid=has_doi_pmid_searched
+                            exclude_doi_pmid=has_doi_pmid_searched,
+                            use_semantic_matching=use_semantic_matching
                         )
                         
                         # 高置信度：直接返回
                         if high_conf:
-                            logger.info(f"  找到高置信度匹配（相似度={high_conf[0][0]:.4f}），直接返回")
+                            logger.info("  找到高置信度匹配（相似度=%.4f），直接返回", high_conf[0][0])
                             return [high_conf[0][1]]
                         
-                        # DOI/PMID匹配但相似度<0.9：加入特殊列表
+                        # DOI/PMID匹配但相似度<0.9：加入候选池（保留匹配类型）
                         if doi_pmid:
-                            doi_pmid_matched_articles.extend(doi_pmid)
-                            logger.info(f"  加入 {len(doi_pmid)} 篇DOI/PMID匹配文章到特殊列表")
+                            pool.add_all(doi_pmid)
+                            logger.info("  加入 %s 篇DOI/PMID匹配文章到候选池", len(doi_pmid))
                         
-                        # 候选文章：加入候选列表
+                        # 候选文章：加入候选池
                         if cands:
-                            candidate_list.extend(cands)
-                            logger.info(f"  加入 {len(cands)} 篇候选文章到候选列表")
+                            pool.add_all(cands)
+                            logger.info("  加入 %s 篇候选文章到候选池", len(cands))
                         
                         # 丢弃的文章：不处理，继续下一策略
                         if discarded:
-                            logger.info(f"  丢弃 {len(discarded)} 篇相似度<0.5的文章")
+                            logger.info("  丢弃 %s 篇相似度<0.5的文章", len(discarded))
                         
                         # 如果找到候选文章，继续尝试更精确的策略（不break）
                         # 只有在找到高置信度时才break
@@ -736,7 +775,7 @@ class PubMedService:
         
         # 优先级2: 有标题情况下的模糊匹配（去掉精确匹配）
         if title:
-            logger.info(f"[优先级2] 有标题情况，使用模糊匹配")
+            logger.info("[优先级2] 有标题情况，使用模糊匹配")
             
             # 提取标题关键词
             title_words = title.split()
@@ -747,18 +786,18 @@ class PubMedService:
             if len(keywords_list) >= 3:
                 num_keywords = min(15, len(keywords_list))
                 key_title = " ".join(keywords_list[:num_keywords])
-                logger.info(f"  使用关键词: {key_title[:80]}...")
+                logger.info("  使用关键词: %s...", key_title[:80])
             elif len(title_words) >= 3:
                 # 如果关键词太少，使用所有词（但限制数量）
                 num_words = min(15, len(title_words))
                 key_title = " ".join(title_words[:num_words])
-                logger.info(f"  关键词不足，使用所有词: {key_title[:80]}...")
+                logger.info("  关键词不足，使用所有词: %s...", key_title[:80])
             else:
                 # 标题太短，使用所有词
                 num_words = min(15, len(title_words))
                 key_title = " ".join(title_words[:num_words]) if title_words else None
                 if key_title:
-                    logger.info(f"  标题较短，使用所有词: {key_title[:80]}...")
+                    logger.info("  标题较短，使用所有词: %s...", key_title[:80])
                 else:
                     logger.info("  标题为空，跳过模糊匹配")
             
@@ -779,255 +818,152 @@ class PubMedService:
                     if strategy_name == "关键词+作者" and not a:
                         continue
                     
-                    logger.info(f"  策略: {strategy_name}")
+                    logger.info("  策略: %s", strategy_name)
+                    self._report_progress(on_progress, "strategy", priority=2, strategy=strategy_name)
+                    tracing.enter_strategy(strategy_name, priority=2)
                     pmids = await self.search_by_title(t, author=a, journal=j, year=y, exact_match=False)
-                    logger.info(f"    找到 {len(pmids)} 个 PMID")
+                    logger.info("    找到 %s 个 PMID", len(pmids))
                     
-                    batch_articles = []
-                    for pmid in pmids:
-                        if pmid not in seen_pmids:
-                            article = await self.fetch_article_details(pmid)
-                            if article:
-                                article["pmid"] = pmid
-                                batch_articles.append(article)
-                                seen_pmids.add(pmid)
-                                logger.info(f"    检索到文章 [{pmid}]: {article.get('title', 'N/A')[:60]}...")
+                    # 一次批量获取本策略新出现的候选文章
+                    batch_articles = await self.fetch_candidates(
+                        [pmid for pmid in dict.fromkeys(pmids) if not pool.is_seen(pmid)],
+                        full=use_semantic_matching and not use_smart_matching
+                    )
+                    for article in batch_articles:
+                        pool.mark_seen(article["pmid"])
+                        logger.debug("    检索到文章 [%s]: %s...", article["pmid"], (article.get('title') or 'N/A')[:60])
+                    
+                    self._report_progress(
+                        on_progress, "candidates_fetched", priority=2, strategy=strategy_name,
+                        pmids=len(pmids), fetched=len(batch_articles)
+                    )
                     
                     # 立即评估这批文章
                     if batch_articles:
                         high_conf, cands, discarded, _ = await self._evaluate_and_classify_articles(
-                            batch_articles, keywords, use_smart_matching, similarity_service
+                            batch_articles, keywords, use_smart_matching, similarity_service,
+                            use_semantic_matching=use_semantic_matching
                         )
                         
                         # 高置信度：直接返回
                         if high_conf:
-                            logger.info(f"  找到高置信度匹配（相似度={high_conf[0][0]:.4f}），直接返回")
+                            logger.info("  找到高置信度匹配（相似度=%.4f），直接返回", high_conf[0][0])
                             return [high_conf[0][1]]
                         
-                        # 候选文章：加入候选列表
+                        # 候选文章：加入候选池
                         if cands:
-                            candidate_list.extend(cands)
-                            logger.info(f"  加入 {len(cands)} 篇候选文章到候选列表")
+                            pool.add_all(cands)
+                            logger.info("  加入 %s 篇候选文章到候选池", len(cands))
                         
                         # 丢弃的文章：不处理，继续下一策略
                         if discarded:
-                            logger.info(f"  丢弃 {len(discarded)} 篇相似度<0.5的文章")
+                            logger.info("  丢弃 %s 篇相似度<0.5的文章", len(discarded))
                         
                         # 如果找到候选文章，继续尝试更精确的策略
         
-        # 所有优先级检索完毕，处理候选列表
-        logger.info(f"\n所有优先级检索完毕，候选列表中有 {len(candidate_list)} 篇文章")
-        logger.info(f"DOI/PMID匹配列表中有 {len(doi_pmid_matched_articles)} 篇文章")
+        # 所有优先级检索完毕，处理候选池
+        matched_entries = pool.matched()
+        candidate_entries = pool.candidates()
+        logger.info("\n所有优先级检索完毕，候选池中有 %s 篇候选文章", len(candidate_entries))
+        logger.info("DOI/PMID匹配的文章有 %s 篇", len(matched_entries))
         
-        # 如果候选列表为空，返回空结果
-        if not candidate_list and not doi_pmid_matched_articles:
-            logger.info(f"PubMed 检索完成，未找到匹配文章")
+        # 如果候选池为空，返回空结果
+        if not candidate_entries and not matched_entries:
+            logger.info("PubMed 检索完成，未找到匹配文章")
             return []
         
         # 如果只有DOI/PMID匹配的文章（没有其他候选文章），直接返回
-        if not candidate_list and doi_pmid_matched_articles:
-            logger.info(f"PubMed 检索完成，只有DOI/PMID匹配的文章，返回 {len(doi_pmid_matched_articles)} 篇")
-            result_articles = []
-            for score, article in doi_pmid_matched_articles:
-                article["_similarity_score"] = score
-                if "_match_type" not in article:
-                    if keywords.get("doi") and article.get("doi"):
-                        if keywords.get("doi").lower().strip() == article.get("doi").lower().strip():
-                            article["_match_type"] = "doi_match"
-                    elif keywords.get("pmid") and article.get("pmid"):
-                        if str(keywords.get("pmid")).strip() == str(article.get("pmid")).strip():
-                            article["_match_type"] = "pmid_match"
-                result_articles.append(article)
-            return result_articles
+        if not candidate_entries:
+            logger.info("PubMed 检索完成，只有DOI/PMID匹配的文章，返回 %s 篇", len(matched_entries))
+            return [pool.annotate(entry) for entry in matched_entries]
+        
+        # 如果候选池只有一篇文章且没有DOI/PMID匹配的文章，直接返回
+        if len(candidate_entries) == 1 and not matched_entries:
+            logger.info("PubMed 检索完成，找到唯一候选文章")
+            return [pool.annotate(candidate_entries[0])]
         
-        # 如果候选列表只有一篇文章且没有DOI/PMID匹配的文章，直接返回
-        if len(candidate_list) == 1 and not doi_pmid_matched_articles:
-            logger.info(f"PubMed 检索完成，找到唯一候选文章")
-            return [candidate_list[0][1]]
+        # 候选池有多篇文章（DOI/PMID匹配的文章排在前面）
+        logger.info("候选池中有多篇文章，进行最终评估")
+        all_entries = matched_entries + candidate_entries
+        tracing.enter_strategy("final_evaluation", candidates=len(all_entries))
         
-        # 如果候选列表有多篇文章，使用大模型最终评估
-        if len(candidate_list) > 1 or (candidate_list and doi_pmid_matched_articles):
-            logger.info(f"候选列表中有多篇文章，使用大模型最终评估")
+        # 如果启用大模型，使用大模型最终评估
+        if use_smart_matching:
+            logger.info("使用大模型对 %s 篇候选文章进行最终评估", len(all_entries))
+            candidate_keywords = []
+            for entry in all_entries:
+                article = entry.article
+                article_keywords = {
+                    "title": article.get("title"),
+                    "authors": article.get("authors", []),
+                    "journal": article.get("journal"),
+                    "year": article.get("year"),
+                    "volume": article.get("volume"),
+                    "issue": article.get("issue"),
+                    "pages": article.get("pages"),
+                    "pmid": article.get("pmid"),
+                    "doi": article.get("doi")
+                }
+                candidate_keywords.append(article_keywords)
             
-            # 合并所有候选文章（去重）
-            all_candidates = []
-            seen_candidate_pmids = set()
+            # 最终评估：使用更详细的提示词
+            from app.services.llm_service import LLMService
+            llm_service = LLMService()
+            final_scored = await asyncio.to_thread(
+                llm_service.evaluate_similarity_with_llm,
+                keywords, candidate_keywords, is_final_evaluation=True
+            )
             
-            # 先添加DOI/PMID匹配的文章（优先级更高）
-            for score, article in doi_pmid_matched_articles:
-                if article.get("pmid") not in seen_candidate_pmids:
-                    all_candidates.append((score, article))
-                    seen_candidate_pmids.add(article.get("pmid"))
+            # 按相似度排序
+            final_scored.sort(key=lambda x: x[0], reverse=True)
             
-            # 再添加其他候选文章
-            for score, article in candidate_list:
-                if article.get("pmid") not in seen_candidate_pmids:
-                    all_candidates.append((score, article))
-                    seen_candidate_pmids.add(article.get("pmid"))
+            # 通过PMID索引找到对应的候选池条目
+            scored_entries = []
+            for score, article_keywords in final_scored:
+                entry = pool.get(article_keywords.get("pmid"))
+                if entry:
+                    scored_entries.append((score, entry))
             
-            # 如果启用大模型，使用大模型最终评估
-            if use_smart_matching and len(all_candidates) > 1:
-                logger.info(f"使用大模型对 {len(all_candidates)} 篇候选文章进行最终评估")
-                candidate_articles = [article for _, article in all_candidates]
-                candidate_keywords = []
-                for article in candidate_articles:
-                    article_keywords = {
-                        "title": article.get("title"),
-                        "authors": article.get("authors", []),
-                        "journal": article.get("journal"),
-                        "year": article.get("year"),
-                        "volume": article.get("volume"),
-                        "issue": article.get("issue"),
-                        "pages": article.get("pages"),
-                        "pmid": article.get("pmid"),
-                        "doi": article.get("doi")
-                    }
-                    candidate_keywords.append(article_keywords)
-                
-                # 最终评估：使用更详细的提示词
-                if use_smart_matching:
-                    from app.services.llm_service import LLMService
-                    llm_service = LLMService()
-                    final_scored = llm_service.evaluate_similarity_with_llm(
-                        keywords, candidate_keywords, is_final_evaluation=True
-                    )
-                else:
-                    final_scored = similarity_service.calculate_similarity_batch(
-                        keywords, candidate_keywords, use_smart_matching=False
-                    )
-                
-                # 按相似度排序
-                final_scored.sort(key=lambda x: x[0], reverse=True)
-                
-                # 构建相似度到文章对象的映射（处理相同分数的情况）
-                scored_articles = []
-                for score, article_keywords in final_scored:
-                    # 找到对应的原始文章对象
-                    article = next(
-                        (a for a in candidate_articles if a.get("pmid") == article_keywords.get("pmid")),
-                        None
-                    )
-                    if article:
-                        scored_articles.append((score, article))
-                
-                # 检查是否有匹配的文章
-                # 如果最高相似度低于0.3，认为大模型判断没有匹配的文章
-                NO_MATCH_THRESHOLD = 0.3
-                result_articles = []
-                best_score = 0.0
-                best_article = None
-                
-                if scored_articles:
-                    best_score, best_article = scored_articles[0]
-                    
-                    # 如果最高相似度低于阈值，但如果有DOI/PMID匹配的文章，仍然返回
-                    if best_score < NO_MATCH_THRESHOLD:
-                        logger.info(f"  最终评估：最高相似度={best_score:.4f} < {NO_MATCH_THRESHOLD}，大模型判断没有匹配的文章")
-                        if doi_pmid_matched_articles:
-                            logger.info(f"  但有DOI/PMID匹配的文章，仍然返回这些文章供用户选择")
-                            # 只返回DOI/PMID匹配的文章
-                            for score, article in doi_pmid_matched_articles:
-                                article["_similarity_score"] = score
-                                if "_match_type" not in article:
-                                    if keywords.get("doi") and article.get("doi"):
-                                        if keywords.get("doi").lower().strip() == article.get("doi").lower().strip():
-                                            article["_match_type"] = "doi_match"
-                                    elif keywords.get("pmid") and article.get("pmid"):
-                                        if str(keywords.get("pmid")).strip() == str(article.get("pmid")).strip():
-                                            article["_match_type"] = "pmid_match"
-                                result_articles.append(article)
-                            logger.info(f"PubMed 检索完成，返回 {len(result_articles)} 篇DOI/PMID匹配文章")
-                            return result_articles
-                        else:
-                            logger.info(f"  所有候选文章的相似度都较低，可能都不是同一篇文章")
-                            # 返回空列表，表示未找到匹配
-                            logger.info(f"PubMed 检索完成，未找到匹配文章（最终评估）")
-                            return []
-                
-                # 添加最可能的文章（关键词匹配的最优文章）
-                if best_article:
-                    # 在文章对象中添加相似度信息（临时字段）
-                    best_article["_similarity_score"] = best_score
-                    result_articles.append(best_article)
-                    logger.info(f"  关键词匹配的最优文章: PMID={best_article.get('pmid')}, 相似度={best_score:.4f}")
-                
-                # 添加所有DOI/PMID匹配的文章（确保与关键词匹配的文章不同）
-                seen_result_pmids = {best_article.get("pmid")} if best_article else set()
-                for score, article in doi_pmid_matched_articles:
-                    article_pmid = article.get("pmid")
-                    if article_pmid not in seen_result_pmids:
-                        # 在文章对象中添加相似度信息和匹配类型
-                        article["_similarity_score"] = score
-                        if "_match_type" not in article:
-                            # 如果没有匹配类型，根据DOI/PMID判断
-                            if keywords.get("doi") and article.get("doi"):
-                                if keywords.get("doi").lower().strip() == article.get("doi").lower().strip():
-                                    article["_match_type"] = "doi_match"
-                            elif keywords.get("pmid") and article.get("pmid"):
-                                if str(keywords.get("pmid")).strip() == str(article.get("pmid")).strip():
-                                    article["_match_type"] = "pmid_match"
-                        result_articles.append(article)
-                        seen_result_pmids.add(article_pmid)
-                        match_type_str = article.get("_match_type", "DOI/PMID匹配")
-                        logger.info(f"  {match_type_str}文章（相似度={score:.4f}）: PMID={article_pmid}")
+            # 检查是否有匹配的文章
+            # 如果最高相似度低于0.3，认为大模型判断没有匹配的文章
+            NO_MATCH_THRESHOLD = 0.3
+            result_articles = []
+            best_score = 0.0
+            best_entry = None
+            
+            if scored_entries:
+                best_score, best_entry = scored_entries[0]
                 
-                logger.info(f"PubMed 检索完成，返回 {len(result_articles)} 篇文章供用户选择")
-                return result_articles
-            else:
-                # 不使用大模型或只有一篇文章，直接返回排序后的结果
-                all_candidates.sort(key=lambda x: x[0], reverse=True)
-                result_articles = []
-                for score, article in all_candidates:
-                    article["_similarity_score"] = score
-                    # 确保DOI/PMID匹配的文章有匹配类型标记
-                    if "_match_type" not in article:
-                        if keywords.get("doi") and article.get("doi"):
-                            if keywords.get("doi").lower().strip() == article.get("doi").lower().strip():
-                                article["_match_type"] = "doi_match"
-                        elif keywords.get("pmid") and article.get("pmid"):
-                            if str(keywords.get("pmid")).strip() == str(article.get("pmid")).strip():
-                                article["_match_type"] = "pmid_match"
-                    result_articles.append(article)
-                logger.info(f"PubMed 检索完成，返回 {len(result_articles)} 篇文章")
-                return result_articles
-        
-        # 如果只有候选列表中的文章，也要检查是否有DOI/PMID匹配的文章
-        if doi_pmid_matched_articles:
-            # 合并候选列表和DOI/PMID匹配列表
-            all_articles = []
-            seen_pmids_result = set()
+                # 如果最高相似度低于阈值，但如果有DOI/PMID匹配的文章，仍然返回
+                if best_score < NO_MATCH_THRESHOLD:
+                    logger.info("  最终评估：最高相似度=%.4f < %s，大模型判断没有匹配的文章", best_score, NO_MATCH_THRESHOLD)
+                    if matched_entries:
+                        logger.info("  但有DOI/PMID匹配的文章，仍然返回这些文章供用户选择")
+                        # 只返回DOI/PMID匹配的文章
+                        result_articles = [pool.annotate(entry) for entry in matched_entries]
+                        logger.info("PubMed 检索完成，返回 %s 篇DOI/PMID匹配文章", len(result_articles))
+                        return result_articles
+                    else:
+                        logger.info("  所有候选文章的相似度都较低，可能都不是同一篇文章")
+                        # 返回空列表，表示未找到匹配
+                        logger.info("PubMed 检索完成，未找到匹配文章（最终评估）")
+                        return []
             
-            # 先添加DOI/PMID匹配的文章（优先级更高）
-            for score, article in doi_pmid_matched_articles:
-                if article.get("pmid") not in seen_pmids_result:
-                    article["_similarity_score"] = score
-                    if "_match_type" not in article:
-                        if keywords.get("doi") and article.get("doi"):
-                            if keywords.get("doi").lower().strip() == article.get("doi").lower().strip():
-                                article["_match_type"] = "doi_match"
-                        elif keywords.get("pmid") and article.get("pmid"):
-                            if str(keywords.get("pmid")).strip() == str(article.get("pmid")).strip():
-                                article["_match_type"] = "pmid_match"
-                    all_articles.append(article)
-                    seen_pmids_result.add(article.get("pmid"))
+            # 添加最可能的文章（关键词匹配的最优文章），使用最终评估的相似度
+            if best_entry:
+                result_articles.append(pool.annotate(best_entry, score=best_score))
+                logger.info("  关键词匹配的最优文章: PMID=%s, 相似度=%.4f", best_entry.pmid, best_score)
             
-            # 再添加其他候选文章
-            candidate_list.sort(key=lambda x: x[0], reverse=True)
-            for score, article in candidate_list:
-                if article.get("pmid") not in seen_pmids_result:
-                    article["_similarity_score"] = score
-                    all_articles.append(article)
-                    seen_pmids_result.add(article.get("pmid"))
+            # 添加所有DOI/PMID匹配的文章（确保与关键词匹配的文章不同）
+            for entry in matched_entries:
+                if entry is not best_entry:
+                    result_articles.append(pool.annotate(entry))
+                    logger.info("  %s文章（相似度=%.4f）: PMID=%s", entry.match_type, entry.score, entry.pmid)
             
-            logger.info(f"PubMed 检索完成，返回 {len(all_articles)} 篇文章（包含DOI/PMID匹配）")
-            return all_articles
-        else:
-            # 只有候选列表中的文章
-            candidate_list.sort(key=lambda x: x[0], reverse=True)
-            result_articles = []
-            for score, article in candidate_list:
-                article["_similarity_score"] = score
-                result_articles.append(article)
-            logger.info(f"PubMed 检索完成，返回 {len(result_articles)} 篇文章")
+            logger.info("PubMed 检索完成，返回 %s 篇文章供用户选择", len(result_articles))
             return result_articles
-
+        
+        # 不使用大模型，直接返回按相似度排序后的结果
+        result_articles = [pool.annotate(entry) for entry in pool.top_k()]
+        logger.info("PubMed 检索完成，返回 %s 篇文章", len(result_articles))
+        return result_articles
@@ -0,0 +1,186 @@
+"""PubMed XML 的字段提取
+
+efetch 响应解析（EutilsBackend._parse_xml）和本地PubMed镜像的导入共用同一套字段提取，
+保证两种来源得到的文章记录完全一致。
+
+解析是流式的：iterparse 逐篇产生 PubmedArticle 元素，处理完即清空，内存占用与文章数无关；
+字段只从固定位置的直接子元素读取，不做 .// 后代搜索。安装了 lxml 时使用 lxml（更快），否则使用标准库。
+"""
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, Union
+import io
+import os
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:  # pragma: no cover - lxml 是可选依赖
+    _lxml_etree = None
+
+# XML解析器：auto（有 lxml 时使用 lxml）、lxml 或 stdlib
+PUBMED_XML_PARSER = os.getenv("PUBMED_XML_PARSER", "auto").strip().lower()
+USE_LXML = _lxml_etree is not None and PUBMED_XML_PARSER != "stdlib"
+
+# 解析失败时抛出的异常（截断或格式错误的响应）
+XML_ERRORS: Tuple[type, ...] = (ET.ParseError,) + ((_lxml_etree.XMLSyntaxError,) if _lxml_etree is not None else ())
+
+_RECORD_TAGS = ("PubmedArticle", "DeleteCitation")
+
+
+def _children(elem: Any) -> Dict[str, Any]:
+    """一次遍历直接子元素，返回 标签 -> 第一个该标签的子元素（比逐个字段 find 快，lxml 下尤其明显）"""
+    children: Dict[str, Any] = {}
+    for child in elem:
+        if child.tag not in children:
+            children[child.tag] = child
+    return children
+
+
+def _text(children: Dict[str, Any], tag: str) -> Optional[str]:
+    elem = children.get(tag)
+    return elem.text if elem is not None else None
+
+
+def extract_article(article: ET.Element) -> Dict[str, Any]:
+    """从 PubmedArticle 元素中提取文章字段，缺少 MedlineCitation 时返回空字典
+
+    只读取固定位置的子元素：MedlineCitation/PMID、MedlineCitation/Article 下的标题、作者、期刊、
+    页码、ELocationID 和摘要，以及 PubmedData/ArticleIdList 中的DOI。
+    """
+    top = _children(article)
+    medline = top.get("MedlineCitation")
+    if medline is None:
+        return {}
+    citation = _children(medline)
+    body = citation.get("Article")
+    fields = _children(body) if body is not None else {}
+
+    # 作者
+    authors = []
+    author_list = fields.get("AuthorList")
+    if author_list is not None:
+        for author in author_list:
+            if author.tag != "Author":
+                continue
+            name = _children(author)
+            last_name = _text(name, "LastName")
+            if not last_name:
+                continue
+            first_name = _text(name, "ForeName")
+            authors.append(f"{last_name}, {first_name}" if first_name else last_name)
+
+    # 期刊、年份、卷期
+    journal_title = volume = issue = None
+    year = None
+    journal = fields.get("Journal")
+    if journal is not None:
+        journal_fields = _children(journal)
+        journal_title = _text(journal_fields, "Title")
+        journal_issue = journal_fields.get("JournalIssue")
+        if journal_issue is not None:
+            issue_fields = _children(journal_issue)
+            volume = _text(issue_fields, "Volume")
+            issue = _text(issue_fields, "Issue")
+            pub_date = issue_fields.get("PubDate")
+            year_text = _text(_children(pub_date), "Year") if pub_date is not None else None
+            if year_text:
+                try:
+                    year = int(year_text)
+                except ValueError:
+                    pass
+
+    # 页码
+    pages = None
+    pagination = fields.get("Pagination")
+    if pagination is not None:
+        page_fields = _children(pagination)
+        start_page = _text(page_fields, "StartPage")
+        if start_page:
+            end_page = _text(page_fields, "EndPage")
+            pages = f"{start_page}-{end_page}" if end_page else start_page
+
+    # DOI：先查 Article/ELocationID，再查 PubmedData/ArticleIdList（PubMed的实际位置）
+    doi = None
+    if body is not None:
+        for child in body:
+            if child.tag == "ELocationID" and child.get("EIdType") == "doi":
+                doi = child.text
+                break
+    pubmed_data = top.get("PubmedData")
+    if doi is None and pubmed_data is not None:
+        id_list = _children(pubmed_data).get("ArticleIdList")
+        for article_id in id_list if id_list is not None else ():
+            if article_id.get("IdType") == "doi":
+                doi = article_id.text
+                break
+
+    abstract = fields.get("Abstract")
+    return {
+        "pmid": _text(citation, "PMID"),
+        "title": _text(fields, "ArticleTitle"),
+        "authors": authors,
+        "journal": journal_title,
+        "year": year,
+        "volume": volume,
+        "issue": issue,
+        "pages": pages,
+        "doi": doi,
+        "abstract": _text(_children(abstract), "AbstractText") if abstract is not None else None
+    }
+
+
+def _iterparse_lxml(source: Union[str, IO[bytes]]) -> Iterator[Any]:
+    # 不加载DTD、不解析外部实体（efetch 响应带有指向NCBI的DOCTYPE）
+    context = _lxml_etree.iterparse(
+        source, events=("end",), tag=_RECORD_TAGS,
+        load_dtd=False, no_network=True, resolve_entities=False, huge_tree=True
+    )
+    for _, elem in context:
+        yield elem
+        # 清空当前记录，并从父元素上移除之前的兄弟元素（lxml 不会自动释放）
+        elem.clear(keep_tail=False)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+def _iterparse_stdlib(source: Union[str, IO[bytes]]) -> Iterator[Any]:
+    context = ET.iterparse(source, events=("start", "end"))
+    root = None
+    for event, elem in context:
+        if root is None and event == "start":
+            root = elem
+        if event != "end" or elem.tag not in _RECORD_TAGS:
+            continue
+        yield elem
+        # 处理完的记录从根元素上移除
+        elem.clear()
+        if root is not None:
+            root.clear()
+
+
+def iter_pubmed_xml(source: Union[str, bytes, IO[bytes]]) -> Iterator[Tuple[str, Any]]:
+    """流式读取 PubMed XML（efetch 响应、年度基线或每日更新文件）
+
+    source 可以是文件路径、二进制文件对象或响应内容（bytes，不先解码为字符串）。
+    依次产生 ("article", PubmedArticle元素) 和 ("delete", [PMID, ...])（更新文件中的 DeleteCitation）。
+    元素在调用方处理完、生成器继续时即被清空，内存占用与文件大小无关。格式错误时抛出 XML_ERRORS 中的异常。
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elements = _iterparse_lxml(source) if USE_LXML else _iterparse_stdlib(source)
+    for elem in elements:
+        if elem.tag == "PubmedArticle":
+            yield "article", elem
+        else:
+            pmids: List[str] = [p.text for p in elem.iterfind("PMID") if p.text]
+            yield "delete", pmids
+
+
+def iter_articles(source: Union[str, bytes, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+    """逐篇产生文章记录（extract_article 的结果），忽略删除记录"""
+    for kind, payload in iter_pubmed_xml(source):
+        if kind == "article":
+            article = extract_article(payload)
+            if article:
+                yield article
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+
+
+class AsyncRateLimiter:
+    """异步速率限制器（按固定间隔发放请求配额）
+
+    同一进程内所有检索共享一个实例，保证对上游（如NCBI E-utilities）的总请求速率不超过限制。
+    只在事件循环线程中使用，读取和更新下一个可用时间点之间没有 await，因此不需要加锁，
+    也不绑定到特定的事件循环。
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.rate_per_second = rate_per_second
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        """等待下一个可用配额"""
+        if self._interval <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class SharedRateLimiter:
+    """跨进程共享的速率限制器
+
+    多个工作进程通过同一个SQLite数据库协调下一个可用时间点（墙上时间），
+    保证所有进程对上游的总请求速率不超过限制。预约时间点在线程中完成，不阻塞事件循环。
+    """
+
+    def __init__(self, rate_per_second: float, db_path: str, name: str = "ncbi"):
+        self.rate_per_second = rate_per_second
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self.db_path = db_path
+        self.name = name
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, next_slot REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # fork 出的子进程不能复用父进程的连接
+        if conn is None or self._local.pid != os.getpid():
+            # isolation_level=None：由 _reserve 显式控制事务（BEGIN IMMEDIATE）
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _reserve(self) -> float:
+        """预约下一个可用时间点，返回需要等待的秒数"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT next_slot FROM rate_limits WHERE name = ?", (self.name,)).fetchone()
+            now = time.time()
+            slot = max(now, row[0]) if row else now
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, next_slot) VALUES (?, ?)",
+                (self.name, slot + self._interval)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return slot - now
+
+    async def acquire(self) -> None:
+        """等待下一个可用配额"""
+        if self._interval <= 0:
+            return
+        delay = await asyncio.to_thread(self._reserve)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,148 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import copy
+import logging
+import re
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_DOI_PREFIX = re.compile(r"^(?:https?://)?(?:dx\.)?(?:doi\.org/)?(?:doi:\s*)?", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def _text(value: Any) -> str:
+    """全角转半角、统一大小写、去除空白和标点"""
+    if value is None:
+        return ""
+    return _NON_WORD.sub("", unicodedata.normalize("NFKC", str(value)).casefold())
+
+
+def _identity(keywords: Dict[str, Any]) -> Tuple[str, str]:
+    doi = _DOI_PREFIX.sub("", unicodedata.normalize("NFKC", str(keywords.get("doi") or "")).strip()).casefold()
+    pmid = "".join(ch for ch in str(keywords.get("pmid") or "") if ch.isdigit())
+    return doi, pmid
+
+
+def _first_author(keywords: Dict[str, Any]) -> str:
+    """第一作者的姓（"Smith J"、"Smith, J." -> smith；中文姓名取整个姓名）"""
+    authors = keywords.get("authors") or []
+    if isinstance(authors, str):
+        authors = [authors]
+    if not authors:
+        return ""
+    name = unicodedata.normalize("NFKC", str(authors[0])).strip()
+    return _text(re.split(r"[,\s]+", name, maxsplit=1)[0])
+
+
+def reference_fingerprints(keywords: Dict[str, Any]) -> List[str]:
+    """参考文献的指纹：DOI、PMID，以及规范化标题 + 第一作者 + 年份
+
+    任一指纹相同（且DOI/PMID不冲突）的参考文献视为同一篇文献。标题指纹要求标题和
+    第一作者、年份至少之一，避免"Editorial"之类的短标题误合并。
+    """
+    doi, pmid = _identity(keywords)
+    fingerprints = []
+    if doi:
+        fingerprints.append(f"doi:{doi}")
+    if pmid:
+        fingerprints.append(f"pmid:{pmid}")
+    title = _text(keywords.get("title"))
+    author = _first_author(keywords)
+    year = _text(keywords.get("year"))
+    if title and (author or year):
+        fingerprints.append(f"work:{title}|{author}|{year}")
+    return fingerprints
+
+
+def _conflicts(a: Tuple[str, str], b: Tuple[str, str]) -> bool:
+    """两条参考文献的DOI或PMID都存在且不同"""
+    return any(x and y and x != y for x, y in zip(a, b))
+
+
+class DuplicateResolver:
+    """一批参考文献内的重复检测与共享检索
+
+    register() 按 reference_fingerprints 把参考文献归入重复组，每组以第一条登记的参考文献为准；
+    resolve() 只为每组的第一条执行检索，组内其他参考文献等待其结果（文章副本），
+    上游请求数与不同文献数成正比，而不是参考文献条数。参考文献可以先全部登记（拆分/批量检索，
+    结果确定），也可以在 resolve() 时登记（校验流水线，关键词提取完成的先后决定每组的第一条）。
+    """
+
+    def __init__(self):
+        # 指纹 -> 所属组的第一条参考文献
+        self._index: Dict[str, str] = {}
+        # 每组第一条参考文献的DOI/PMID
+        self._identities: Dict[str, Tuple[str, str]] = {}
+        # 参考文献 -> 所属组的第一条参考文献（自身为第一条时为 None）
+        self._duplicate_of: Dict[str, Optional[str]] = {}
+        # 每组第一条参考文献的检索结果
+        self._results: Dict[str, asyncio.Future] = {}
+        self._started: Set[str] = set()
+
+    def register(self, reference_id: str, keywords: Dict[str, Any]) -> Optional[str]:
+        """登记一条参考文献，返回与其重复的（组内第一条）参考文献ID，不重复时返回 None"""
+        if reference_id in self._duplicate_of:
+            return self._duplicate_of[reference_id]
+        fingerprints = reference_fingerprints(keywords)
+        identity = _identity(keywords)
+        canonical = None
+        for fingerprint in fingerprints:
+            candidate = self._index.get(fingerprint)
+            if candidate is not None and not _conflicts(identity, self._identities[candidate]):
+                canonical = candidate
+                break
+        if canonical is None:
+            self._identities[reference_id] = identity
+        else:
+            # 补充组内第一条缺少的DOI/PMID，之后只有这些标识的参考文献也能归入该组
+            doi, pmid = self._identities[canonical]
+            self._identities[canonical] = (doi or identity[0], pmid or identity[1])
+            logger.info("参考文献 %s 与 %s 重复", reference_id, canonical)
+        for fingerprint in fingerprints:
+            self._index.setdefault(fingerprint, canonical or reference_id)
+        self._duplicate_of[reference_id] = canonical
+        return canonical
+
+    def duplicate_of(self, reference_id: str) -> Optional[str]:
+        return self._duplicate_of.get(reference_id)
+
+    @property
+    def duplicates(self) -> Dict[str, str]:
+        """重复的参考文献 -> 组内第一条参考文献"""
+        return {ref_id: canonical for ref_id, canonical in self._duplicate_of.items() if canonical is not None}
+
+    def _future(self, reference_id: str) -> asyncio.Future:
+        if reference_id not in self._results:
+            self._results[reference_id] = asyncio.get_running_loop().create_future()
+        return self._results[reference_id]
+
+    async def resolve(self, reference_id: str, keywords: Dict[str, Any],
+                      search: Callable[[], Awaitable[List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+        """检索一条参考文献（search 为实际的检索），重复的参考文献使用组内第一条的结果"""
+        canonical = self.register(reference_id, keywords)
+        if canonical is None and reference_id in self._started:
+            # 同一ID重复提交时使用已开始的检索
+            canonical = reference_id
+        if canonical is not None:
+            # 组内第一条被取消时一起取消；本条被取消时不影响第一条
+            articles = await asyncio.shield(self._future(canonical))
+            # 字段差异由调用方按本条的关键词生成
+            return [{k: v for k, v in copy.deepcopy(article).items() if k != "_differences"}
+                    for article in articles]
+
+        future = self._future(reference_id)
+        self._started.add(reference_id)
+        try:
+            articles = await search()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有重复的参考文献等待时不记录"未获取的异常"
+            future.exception()
+            raise
+        # 调用方构建响应时会移除文章的内部字段，组内其他参考文献使用副本
+        future.set_result(copy.deepcopy(articles))
+        return articles
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+
+from app.services.cache_backend import CacheBackend
+from app.services.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# 检索结果缓存时间（秒），0 表示不缓存
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", "604800"))
+# 未找到匹配文章的结果的缓存时间（秒，上游暂时出错时也可能没有结果，因此较短），0 表示不缓存
+RESULT_CACHE_NEGATIVE_TTL = int(os.getenv("RESULT_CACHE_NEGATIVE_TTL", "3600"))
+
+_FINGERPRINT_FIELDS = ("title", "authors", "journal", "year", "volume", "issue", "pages", "pmid", "doi")
+# 匹配模式的所有组合（智能匹配启用时忽略语义重排序）
+_MODES = ((False, False), (False, True), (True, False))
+
+
+def _normalize(value: Any) -> Any:
+    """全角转半角、统一大小写、合并空白"""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    text = " ".join(unicodedata.normalize("NFKC", str(value)).casefold().split())
+    return text or None
+
+
+def keywords_fingerprint(keywords: Dict[str, Any], use_smart_matching: bool = False,
+                         use_semantic_matching: bool = False) -> str:
+    """检索条件的指纹：规范化后的关键词字段和匹配模式，只有大小写、全半角、空白不同的关键词指纹相同"""
+    data = {field: _normalize(keywords.get(field)) for field in _FINGERPRINT_FIELDS}
+    data["smart"] = bool(use_smart_matching)
+    data["semantic"] = bool(use_semantic_matching) and not use_smart_matching
+    serialized = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """参考文献级检索结果缓存
+
+    按关键词指纹（keywords_fingerprint）缓存 search_articles 的最终结果：按顺序保存返回文章的
+    PMID、相似度和匹配类型，文章内容由文章存储提供。同一篇文献被不同稿件重复引用时，
+    不再执行整个检索流程（包括大模型评估）。存放在缓存后端的 search_result 命名空间，
+    CACHE_BACKEND=sqlite 时各工作进程共享（方法都是协程，SQLite后端在线程中读写）。
+    """
+
+    namespace = "search_result"
+
+    def __init__(self, cache: CacheBackend, ttl: float = RESULT_CACHE_TTL,
+                 negative_ttl: float = RESULT_CACHE_NEGATIVE_TTL):
+        self.cache = cache
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+    async def get(self, keywords: Dict[str, Any], use_smart_matching: bool = False,
+            use_semantic_matching: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """返回缓存的结果 [{"pmid", "score", "match_type"}, ...]（可能为空列表），未缓存时返回 None"""
+        if self.ttl <= 0:
+            return None
+        entries = await self.cache.aget(self.namespace, keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching))
+        record_cache(self.namespace, entries is not None)
+        return entries
+
+    async def contains(self, keywords: Dict[str, Any], use_smart_matching: bool = False,
+                 use_semantic_matching: bool = False) -> bool:
+        if self.ttl <= 0:
+            return False
+        key = keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching)
+        return await self.cache.aget(self.namespace, key) is not None
+
+    async def put(self, keywords: Dict[str, Any], use_smart_matching: bool, use_semantic_matching: bool,
+            articles: List[Dict[str, Any]]) -> None:
+        """缓存检索结果（文章须带有 pmid）"""
+        ttl = self.ttl if articles else self.negative_ttl
+        if self.ttl <= 0 or ttl <= 0 or any(not article.get("pmid") for article in articles):
+            return
+        entries = []
+        for article in articles:
+            score = article.get("_similarity_score")
+            entries.append({
+                "pmid": article["pmid"],
+                "score": float(score) if score is not None else None,
+                "match_type": article.get("_match_type"),
+            })
+        key = keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching)
+        await self.cache.aset(self.namespace, key, entries, ttl=ttl)
+
+    async def invalidate(self, keywords: Dict[str, Any]) -> int:
+        """删除一条参考文献在所有匹配模式下的缓存结果，返回删除的条数"""
+        removed = 0
+        for use_smart_matching, use_semantic_matching in _MODES:
+            key = keywords_fingerprint(keywords, use_smart_matching, use_semantic_matching)
+            if await self.cache.aget(self.namespace, key) is not None:
+                await self.cache.adelete(self.namespace, key)
+                removed += 1
+        return removed
+
+    async def clear(self) -> None:
+        await self.cache.aclear(self.namespace)
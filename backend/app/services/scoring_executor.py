@@ -0,0 +1,154 @@
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
+import logging
+import os
+import threading
+
+from app.services.literature_backend import SEARCH_LIMIT
+from app.services.metrics import timed_stage
+from app.services import tracing
+
+logger = logging.getLogger(__name__)
+
+# 进程池大小（0表示禁用进程池，全部在事件循环内计算）
+SCORING_POOL_SIZE = int(os.getenv("SCORING_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+# 候选文章数超过该阈值时才交给进程池（小批量进程间通信开销大于收益）。默认为每个检索策略一批候选文章上限的一半：
+# 检索返回的一批候选文章交给进程池，本地存储的近似标题（最多5篇）等小批量在事件循环内计算
+# （见 benchmarks/run_scoring.py）
+SCORING_OFFLOAD_THRESHOLD = int(os.getenv("SCORING_OFFLOAD_THRESHOLD", str(SEARCH_LIMIT // 2)))
+
+# 紧凑记录的字段顺序（元组比字典序列化体积更小）
+RECORD_FIELDS = ("title", "authors", "journal", "year", "volume", "issue", "pages", "pmid", "doi", "abstract")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+# 工作进程内的相似度服务（每个进程只创建一次）
+_worker_similarity_service = None
+
+
+def _to_record(candidate: Dict[str, Any]) -> tuple:
+    """将候选文章转换为紧凑记录"""
+    record = []
+    for field in RECORD_FIELDS:
+        value = candidate.get(field)
+        if field == "authors" and value is not None:
+            value = tuple(value)
+        record.append(value)
+    return tuple(record)
+
+
+def _from_record(record: tuple) -> Dict[str, Any]:
+    """将紧凑记录还原为候选文章字典（只保留有值的摘要字段）"""
+    candidate = dict(zip(RECORD_FIELDS, record))
+    if candidate["authors"] is not None:
+        candidate["authors"] = list(candidate["authors"])
+    if candidate["abstract"] is None:
+        del candidate["abstract"]
+    return candidate
+
+
+def _init_worker() -> None:
+    """工作进程初始化：创建相似度服务"""
+    global _worker_similarity_service
+    from app.services.similarity_service import SimilarityService
+    _worker_similarity_service = SimilarityService()
+
+
+def _score_records(
+    original: Dict[str, Any],
+    records: List[tuple],
+    exclude_doi_pmid: bool,
+    use_semantic_matching: bool,
+    diff_original: Optional[Dict[str, Any]] = None
+) -> List[Tuple[float, int, Optional[Dict[str, Any]]]]:
+    """在工作进程中计算相似度（以及字段差异）
+
+    Returns:
+        [(相似度分数, 候选索引, 字段差异), ...] 按相似度降序排序
+    """
+    if _worker_similarity_service is None:
+        _init_worker()
+    candidates = [_from_record(record) for record in records]
+    # 记录原始索引，避免回传完整的文章数据
+    for idx, candidate in enumerate(candidates):
+        candidate["_index"] = idx
+    scored = _worker_similarity_service.calculate_similarity_batch(
+        original, candidates, use_smart_matching=False,
+        exclude_doi_pmid=exclude_doi_pmid, use_semantic_matching=use_semantic_matching,
+        diff_original=diff_original
+    )
+    return [(score, candidate["_index"], candidate.get("_differences")) for score, candidate in scored]
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    """获取常驻进程池（首次使用时创建）"""
+    global _pool
+    if SCORING_POOL_SIZE <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                logger.info("创建相似度计算进程池: %s 个进程", SCORING_POOL_SIZE)
+                _pool = ProcessPoolExecutor(max_workers=SCORING_POOL_SIZE, initializer=_init_worker)
+    return _pool
+
+
+def shutdown_scoring_pool() -> None:
+    """关闭进程池（应用关闭时调用）"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+@timed_stage("score_batch")
+async def score_batch(
+    similarity_service,
+    original: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+    exclude_doi_pmid: bool = False,
+    use_semantic_matching: bool = False,
+    diff_original: Optional[Dict[str, Any]] = None
+) -> List[tuple]:
+    """批量计算相似度（传统方法/本地语义重排序），大批量交给进程池
+
+    小批量直接在当前线程计算；超过 SCORING_OFFLOAD_THRESHOLD 时序列化为紧凑记录，
+    提交到常驻进程池，事件循环在计算期间可以继续处理其他请求。
+    提供 diff_original 时同时生成字段差异（写入候选文章的 "_differences"）。
+
+    Returns:
+        List[tuple]: [(相似度分数, 文章信息), ...] 按相似度降序排序
+    """
+    pool = _get_pool() if len(candidates) > SCORING_OFFLOAD_THRESHOLD else None
+    tracing.annotate(candidates=len(candidates), offloaded=pool is not None)
+    if pool is None:
+        return similarity_service.calculate_similarity_batch(
+            original, candidates, use_smart_matching=False,
+            exclude_doi_pmid=exclude_doi_pmid, use_semantic_matching=use_semantic_matching,
+            diff_original=diff_original
+        )
+
+    logger.info("候选文章数 %s 超过阈值 %s，交给进程池计算", len(candidates), SCORING_OFFLOAD_THRESHOLD)
+    records = [_to_record(candidate) for candidate in candidates]
+    loop = asyncio.get_running_loop()
+    try:
+        scored = await loop.run_in_executor(
+            pool, _score_records, original, records, exclude_doi_pmid, use_semantic_matching, diff_original
+        )
+    except Exception as e:
+        logger.error("进程池计算失败，回退到事件循环内计算: %s", str(e), exc_info=True)
+        return similarity_service.calculate_similarity_batch(
+            original, candidates, use_smart_matching=False,
+            exclude_doi_pmid=exclude_doi_pmid, use_semantic_matching=use_semantic_matching,
+            diff_original=diff_original
+        )
+    results = []
+    for score, idx, differences in scored:
+        candidate = candidates[idx]
+        if differences is not None:
+            candidate["_differences"] = differences
+        results.append((score, candidate))
+    return results
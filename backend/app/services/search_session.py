@@ -0,0 +1,88 @@
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+import os
+
+from app.services.cache_backend import CacheBackend, MemoryCacheBackend
+
+# 增量检索状态的保存时间（秒），0 表示不保存（不支持增量检索）
+SEARCH_SESSION_TTL = int(os.getenv("SEARCH_SESSION_TTL", "3600"))
+# 最多保存的会话数（超过时淘汰最早的会话）
+SEARCH_SESSION_MAX = int(os.getenv("SEARCH_SESSION_MAX", "10000"))
+
+_current_session: ContextVar[Optional["SearchSession"]] = ContextVar("search_session", default=None)
+
+
+class SearchSession:
+    """一条参考文献的检索状态（增量检索）
+
+    记录一次检索执行过的检索条件（SearchQuery.key() -> PMID列表）、DOI解析结果和获取过的全部候选PMID。
+    用户修改个别字段后再次检索时，以上次的状态创建会话：上次的候选文章按新的关键词重新评分，
+    检索条件没有变化的策略直接使用上次的PMID列表（这些文章已在重新评分时处理），只有条件变化的策略访问文献来源。
+    """
+
+    def __init__(self, previous: Optional[Dict[str, Any]] = None):
+        previous = previous or {}
+        self.previous_queries: Dict[str, List[str]] = previous.get("queries") or {}
+        self.previous_dois: Dict[str, Optional[str]] = previous.get("dois") or {}
+        self.previous_seen: List[str] = previous.get("seen") or []
+        # 本次检索的状态（pool 为本次检索的候选池，执行检索流程时设置）
+        self.queries: Dict[str, List[str]] = {}
+        self.dois: Dict[str, Optional[str]] = {}
+        self.pool = None
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.previous_seen or self.previous_queries)
+
+    def rescore_pmids(self) -> List[str]:
+        """需要重新评分的上次候选文章（不含上次通过DOI找到的文章，DOI检索会按匹配类型重新处理）"""
+        doi_pmids = {pmid for pmid in self.previous_dois.values() if pmid}
+        return [pmid for pmid in self.previous_seen if pmid not in doi_pmids]
+
+    def to_dict(self) -> Dict[str, Any]:
+        seen = self.pool.seen_pmids() if self.pool is not None else []
+        return {"queries": self.queries, "dois": self.dois, "seen": seen}
+
+
+class SearchSessionStore:
+    """增量检索会话的存储（search_session 命名空间，最多 max_sessions 个会话）
+
+    进程内缓存时使用独立的LRU，会话不挤占文章、查询和大模型缓存；共享缓存时写入共享后端
+    （多个工作进程都能继续同一会话），每写入 TRIM_INTERVAL 次删除超出上限的最早的会话。
+    """
+
+    NAMESPACE = "search_session"
+    TRIM_INTERVAL = 100
+
+    def __init__(self, cache: CacheBackend, max_sessions: int = SEARCH_SESSION_MAX, ttl: float = SEARCH_SESSION_TTL):
+        self.cache = cache if cache.shared else MemoryCacheBackend(max_sessions)
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._writes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_sessions > 0
+
+    async def load(self, session_id: str) -> SearchSession:
+        """按会话ID创建本次检索的会话（会话不存在或已过期时为完整检索）"""
+        return SearchSession(await self.cache.aget(self.NAMESPACE, session_id))
+
+    async def save(self, session_id: str, session: SearchSession) -> None:
+        await self.cache.aset(self.NAMESPACE, session_id, session.to_dict(), ttl=self.ttl)
+        self._writes += 1
+        if self.cache.shared and self._writes % self.TRIM_INTERVAL == 0:
+            await self.cache.atrim(self.NAMESPACE, self.max_sessions)
+
+
+def current() -> Optional[SearchSession]:
+    """当前检索的会话（未启用增量检索时为 None）"""
+    return _current_session.get()
+
+
+def activate(session: SearchSession) -> Token:
+    return _current_session.set(session)
+
+
+def deactivate(token: Token) -> None:
+    _current_session.reset(token)
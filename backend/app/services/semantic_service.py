@@ -0,0 +1,259 @@
+from typing import Dict, Any, List, Optional, Tuple
+import json
+import logging
+import os
+import re
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 可学习字段权重文件（由 fit_weights/save_weights 生成），未配置时使用默认权重
+SEMANTIC_WEIGHTS_PATH = os.getenv("SEMANTIC_WEIGHTS_PATH", "")
+
+# 标题与摘要的余弦相似度天然偏低，超过该值即视为完全相关
+ABSTRACT_COSINE_SATURATION = 0.35
+
+
+class SemanticRerankService:
+    """本地语义重排序服务
+
+    使用哈希向量化（字符3-gram + 词）对标题和摘要编码，结合字段权重，
+    用 NumPy 批量计算候选文章得分。完全在CPU上运行，无需调用大模型。
+    """
+
+    # 特征顺序（与权重向量一一对应）
+    FEATURES = [
+        "doi", "pmid", "title", "title_semantic", "abstract_semantic",
+        "authors", "journal", "year", "volume", "issue"
+    ]
+
+    DEFAULT_WEIGHTS = {
+        "doi": 0.3,
+        "pmid": 0.25,
+        "title": 0.1,
+        "title_semantic": 0.1,
+        "abstract_semantic": 0.03,
+        "authors": 0.15,
+        "journal": 0.05,
+        "year": 0.03,
+        "volume": 0.01,
+        "issue": 0.01,
+    }
+
+    def __init__(self, similarity_service, n_features: int = 4096, weights_path: Optional[str] = None):
+        """
+        Args:
+            similarity_service: SimilarityService 实例，复用其字段相似度计算
+            n_features: 哈希向量维度
+            weights_path: 权重文件路径（JSON），默认读取 SEMANTIC_WEIGHTS_PATH
+        """
+        self.similarity_service = similarity_service
+        self.n_features = n_features
+        self.weights = dict(self.DEFAULT_WEIGHTS)
+        weights_path = weights_path if weights_path is not None else SEMANTIC_WEIGHTS_PATH
+        if weights_path:
+            self.load_weights(weights_path)
+
+    def load_weights(self, path: str) -> None:
+        """从JSON文件加载字段权重"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            weights = data.get("weights", data)
+            for name in self.FEATURES:
+                if name in weights:
+                    self.weights[name] = max(0.0, float(weights[name]))
+            logger.info("已加载语义重排序权重: %s", path)
+        except Exception as e:
+            logger.error("加载语义重排序权重失败，使用默认权重: %s", str(e))
+
+    def save_weights(self, path: str) -> None:
+        """保存字段权重到JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"weights": self.weights}, f, ensure_ascii=False, indent=2)
+
+    def _tokens(self, text: str) -> List[str]:
+        """将文本切分为词和字符3-gram"""
+        words = re.findall(r"\w+", text.lower())
+        tokens = [f"w:{w}" for w in words]
+        for w in words:
+            padded = f"#{w}#"
+            tokens.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return tokens
+
+    def _hash_vectorize(self, texts: List[Optional[str]]) -> np.ndarray:
+        """哈希向量化，返回L2归一化的矩阵 (len(texts), n_features)
+
+        使用 crc32 而不是内置 hash，保证跨进程结果一致。
+        """
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            if not text:
+                continue
+            for token in self._tokens(text):
+                h = zlib.crc32(token.encode("utf-8"))
+                # 用哈希最高位决定符号，降低冲突带来的偏差
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.n_features] += sign
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _feature_matrix(
+        self,
+        original: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        exclude_doi_pmid: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """构建特征矩阵
+
+        Returns:
+            (values, mask): 两个 (len(candidates), len(FEATURES)) 矩阵，
+            mask 为1表示该字段在原始文献和候选文章中都存在、参与评分
+        """
+        n = len(candidates)
+        values = np.zeros((n, len(self.FEATURES)), dtype=np.float32)
+        mask = np.zeros((n, len(self.FEATURES)), dtype=np.float32)
+        col = {name: idx for idx, name in enumerate(self.FEATURES)}
+        sim = self.similarity_service
+
+        # 语义特征：一次性向量化所有候选的标题和摘要
+        orig_title = original.get("title")
+        if orig_title:
+            orig_vec = self._hash_vectorize([orig_title])[0]
+            title_vecs = self._hash_vectorize([c.get("title") for c in candidates])
+            abstract_vecs = self._hash_vectorize([c.get("abstract") for c in candidates])
+            title_cos = np.clip(title_vecs @ orig_vec, 0.0, 1.0)
+            abstract_cos = np.clip(abstract_vecs @ orig_vec / ABSTRACT_COSINE_SATURATION, 0.0, 1.0)
+            for row, candidate in enumerate(candidates):
+                if candidate.get("title"):
+                    values[row, col["title_semantic"]] = title_cos[row]
+                    mask[row, col["title_semantic"]] = 1.0
+                if candidate.get("abstract"):
+                    values[row, col["abstract_semantic"]] = abstract_cos[row]
+                    mask[row, col["abstract_semantic"]] = 1.0
+
+        for row, candidate in enumerate(candidates):
+            if not exclude_doi_pmid:
+                if original.get("doi") and candidate.get("doi"):
+                    same = original["doi"].lower().strip() == candidate["doi"].lower().strip()
+                    values[row, col["doi"]] = 1.0 if same else 0.0
+                    mask[row, col["doi"]] = 1.0
+                if original.get("pmid") and candidate.get("pmid"):
+                    same = str(original["pmid"]).strip() == str(candidate["pmid"]).strip()
+                    values[row, col["pmid"]] = 1.0 if same else 0.0
+                    mask[row, col["pmid"]] = 1.0
+
+            if orig_title and candidate.get("title"):
+                values[row, col["title"]] = sim._text_similarity(orig_title, candidate["title"])
+                mask[row, col["title"]] = 1.0
+
+            if original.get("authors") and candidate.get("authors"):
+                values[row, col["authors"]] = sim._authors_similarity(original["authors"], candidate["authors"])
+                mask[row, col["authors"]] = 1.0
+
+            if original.get("journal") and candidate.get("journal"):
+                values[row, col["journal"]] = sim._text_similarity(original["journal"], candidate["journal"])
+                mask[row, col["journal"]] = 1.0
+
+            if original.get("year") and candidate.get("year"):
+                values[row, col["year"]] = 1.0 if original["year"] == candidate["year"] else 0.0
+                mask[row, col["year"]] = 1.0
+
+            for field in ("volume", "issue"):
+                if original.get(field) and candidate.get(field):
+                    same = str(original[field]).strip() == str(candidate[field]).strip()
+                    values[row, col[field]] = 1.0 if same else 0.0
+                    mask[row, col[field]] = 1.0
+
+        return values, mask
+
+    def _weight_vector(self) -> np.ndarray:
+        return np.array([self.weights[name] for name in self.FEATURES], dtype=np.float32)
+
+    def rerank(
+        self,
+        original: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        exclude_doi_pmid: bool = False
+    ) -> List[tuple]:
+        """对候选文章评分并重排序
+
+        得分为参与评分字段的加权平均，与传统方法的取值范围一致，
+        因此可以直接使用现有的 0.9/0.5 分类阈值。
+
+        Returns:
+            List[tuple]: [(相似度分数, 文章信息), ...] 按相似度降序排序
+        """
+        if not candidates:
+            return []
+
+        values, mask = self._feature_matrix(original, candidates, exclude_doi_pmid=exclude_doi_pmid)
+        weights = self._weight_vector()
+        weighted_mask = mask * weights
+        total_weight = weighted_mask.sum(axis=1)
+        total_score = (values * weighted_mask).sum(axis=1)
+        scores = np.divide(total_score, total_weight, out=np.zeros_like(total_score), where=total_weight > 0)
+
+        scored_results = [(float(score), candidate) for score, candidate in zip(scores, candidates)]
+        scored_results.sort(key=lambda x: x[0], reverse=True)
+        logger.info("语义重排序完成，共评估 %s 篇文章", len(scored_results))
+        return scored_results
+
+    def fit_weights(
+        self,
+        samples: List[Tuple[Dict[str, Any], Dict[str, Any], float]],
+        epochs: int = 500,
+        learning_rate: float = 0.5,
+        regularization: float = 0.0
+    ) -> Dict[str, float]:
+        """根据标注样本学习字段权重（训练入口见 benchmarks/fit_weights.py）
+
+        Args:
+            samples: [(原始参考文献关键词, 候选文章, 标签), ...]，标签为1.0（同一篇）或0.0（不同文章）
+            epochs: 梯度下降迭代次数
+            learning_rate: 学习率
+            regularization: 权重偏离初始权重的惩罚系数。样本中恰好能完全区分正负样本的字段
+                （如合成语料中的卷号）不会因此独占全部权重
+
+        Returns:
+            学习后的权重（同时更新到当前实例）
+        """
+        if not samples:
+            return dict(self.weights)
+
+        rows_values = []
+        rows_mask = []
+        labels = []
+        for original, candidate, label in samples:
+            values, mask = self._feature_matrix(original, [candidate])
+            rows_values.append(values[0])
+            rows_mask.append(mask[0])
+            labels.append(float(label))
+        values = np.stack(rows_values)
+        mask = np.stack(rows_mask)
+        y = np.array(labels, dtype=np.float32)
+
+        w = self._weight_vector().astype(np.float64)
+        w = w / max(w.sum(), 1e-9)
+        prior = w.copy()
+        for _ in range(epochs):
+            # 预测值 = sum(w*m*v) / sum(w*m)，最小化均方误差，权重投影到非负
+            wm = mask * w
+            denom = np.maximum(wm.sum(axis=1), 1e-9)
+            numer = (wm * values).sum(axis=1)
+            pred = numer / denom
+            err = pred - y
+            # d pred / d w_j = m_j * (v_j - pred) / denom
+            grad = ((err / denom)[:, None] * mask * (values - pred[:, None])).mean(axis=0)
+            grad += regularization * (w - prior)
+            w = np.maximum(w - learning_rate * grad, 0.0)
+            total = w.sum()
+            if total > 0:
+                w = w / total
+
+        self.weights = {name: float(w[idx]) for idx, name in enumerate(self.FEATURES)}
+        logger.info("语义重排序权重学习完成: %s", self.weights)
+        return dict(self.weights)
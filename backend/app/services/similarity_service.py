@@ -1,6 +1,9 @@
 from typing import Dict, Any, List, Optional
 from difflib import SequenceMatcher
 import logging
+import re
+from app.services.metrics import timed_stage
+from app.logging_config import sampled_debug
 
 logger = logging.getLogger(__name__)
 
@@ -21,24 +24,66 @@ class SimilarityService:
             "issue": 0.01,
             "pages": 0.0
         }
+        # 本地语义重排序服务（延迟创建）
+        self._semantic_service = None
     
+    def _get_semantic_service(self):
+        """获取本地语义重排序服务（延迟导入，避免未使用时加载NumPy）"""
+        if self._semantic_service is None:
+            from app.services.semantic_service import SemanticRerankService
+            self._semantic_service = SemanticRerankService(self)
+        return self._semantic_service
+    
+    @timed_stage("calculate_similarity_batch")
     def calculate_similarity_batch(
         self, 
         original: Dict[str, Any], 
         candidates: List[Dict[str, Any]],
         use_smart_matching: bool = False,
-        exclude_doi_pmid: bool = False
+        exclude_doi_pmid: bool = False,
+        use_semantic_matching: bool = False,
+        diff_original: Optional[Dict[str, Any]] = None
     ) -> List[tuple]:
-        """批量计算相似度，支持传统方法和智能匹配
+        """批量计算相似度，支持传统方法、智能匹配和本地语义重排序
         
         Args:
             original: 原始参考文献的关键词
             candidates: 候选文章列表
             use_smart_matching: 是否使用大模型智能匹配
+            use_semantic_matching: 是否使用本地语义重排序（智能匹配优先）
+            diff_original: 如果提供，在同一遍计算中生成每篇候选文章与它的字段差异，
+                写入候选文章的 "_differences" 字段（与 find_differences 的结果相同）
         
         Returns:
             List[tuple]: [(相似度分数, 文章信息), ...] 按相似度降序排序
         """
+        if use_smart_matching or use_semantic_matching:
+            scored_results = self._calculate_similarity_batch_model(
+                original, candidates, use_smart_matching, use_semantic_matching, exclude_doi_pmid, diff_original
+            )
+            if diff_original is not None:
+                diff_authors = self._normalize_authors(diff_original.get("authors"))
+                for _, candidate in scored_results:
+                    if "_differences" not in candidate:
+                        candidate["_differences"] = self._find_differences(
+                            diff_original, candidate, diff_authors, self._normalize_authors(candidate.get("authors"))
+                        )
+            return scored_results
+        # 使用传统方法
+        return self._calculate_similarity_batch_traditional(
+            original, candidates, exclude_doi_pmid=exclude_doi_pmid, diff_original=diff_original
+        )
+    
+    def _calculate_similarity_batch_model(
+        self,
+        original: Dict[str, Any],
+        candidates: List[Dict[str, Any]],
+        use_smart_matching: bool,
+        use_semantic_matching: bool,
+        exclude_doi_pmid: bool,
+        diff_original: Optional[Dict[str, Any]]
+    ) -> List[tuple]:
+        """使用大模型或本地语义重排序批量计算相似度，失败时回退到传统方法"""
         if use_smart_matching:
             # 使用大模型评估
             try:
@@ -47,47 +92,74 @@ class SimilarityService:
                 # 默认是检索阶段评估（is_final_evaluation=False）
                 return llm_service.evaluate_similarity_with_llm(original, candidates, is_final_evaluation=False, exclude_doi_pmid=exclude_doi_pmid)
             except Exception as e:
-                logger.error(f"大模型评估失败，回退到传统方法: {str(e)}", exc_info=True)
+                logger.error("大模型评估失败，回退到传统方法: %s", str(e), exc_info=True)
                 # 回退到传统方法
-                return self._calculate_similarity_batch_traditional(original, candidates, exclude_doi_pmid=exclude_doi_pmid)
-        else:
-            # 使用传统方法
-            return self._calculate_similarity_batch_traditional(original, candidates, exclude_doi_pmid=exclude_doi_pmid)
+                return self._calculate_similarity_batch_traditional(
+                    original, candidates, exclude_doi_pmid=exclude_doi_pmid, diff_original=diff_original
+                )
+        # 使用本地语义重排序（纯CPU，无调用成本）
+        try:
+            return self._get_semantic_service().rerank(original, candidates, exclude_doi_pmid=exclude_doi_pmid)
+        except Exception as e:
+            logger.error("语义重排序失败，回退到传统方法: %s", str(e), exc_info=True)
+            return self._calculate_similarity_batch_traditional(
+                original, candidates, exclude_doi_pmid=exclude_doi_pmid, diff_original=diff_original
+            )
     
     def _calculate_similarity_batch_traditional(
         self, 
         original: Dict[str, Any], 
         candidates: List[Dict[str, Any]],
-        exclude_doi_pmid: bool = False
+        exclude_doi_pmid: bool = False,
+        diff_original: Optional[Dict[str, Any]] = None
     ) -> List[tuple]:
-        """使用传统方法批量计算相似度"""
+        """使用传统方法批量计算相似度
+
+        原始文献和每篇候选文章的作者只标准化一次，同时用于相似度计算和差异生成。
+        """
+        original_authors = self._normalize_authors(original.get("authors"))
+        if diff_original is not None:
+            diff_authors = (
+                original_authors if diff_original.get("authors") is original.get("authors")
+                else self._normalize_authors(diff_original.get("authors"))
+            )
+        
         scored_results = []
         for candidate in candidates:
-            similarity = self.calculate_similarity(original, candidate, exclude_doi_pmid=exclude_doi_pmid)
+            candidate_authors = self._normalize_authors(candidate.get("authors"))
+            similarity = self.calculate_similarity(
+                original, candidate, exclude_doi_pmid=exclude_doi_pmid,
+                normalized_authors=(original_authors, candidate_authors)
+            )
+            if diff_original is not None:
+                candidate["_differences"] = self._find_differences(
+                    diff_original, candidate, diff_authors, candidate_authors
+                )
             scored_results.append((similarity, candidate))
         
         # 按相似度降序排序
         scored_results.sort(key=lambda x: x[0], reverse=True)
         return scored_results
     
-    def calculate_similarity(self, original: Dict[str, Any], matched: Dict[str, Any], exclude_doi_pmid: bool = False) -> float:
+    def calculate_similarity(self, original: Dict[str, Any], matched: Dict[str, Any], exclude_doi_pmid: bool = False,
+                             normalized_authors: Optional[tuple] = None) -> float:
         """计算两个参考文献的相似度
         
         Args:
             original: 原始参考文献的关键词
             matched: 匹配文章的关键词
             exclude_doi_pmid: 是否排除DOI/PMID字段（用于后续检索阶段）
+            normalized_authors: 可选，(原始作者, 匹配作者) 的标准化结果，批量计算时复用
         """
-        logger.info("+" * 80)
-        logger.info("开始计算相似度")
-        logger.info(f"原始关键词: {original}")
-        logger.info(f"匹配文章关键词: {matched}")
-        if exclude_doi_pmid:
-            logger.info("  排除DOI/PMID字段，专注于其他字段匹配")
+        # 每个候选文章都会调用，默认不做任何日志格式化；DEBUG级别下按采样率记录评分详情
+        trace = sampled_debug(logger)
+        if trace:
+            logger.debug("开始计算相似度: 原始关键词=%s, 匹配文章关键词=%s, 排除DOI/PMID=%s",
+                         original, matched, exclude_doi_pmid)
         
         total_score = 0.0
         total_weight = 0.0
-        details = []
+        details = [] if trace else None
         
         # DOI完全匹配（但不直接返回，继续计算其他字段以检测冲突）
         if not exclude_doi_pmid:
@@ -97,16 +169,19 @@ class SimilarityService:
                     doi_matched = True
                     total_score += 1.0 * self.weights["doi"]
                     total_weight += self.weights["doi"]
-                    details.append(f"DOI完全匹配 (权重{self.weights['doi']}): 得分1.0")
+                    if trace:
+                        details.append(f"DOI完全匹配 (权重{self.weights['doi']}): 得分1.0")
                 else:
                     # DOI不匹配，相似度降低
                     total_score += 0.0
                     total_weight += self.weights["doi"]
-                    details.append(f"DOI不匹配: {original['doi']} != {matched['doi']}")
+                    if trace:
+                        details.append(f"DOI不匹配: {original['doi']} != {matched['doi']}")
             
             # 如果DOI匹配且没有其他字段，直接返回100%
             if doi_matched and not (original.get("title") or original.get("authors") or original.get("journal")):
-                logger.info(f"  [DOI] 完全匹配且无其他字段，相似度=100%")
+                if trace:
+                    logger.debug("  [DOI] 完全匹配且无其他字段，相似度=100%")
                 return 1.0
             
             # PMID完全匹配
@@ -114,64 +189,77 @@ class SimilarityService:
                 if str(original["pmid"]).strip() == str(matched["pmid"]).strip():
                     total_score += 1.0 * self.weights["pmid"]
                     total_weight += self.weights["pmid"]
-                    details.append(f"PMID匹配 (权重{self.weights['pmid']}): 得分1.0")
+                    if trace:
+                        details.append(f"PMID匹配 (权重{self.weights['pmid']}): 得分1.0")
                 else:
                     total_weight += self.weights["pmid"]
-                    details.append(f"PMID不匹配: {original['pmid']} != {matched['pmid']}")
+                    if trace:
+                        details.append(f"PMID不匹配: {original['pmid']} != {matched['pmid']}")
         
         # 标题相似度
         if original.get("title") and matched.get("title"):
             title_sim = self._text_similarity(original["title"], matched["title"])
             total_score += title_sim * self.weights["title"]
             total_weight += self.weights["title"]
-            details.append(f"标题相似度 (权重{self.weights['title']}): {title_sim:.2f}")
+            if trace:
+                details.append(f"标题相似度 (权重{self.weights['title']}): {title_sim:.2f}")
         
         # 作者相似度
         if original.get("authors") and matched.get("authors"):
-            author_sim = self._authors_similarity(original["authors"], matched["authors"])
+            if normalized_authors is not None:
+                author_sim = self._normalized_authors_similarity(*normalized_authors)
+            else:
+                author_sim = self._authors_similarity(original["authors"], matched["authors"])
             total_score += author_sim * self.weights["authors"]
             total_weight += self.weights["authors"]
-            details.append(f"作者相似度 (权重{self.weights['authors']}): {author_sim:.2f}")
+            if trace:
+                details.append(f"作者相似度 (权重{self.weights['authors']}): {author_sim:.2f}")
         
         # 期刊相似度
         if original.get("journal") and matched.get("journal"):
             journal_sim = self._text_similarity(original["journal"], matched["journal"])
             total_score += journal_sim * self.weights["journal"]
             total_weight += self.weights["journal"]
-            details.append(f"期刊相似度 (权重{self.weights['journal']}): {journal_sim:.2f}")
+            if trace:
+                details.append(f"期刊相似度 (权重{self.weights['journal']}): {journal_sim:.2f}")
         
         # 年份匹配
         if original.get("year") and matched.get("year"):
             if original["year"] == matched["year"]:
                 total_score += 1.0 * self.weights["year"]
-                details.append(f"年份匹配 (权重{self.weights['year']}): {original['year']} == {matched['year']}")
+                if trace:
+                    details.append(f"年份匹配 (权重{self.weights['year']}): {original['year']} == {matched['year']}")
             else:
-                details.append(f"年份不匹配: {original['year']} != {matched['year']}")
+                if trace:
+                    details.append(f"年份不匹配: {original['year']} != {matched['year']}")
             total_weight += self.weights["year"]
         
         # 卷号匹配
         if original.get("volume") and matched.get("volume"):
             if str(original["volume"]).strip() == str(matched["volume"]).strip():
                 total_score += 1.0 * self.weights["volume"]
-                details.append(f"卷号匹配 (权重{self.weights['volume']}): {original['volume']}")
+                if trace:
+                    details.append(f"卷号匹配 (权重{self.weights['volume']}): {original['volume']}")
             total_weight += self.weights["volume"]
         
         # 期号匹配
         if original.get("issue") and matched.get("issue"):
             if str(original["issue"]).strip() == str(matched["issue"]).strip():
                 total_score += 1.0 * self.weights["issue"]
-                details.append(f"期号匹配 (权重{self.weights['issue']}): {original['issue']}")
+                if trace:
+                    details.append(f"期号匹配 (权重{self.weights['issue']}): {original['issue']}")
             total_weight += self.weights["issue"]
         
         if total_weight == 0:
-            logger.info("  总权重为0，相似度=0.0")
+            if trace:
+                logger.debug("  总权重为0，相似度=0.0")
             return 0.0
         
         final_similarity = total_score / total_weight
-        logger.info(f"  相似度计算详情:")
-        for detail in details:
-            logger.info(f"    - {detail}")
-        logger.info(f"  最终相似度: {final_similarity:.4f} (总得分={total_score:.4f}, 总权重={total_weight:.4f})")
+        if trace:
+            logger.debug("  相似度计算详情:\n%s\n  最终相似度: %.4f (总得分=%.4f, 总权重=%.4f)",
+                         "\n".join("    - " + detail for detail in details),
+                         final_similarity, total_score, total_weight)
         
         return final_similarity
     
@@ -190,18 +278,39 @@ class SimilarityService:
         # 使用SequenceMatcher计算相似度
         return SequenceMatcher(None, text1, text2).ratio()
     
+    @staticmethod
+    def _normalize_author(author: str) -> str:
+        """标准化单个作者名称：去除句点后转为小写的"姓 名首字母"
+
+        efetch 记录为"姓, 名"（"Smith, John A"），esummary 和多数参考文献为"姓 名首字母"（"Smith JA"），
+        两种格式的同一作者标准化后相同，候选文章用摘要记录评分与用完整记录评分结果一致。
+        "姓, 名"中已是首字母的部分（大写，如"Smith, J. A."、"Smith, JA"）原样保留。
+        """
+        name = author.replace(".", " ")
+        last, comma, fore = name.partition(",")
+        if comma:
+            initials = "".join(part if part.isupper() else part[0] for part in re.split(r"[\s-]+", fore) if part)
+            name = f"{last} {initials}"
+        return " ".join(name.lower().split())
+
+    @classmethod
+    def _normalize_authors(cls, authors: Optional[List[str]]) -> List[str]:
+        """标准化作者名称列表"""
+        if not authors:
+            return []
+        return [cls._normalize_author(author) for author in authors]
+    
     def _authors_similarity(self, authors1: List[str], authors2: List[str]) -> float:
         """计算作者列表的相似度"""
         if not authors1 or not authors2:
             return 0.0
         
-        # 标准化作者名称
-        def normalize_author(author: str) -> str:
-            return author.lower().strip().replace(",", "").replace(".", "")
-        
-        authors1_normalized = [normalize_author(a) for a in authors1]
-        authors2_normalized = [normalize_author(a) for a in authors2]
-        
+        return self._normalized_authors_similarity(
+            self._normalize_authors(authors1), self._normalize_authors(authors2)
+        )
+    
+    def _normalized_authors_similarity(self, authors1_normalized: List[str], authors2_normalized: List[str]) -> float:
+        """计算已标准化的作者列表的相似度"""
         # 计算第一作者匹配
         if authors1_normalized and authors2_normalized:
             first_author_sim = self._text_similarity(
@@ -225,6 +334,20 @@ class SimilarityService:
     
     def find_differences(self, original: Dict[str, Any], matched: Dict[str, Any]) -> Dict[str, Any]:
         """找出两个参考文献之间的差异"""
+        return self._find_differences(
+            original, matched,
+            self._normalize_authors(original.get("authors")),
+            self._normalize_authors(matched.get("authors"))
+        )
+    
+    def _find_differences(
+        self,
+        original: Dict[str, Any],
+        matched: Dict[str, Any],
+        original_authors: List[str],
+        matched_authors: List[str]
+    ) -> Dict[str, Any]:
+        """找出两个参考文献之间的差异（作者已标准化）"""
         differences = {}
         
         # 检查每个字段
@@ -241,7 +364,7 @@ class SimilarityService:
             elif orig_val is not None and match_val is not None:
                 # 比较值是否相同
                 if field == "authors":
-                    if not self._authors_match(orig_val, match_val):
+                    if not self._normalized_authors_match(original_authors, matched_authors):
                         differences[field] = {
                             "type": "different",
                             "original": orig_val,
@@ -258,15 +381,13 @@ class SimilarityService:
     
     def _authors_match(self, authors1: List[str], authors2: List[str]) -> bool:
         """检查两个作者列表是否匹配"""
-        if not authors1 or not authors2:
+        return self._normalized_authors_match(self._normalize_authors(authors1), self._normalize_authors(authors2))
+    
+    def _normalized_authors_match(self, authors1_norm: List[str], authors2_norm: List[str]) -> bool:
+        """检查两个已标准化的作者列表是否匹配"""
+        if not authors1_norm or not authors2_norm:
             return False
         
-        def normalize(author: str) -> str:
-            return author.lower().strip().replace(",", "").replace(".", "")
-        
-        authors1_norm = [normalize(a) for a in authors1]
-        authors2_norm = [normalize(a) for a in authors2]
-        
         # 检查第一作者
         if authors1_norm[0] != authors2_norm[0]:
             return False
@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional, Set, Tuple
+import re
+import zlib
+
+import numpy as np
+
+# 梅森素数，用于 (a*x + b) mod p 形式的随机哈希
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_title(title: str) -> str:
+    """标准化标题：小写，只保留字母数字，合并空白"""
+    return " ".join(re.findall(r"\w+", title.lower()))
+
+
+class TitleLSHIndex:
+    """基于MinHash/LSH的标题近似重复索引
+
+    每个标题切分为字符n-gram，计算MinHash签名后按band分桶。
+    查询时只对落入相同桶的少量标题估算相似度，不需要线性扫描全部标题。
+    支持增量添加和删除。
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 4, seed: int = 1):
+        """
+        Args:
+            num_perm: MinHash签名长度
+            bands: LSH分段数（每段 num_perm // bands 行），段越多召回越高
+            shingle_size: 字符n-gram长度
+            seed: 随机哈希参数的种子（固定种子保证各进程签名一致）
+        """
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, Set[str]]] = [dict() for _ in range(bands)]
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def _shingles(self, title: str) -> Set[str]:
+        text = normalize_title(title)
+        if len(text) <= self.shingle_size:
+            return {text} if text else set()
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, title: str) -> Optional[np.ndarray]:
+        """计算标题的MinHash签名，标题为空时返回None"""
+        shingles = self._shingles(title)
+        if not shingles:
+            return None
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in shingles], dtype=np.uint64)
+        # (num_perm, n_shingles) 的随机哈希矩阵，取每行最小值
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: str, title: str) -> None:
+        """添加（或更新）一个标题"""
+        if key in self._signatures:
+            self.remove(key)
+        signature = self.signature(title) if title else None
+        if signature is None:
+            return
+        self._signatures[key] = signature
+        for band, band_key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(band_key, set()).add(key)
+
+    def remove(self, key: str) -> None:
+        """删除一个标题"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band][band_key]
+
+    def query(self, title: str, max_results: int = 5, min_similarity: float = 0.5) -> List[Tuple[float, str]]:
+        """查找近似重复的标题
+
+        Returns:
+            [(估算的Jaccard相似度, key), ...] 按相似度降序排序
+        """
+        signature = self.signature(title) if title else None
+        if signature is None:
+            return []
+        candidates: Set[str] = set()
+        for band, band_key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(band_key)
+            if bucket:
+                candidates.update(bucket)
+
+        results = []
+        for key in candidates:
+            estimate = float(np.mean(self._signatures[key] == signature))
+            if estimate >= min_similarity:
+                results.append((estimate, key))
+        results.sort(key=lambda x: x[0], reverse=True)
+        return results[:max_results]
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+# 当前检索策略（由 search_articles 设置，嵌套的各阶段耗时按策略分别统计）
+current_strategy: ContextVar[str] = ContextVar("current_strategy", default="")
+
+
+class Span:
+    """一个计时区间（可嵌套）"""
+
+    __slots__ = ("name", "attrs", "start", "end", "children", "parent", "sequential")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, sequential: bool = False, **attrs):
+        self.name = name
+        self.attrs: Dict[str, Any] = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.parent = parent
+        # 顺序区间（如检索策略）：开始下一个同级顺序区间时自动结束
+        self.sequential = sequential
+        if parent is not None:
+            parent.children.append(self)
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = time.perf_counter()
+        for child in self.children:
+            if child.end is None:
+                child.finish()
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """转换为可序列化的树（时间单位为毫秒，start_ms 相对根区间）"""
+        if origin is None:
+            origin = self.start
+        result: Dict[str, Any] = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+        }
+        if self.attrs:
+            result["attrs"] = self.attrs
+        if self.children:
+            result["children"] = [child.to_dict(origin) for child in self.children]
+        return result
+
+
+# 当前区间；未启用追踪时为None，所有追踪调用都是空操作
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """开始一次追踪（如一次检索请求），返回根区间"""
+    root = Span(name, **attrs)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        _current_span.reset(token)
+        root.finish()
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """在当前追踪中记录一个子区间（未启用追踪时不做任何事）"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent=parent, **attrs)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+
+def annotate(**attrs) -> None:
+    """为当前区间添加属性（如获取到的PMID数）"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def enter_strategy(name: str, **attrs) -> None:
+    """进入一个检索策略
+
+    同时设置指标的当前策略标签；启用追踪时结束上一个策略区间并开始新的策略区间，
+    之后的上游请求和评分区间都记录在该策略下。所在函数返回时（timed_stage 恢复上下文）策略区间随父区间结束。
+    """
+    current_strategy.set(name)
+    current = _current_span.get()
+    if current is None:
+        return
+    if current.sequential:
+        current.finish()
+        current = current.parent
+    _current_span.set(Span("strategy", parent=current, sequential=True, strategy=name, **attrs))
+
+
+def server_timing(root: Span) -> str:
+    """根区间的直接子区间（按名称合并）及总耗时，格式化为 Server-Timing 响应头"""
+    totals: Dict[str, float] = {}
+    for child in root.children:
+        totals[child.name] = totals.get(child.name, 0.0) + child.duration
+    entries = [f"{name};dur={duration * 1000:.1f}" for name, duration in totals.items()]
+    entries.append(f"total;dur={root.duration * 1000:.1f}")
+    return ", ".join(entries)
@@ -0,0 +1,161 @@
+from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+
+from app.services.metrics import DUPLICATE_REFERENCES
+from app.services.reference_dedup import DuplicateResolver
+
+logger = logging.getLogger(__name__)
+
+# 自动纠正的默认相似度阈值（DOI/PMID匹配的文章总是采用）
+DEFAULT_CORRECTION_THRESHOLD = 0.9
+
+# 纠正时使用的字段（与前端"替换"一致，不写入PMID）
+CORRECTION_FIELDS = ("title", "authors", "journal", "year", "volume", "issue", "pages", "doi")
+KEYWORD_FIELDS = ("title", "authors", "journal", "year", "volume", "issue", "pages", "pmid", "doi")
+
+
+class ValidationService:
+    """一次性校验流水线：拆分 → 关键词提取 → PubMed检索 → 纠正 → 格式化
+
+    拆分完成后每条参考文献独立进入流水线：关键词提取完成即开始检索，
+    不等待其他参考文献，各阶段在不同参考文献之间重叠执行。
+    同一篇文献的多条参考文献只检索一次（先完成关键词提取的一条），其余使用其结果并标记 duplicate_of。
+    全程使用字典传递数据，不在阶段之间构建/校验 pydantic 模型。
+    """
+
+    def __init__(self, llm_service, pubmed_service, similarity_service, format_service, concurrency: int = 8):
+        self.llm_service = llm_service
+        self.pubmed_service = pubmed_service
+        self.similarity_service = similarity_service
+        self.format_service = format_service
+        self.concurrency = max(1, concurrency)
+
+    async def validate(
+        self,
+        text: str,
+        target_format: str = "original",
+        use_smart_matching: bool = False,
+        use_semantic_matching: bool = False,
+        correction_threshold: float = DEFAULT_CORRECTION_THRESHOLD
+    ) -> Dict[str, Any]:
+        """校验参考文献列表，返回每条参考文献的校验结果和纠正后的格式化文本"""
+        split_results = await asyncio.to_thread(self.llm_service.split_references, text)
+        logger.info("【校验流水线】拆分完成，共 %s 条参考文献", len(split_results))
+
+        # 检索并发数（关键词提取受大模型全局配额限制）
+        search_semaphore = asyncio.Semaphore(self.concurrency)
+        resolver = DuplicateResolver()
+
+        async def run(idx: int, ref_data: Dict[str, Any]) -> Dict[str, Any]:
+            reference = {
+                "id": ref_data.get("id", f"ref_{idx+1}"),
+                "original_text": ref_data.get("text", ""),
+                "format_type": ref_data.get("format_type", "unknown")
+            }
+            try:
+                keywords = await asyncio.to_thread(self.llm_service.extract_keywords, reference["original_text"])
+                keywords = {field: keywords.get(field) for field in KEYWORD_FIELDS}
+                reference["extracted_keywords"] = keywords
+
+                async def search() -> List[Dict[str, Any]]:
+                    async with search_semaphore:
+                        return await self.pubmed_service.search_articles(
+                            dict(keywords),
+                            use_smart_matching=use_smart_matching,
+                            use_semantic_matching=use_semantic_matching
+                        )
+
+                # 以位置作为登记的键（拆分结果的ID可能重复）
+                duplicate_of = resolver.register(str(idx), keywords)
+                if duplicate_of is not None:
+                    reference["duplicate_of"] = split_ids[int(duplicate_of)]
+                articles = await resolver.resolve(str(idx), keywords, search)
+                self._apply_best_match(reference, keywords, articles, correction_threshold)
+            except Exception as e:
+                logger.error("【校验流水线】参考文献 %s 处理失败: %s", reference['id'], str(e), exc_info=True)
+                reference.setdefault("extracted_keywords", {})
+                reference.update({"status": "error", "matched_article": None, "error": str(e)})
+            return reference
+
+        split_ids = [ref_data.get("id", f"ref_{idx+1}") for idx, ref_data in enumerate(split_results)]
+        references = await asyncio.gather(*[run(idx, ref_data) for idx, ref_data in enumerate(split_results)])
+        if resolver.duplicates:
+            DUPLICATE_REFERENCES.inc(len(resolver.duplicates), pipeline="validate")
+            logger.info("【校验流水线】检测到 %s 条重复参考文献", len(resolver.duplicates))
+
+        formatted = []
+        for idx, reference in enumerate(references, 1):
+            reference["text"] = self._format(reference, target_format, idx)
+            formatted.append(reference["text"])
+        counts: Dict[str, int] = {}
+        for reference in references:
+            counts[reference["status"]] = counts.get(reference["status"], 0) + 1
+        logger.info("【校验流水线】完成: %s", counts)
+
+        return {
+            "references": references,
+            "format": target_format,
+            "formatted_text": "\n".join(formatted),
+            "summary": counts
+        }
+
+    def _apply_best_match(
+        self,
+        reference: Dict[str, Any],
+        keywords: Dict[str, Any],
+        articles: List[Dict[str, Any]],
+        correction_threshold: float
+    ) -> None:
+        """选取最佳匹配文章，达到阈值时用其字段纠正参考文献
+
+        status: verified（与PubMed一致）、corrected（已纠正）、unverified（有候选但未达到阈值）、not_found
+        """
+        if not articles:
+            reference.update({"status": "not_found", "matched_article": None})
+            return
+
+        # DOI/PMID匹配的文章优先，其次按相似度
+        best = max(articles, key=lambda a: (bool(a.get("_match_type")), a.get("_similarity_score", 0.0)))
+        score = best.get("_similarity_score")
+        if score is None:
+            score = self.similarity_service.calculate_similarity(keywords, best)
+        differences = best.get("_differences")
+        if differences is None:
+            differences = self.similarity_service.find_differences(keywords, best)
+        match_type = best.get("_match_type")
+
+        reference["matched_article"] = {
+            **{field: best.get(field) for field in KEYWORD_FIELDS},
+            "similarity_score": score,
+            "match_type": match_type,
+            "differences": differences
+        }
+        if not match_type and score < correction_threshold:
+            reference["status"] = "unverified"
+            return
+        corrections = {field: diff for field, diff in differences.items() if field in CORRECTION_FIELDS}
+        if not corrections:
+            reference["status"] = "verified"
+            return
+        reference["status"] = "corrected"
+        reference["corrected_keywords"] = {field: best.get(field) for field in CORRECTION_FIELDS}
+
+    def _format(self, reference: Dict[str, Any], target_format: str, index: int) -> str:
+        """格式化单条参考文献：已纠正的使用纠正后的字段，其余使用提取的关键词"""
+        corrected = reference.get("corrected_keywords")
+        ref = {
+            "id": reference["id"],
+            "text": reference["original_text"],
+            "data": corrected or reference.get("extracted_keywords") or {},
+            "format_type": reference.get("format_type")
+        }
+        if target_format == "original":
+            # 保持原文；已纠正的参考文献按其识别出的格式重新生成（无法识别时使用NLM格式）
+            if not corrected:
+                return reference["original_text"]
+            format_type = reference.get("format_type")
+            if format_type not in self.format_service.SUPPORTED_FORMATS:
+                format_type = "nlm"
+            return self.format_service.format_reference(ref, format_type, index)
+        return self.format_service.format_reference(ref, target_format, index)
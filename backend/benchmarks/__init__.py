@@ -0,0 +1 @@
+"""离线基准测试：本地模拟 NCBI E-utilities 和 DashScope，重放参考文献校验流程"""
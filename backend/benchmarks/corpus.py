@@ -0,0 +1,268 @@
+"""基准测试语料：模拟的PubMed文章库和引用这些文章的参考文献列表
+
+语料由两部分组成：
+- 生成语料：按随机种子确定性生成的文章（含标题相近的"同族"文章，使检索产生多个候选）和参考文献文本
+- 示例语料：EXAMPLE_REFERENCES.txt 及 fixtures/example_references.json 中记录的对应文章
+
+模拟服务用文章库回答 esearch/efetch，用参考文献的标注字段回答关键词提取；
+运行器把参考文献列表（bibliography）作为 /api/split 的输入。
+"""
+from typing import Any, Dict, List, Optional
+from pathlib import Path
+import json
+import random
+import re
+
+BENCHMARK_DIR = Path(__file__).parent
+FIXTURE_PATH = BENCHMARK_DIR / "fixtures" / "example_references.json"
+EXAMPLE_REFERENCES_PATH = BENCHMARK_DIR.parent.parent / "EXAMPLE_REFERENCES.txt"
+
+_WORDS = (
+    "acute chronic kidney liver cardiac pulmonary renal hepatic neural vascular tumor cancer carcinoma "
+    "diabetes obesity hypertension stroke sepsis infection inflammation fibrosis injury disease syndrome "
+    "therapy treatment outcomes mortality risk prognosis diagnosis screening biomarkers imaging genomic "
+    "transcriptomic proteomic metabolic immune response resistance signaling pathway receptor expression "
+    "mutation variants cohort randomized trial meta-analysis systematic review observational prospective "
+    "retrospective multicenter population children adults elderly patients women pregnancy neonatal "
+    "intensive care surgery transplantation chemotherapy immunotherapy radiotherapy antibiotic vaccine "
+    "efficacy safety adherence quality life cost-effectiveness machine learning deep model prediction "
+    "association incidence prevalence trends global burden regional analysis novel targeted inhibitor "
+    "mitochondrial oxidative stress apoptosis autophagy microbiome gut brain cognitive decline dementia "
+    "alzheimer depression anxiety sleep exercise diet nutrition smoking alcohol air pollution exposure"
+).split()
+
+_SURNAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Wilson Anderson Taylor Thomas Moore Martin "
+    "Lee Thompson White Harris Clark Lewis Walker Hall Young King Wright Lopez Hill Scott Green Adams "
+    "Zhang Wang Li Liu Chen Yang Huang Zhao Wu Zhou Xu Sun Ma Zhu Hu Guo He Lin Luo Gao Tanaka Suzuki "
+    "Kim Park Choi Nguyen Müller Schmidt Schneider Fischer Rossi Russo Ferrari Silva Santos Kumar Singh"
+).split()
+
+_FORENAMES = (
+    "James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth William Barbara Richard Susan "
+    "Wei Fang Jing Lei Min Hao Yan Xin Hiroshi Yuki Minho Jisoo Anna Lukas Giulia Marco Ana Pedro Priya Arjun"
+).split()
+
+_JOURNALS = (
+    ("The New England Journal of Medicine", "N Engl J Med"),
+    ("Lancet (London, England)", "Lancet"),
+    ("JAMA", "JAMA"),
+    ("BMJ (Clinical research ed.)", "BMJ"),
+    ("Nature Medicine", "Nat Med"),
+    ("Journal of Clinical Oncology", "J Clin Oncol"),
+    ("Circulation", "Circulation"),
+    ("Kidney International", "Kidney Int"),
+    ("Hepatology (Baltimore, Md.)", "Hepatology"),
+    ("Diabetes Care", "Diabetes Care"),
+    ("Annals of Internal Medicine", "Ann Intern Med"),
+    ("PloS One", "PLoS One"),
+    ("Scientific Reports", "Sci Rep"),
+    ("Frontiers in Immunology", "Front Immunol"),
+    ("Journal of the American College of Cardiology", "J Am Coll Cardiol"),
+    ("Critical Care Medicine", "Crit Care Med"),
+    ("Alzheimer's & Dementia", "Alzheimers Dement"),
+    ("General Psychiatry", "Gen Psychiatr"),
+)
+
+REFERENCE_STYLES = ("nlm", "ama", "apa", "numeric")
+
+
+def _author(rng: random.Random) -> Dict[str, str]:
+    fore = rng.choice(_FORENAMES)
+    middle = rng.choice("ABCDEFGHJKLMRST") if rng.random() < 0.3 else ""
+    # 与PubMed一样，名（ForeName）包含中间名首字母："John A" / "JA"
+    return {"last": rng.choice(_SURNAMES), "fore": f"{fore} {middle}".strip(), "initials": fore[0] + middle}
+
+
+def _title(rng: random.Random) -> str:
+    words = rng.sample(_WORDS, rng.randint(6, 12))
+    return " ".join(words).capitalize()
+
+
+def _derive_title(rng: random.Random, title: str) -> str:
+    """标题相近的同族文章：替换其中两三个词"""
+    words = title.lower().split()
+    for _ in range(rng.randint(2, 3)):
+        words[rng.randrange(len(words))] = rng.choice(_WORDS)
+    return " ".join(words).capitalize()
+
+
+def _abstract(rng: random.Random, title: str) -> str:
+    sentences = []
+    for _ in range(rng.randint(4, 8)):
+        sentences.append(" ".join(rng.choices(_WORDS + title.lower().split(), k=rng.randint(10, 20))).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def generate_articles(count: int, seed: int = 42, first_pmid: int = 30000000) -> List[Dict[str, Any]]:
+    """生成文章库；约40%的文章与之前的某篇文章标题相近、第一作者相同"""
+    rng = random.Random(seed)
+    articles: List[Dict[str, Any]] = []
+    for i in range(count):
+        journal, journal_abbr = rng.choice(_JOURNALS)
+        authors = [_author(rng) for _ in range(rng.randint(1, 8))]
+        if articles and rng.random() < 0.4:
+            sibling = rng.choice(articles)
+            title = _derive_title(rng, sibling["title"])
+            authors[0] = dict(sibling["authors"][0])
+        else:
+            title = _title(rng)
+        year = rng.randint(2000, 2024)
+        start_page = rng.randint(1, 2000)
+        pmid = str(first_pmid + i)
+        articles.append({
+            "pmid": pmid,
+            "title": title,
+            "authors": authors,
+            "journal": journal,
+            "journal_abbr": journal_abbr,
+            "year": year,
+            "volume": str(rng.randint(1, 400)),
+            "issue": str(rng.randint(1, 12)),
+            "pages": f"{start_page}-{start_page + rng.randint(3, 15)}",
+            "doi": f"10.{rng.randint(1000, 9999)}/{journal_abbr.lower().replace(' ', '')}.{year}.{pmid[-5:]}",
+            "abstract": _abstract(rng, title),
+        })
+    return articles
+
+
+def _short_author(author: Dict[str, str]) -> str:
+    return f"{author['last']} {author['initials']}"
+
+
+def format_reference(article: Dict[str, Any], style: str, include_doi: bool, include_pmid: bool) -> Dict[str, Any]:
+    """按指定格式生成参考文献文本，并返回文本中实际出现的字段（即理想的关键词提取结果）"""
+    authors = [_short_author(a) for a in article["authors"]]
+    if len(authors) > 6 and style in ("nlm", "ama", "numeric"):
+        cited_authors = authors[:3]
+        author_text = ", ".join(cited_authors) + ", et al"
+    else:
+        cited_authors = authors
+        author_text = ", ".join(authors)
+    journal = article["journal"] if style == "apa" else article["journal_abbr"]
+    keywords: Dict[str, Any] = {
+        "title": article["title"],
+        "authors": cited_authors,
+        "journal": journal,
+        "year": article["year"],
+        "volume": article["volume"],
+        "issue": article["issue"],
+        "pages": article["pages"],
+    }
+    if style == "apa":
+        apa_authors = [f"{a['last']}, {'. '.join(a['initials'])}." for a in article["authors"]]
+        if len(apa_authors) > 1:
+            apa_authors[-1] = "& " + apa_authors[-1]
+        text = (f"{', '.join(apa_authors)} ({article['year']}). {article['title']}. {journal}, "
+                f"{article['volume']}({article['issue']}), {article['pages']}.")
+        keywords["authors"] = [_short_author(a) for a in article["authors"]]
+        if include_doi:
+            text += f" https://doi.org/{article['doi']}"
+    elif style == "numeric":
+        text = (f"{author_text}. {article['title']}. {journal}, {article['year']}, "
+                f"{article['volume']}({article['issue']}): {article['pages']}.")
+        if include_doi:
+            text += f" doi:{article['doi']}"
+    else:
+        text = (f"{author_text}. {article['title']}. {journal}. {article['year']};"
+                f"{article['volume']}({article['issue']}):{article['pages']}.")
+        if include_doi:
+            text += f" doi:{article['doi']}"
+    if include_doi:
+        keywords["doi"] = article["doi"]
+    if include_pmid:
+        text += f" PMID: {article['pmid']}"
+        keywords["pmid"] = article["pmid"]
+    return {"text": text, "pmid": article["pmid"], "keywords": keywords, "style": style}
+
+
+def generate_references(
+    articles: List[Dict[str, Any]],
+    count: int,
+    seed: int = 42,
+    doi_rate: float = 0.5,
+    pmid_rate: float = 0.1
+) -> List[Dict[str, Any]]:
+    """从文章库中抽取文章生成参考文献（同一篇文章可能被多次引用，与实际使用中的重复引用一致）"""
+    rng = random.Random(seed + 1)
+    references = []
+    for _ in range(count):
+        article = rng.choice(articles)
+        references.append(format_reference(
+            article,
+            rng.choice(REFERENCE_STYLES),
+            include_doi=rng.random() < doi_rate,
+            include_pmid=rng.random() < pmid_rate
+        ))
+    return references
+
+
+def bibliography_text(references: List[Dict[str, Any]]) -> str:
+    """把参考文献编号拼成一个参考文献列表（/api/split 的输入）"""
+    return "\n".join(f"{idx}. {ref['text']}" for idx, ref in enumerate(references, 1))
+
+
+class Corpus:
+    """文章库 + 参考文献 + 参考文献列表"""
+
+    def __init__(
+        self,
+        articles: Optional[List[Dict[str, Any]]] = None,
+        references: Optional[List[Dict[str, Any]]] = None,
+        bibliographies: Optional[List[str]] = None
+    ):
+        self.articles = articles or []
+        self.references = references or []
+        self.bibliographies = bibliographies or []
+
+    def extend(self, other: "Corpus") -> "Corpus":
+        self.articles.extend(other.articles)
+        self.references.extend(other.references)
+        self.bibliographies.extend(other.bibliographies)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"articles": self.articles, "references": self.references, "bibliographies": self.bibliographies}
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "Corpus":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("articles"), data.get("references"), data.get("bibliographies"))
+
+
+def generate_corpus(
+    num_articles: int = 500,
+    num_references: int = 200,
+    refs_per_bibliography: int = 20,
+    seed: int = 42
+) -> Corpus:
+    """生成语料（相同参数和种子总是生成相同的语料，便于与基线对比）"""
+    articles = generate_articles(num_articles, seed)
+    references = generate_references(articles, num_references, seed)
+    size = max(1, refs_per_bibliography)
+    bibliographies = [bibliography_text(references[i:i + size]) for i in range(0, len(references), size)]
+    return Corpus(articles, references, bibliographies)
+
+
+def load_example_corpus(
+    fixture_path: Path = FIXTURE_PATH,
+    references_path: Path = EXAMPLE_REFERENCES_PATH
+) -> Corpus:
+    """示例语料：EXAMPLE_REFERENCES.txt 作为一个参考文献列表，文章和标注字段来自记录的 fixture"""
+    with open(fixture_path, "r", encoding="utf-8") as f:
+        fixture = json.load(f)
+    bibliographies = []
+    if references_path.exists():
+        bibliographies.append(references_path.read_text(encoding="utf-8"))
+    return Corpus(fixture.get("articles", []), fixture.get("references", []), bibliographies)
+
+
+def normalize_text(text: str) -> str:
+    """参考文献文本的比较键（去掉编号和多余空白）"""
+    text = re.sub(r"^\s*(\[\d+\]|\d+[.、)])\s*", "", text)
+    return re.sub(r"\s+", " ", text).strip().lower()
@@ -0,0 +1,239 @@
+"""带标注的"损坏"参考文献语料，用于评估匹配准确率
+
+从PubMed文章记录（共享缓存中已获取的文章，或 corpus.py 生成的文章）出发，
+用 FormatService 按其支持的每种格式生成参考文献，再施加真实用户输入中常见的错误：
+删减作者、截断标题、年份错误、缺少DOI、中文标点、期刊缩写。
+每条参考文献都带有其实际引用文章的PMID（ground truth），以及施加了哪些错误。
+
+另可生成一部分"库外"参考文献（引用的文章不在模拟服务的文章库中），
+正确的结果是未找到匹配；匹配到任何文章都计为误报，用于计算精确率。
+"""
+from typing import Any, Callable, Dict, List, Optional
+import json
+import random
+import re
+import sqlite3
+
+from app.services.format_service import FormatService
+from benchmarks.corpus import Corpus, bibliography_text, generate_articles
+
+# 期刊名中常见词的NLM缩写（未列出的词保持原样）
+_JOURNAL_ABBREVIATIONS = {
+    "journal": "J", "international": "Int", "american": "Am", "european": "Eur", "british": "Br",
+    "medicine": "Med", "medical": "Med", "clinical": "Clin", "research": "Res", "review": "Rev",
+    "reviews": "Rev", "science": "Sci", "sciences": "Sci", "scientific": "Sci", "reports": "Rep",
+    "annals": "Ann", "internal": "Intern", "oncology": "Oncol", "cardiology": "Cardiol",
+    "immunology": "Immunol", "psychiatry": "Psychiatry", "neurology": "Neurol", "surgery": "Surg",
+    "college": "Coll", "association": "Assoc", "society": "Soc", "critical": "Crit", "care": "Care",
+    "public": "Public", "health": "Health", "frontiers": "Front", "biology": "Biol", "molecular": "Mol",
+    "england": "Engl", "new": "N", "general": "Gen", "experimental": "Exp", "pediatrics": "Pediatr",
+    "nutrition": "Nutr", "infectious": "Infect", "diseases": "Dis", "disease": "Dis",
+}
+_JOURNAL_STOPWORDS = {"the", "of", "and", "&", "in", "for", "on"}
+
+# 中文输入法下常见的全角标点
+_CHINESE_PUNCTUATION = str.maketrans({".": "。", ",": "，", ";": "；", ":": "：", "(": "（", ")": "）"})
+
+# 各格式中实际显示的作者数（FormatService 的截断规则）
+_VISIBLE_AUTHORS = {"apa": lambda n: 2 if n > 2 else n, "ama": lambda n: min(n, 6), "nlm": lambda n: min(n, 6)}
+
+
+def abbreviate_journal(journal: str) -> str:
+    """按常见词表生成NLM风格的期刊缩写（去掉括号内的地名说明和虚词）"""
+    journal = re.sub(r"\s*\(.*?\)", "", journal or "").strip().rstrip(".")
+    words = [w for w in re.split(r"[\s:]+", journal) if w and w.lower() not in _JOURNAL_STOPWORDS]
+    if len(words) <= 1:
+        return journal
+    return " ".join(_JOURNAL_ABBREVIATIONS.get(w.lower(), w) for w in words)
+
+
+def article_from_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """把 _parse_xml 格式的文章记录（作者为"姓, 名"）转换为模拟服务的文章格式；缺少关键字段时返回None"""
+    if not (record.get("pmid") and record.get("title") and record.get("authors") and record.get("journal")
+            and record.get("year")):
+        return None
+    authors = []
+    for name in record["authors"]:
+        last, _, fore = name.partition(",")
+        fore = fore.strip()
+        initials = "".join(part[0] for part in re.split(r"[\s-]+", fore) if part) or last[:1]
+        authors.append({"last": last.strip(), "fore": fore or initials, "initials": initials.upper()})
+    return {
+        "pmid": str(record["pmid"]),
+        "title": record["title"].rstrip("."),
+        "authors": authors,
+        "journal": record["journal"],
+        "journal_abbr": abbreviate_journal(record["journal"]),
+        "year": int(record["year"]),
+        "volume": record.get("volume") or "",
+        "issue": record.get("issue") or "",
+        "pages": record.get("pages") or "",
+        "doi": record.get("doi") or "",
+        "abstract": record.get("abstract") or "",
+    }
+
+
+def load_cached_articles(db_path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """从共享缓存（CACHE_BACKEND=sqlite 的数据库）中读取已获取的PubMed文章"""
+    conn = sqlite3.connect(db_path)
+    try:
+        query = "SELECT value FROM cache_entries WHERE namespace = 'article'"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        rows = conn.execute(query).fetchall()
+    finally:
+        conn.close()
+    articles = []
+    for (value,) in rows:
+        article = article_from_record(json.loads(value))
+        if article is not None:
+            articles.append(article)
+    return articles
+
+
+# ---------- 错误类型：作用于格式化前的字段（data）或格式化后的文本 ----------
+
+def _drop_authors(data: Dict[str, Any], rng: random.Random) -> bool:
+    authors = data.get("authors") or []
+    if len(authors) < 2:
+        return False
+    keep = rng.randint(1, len(authors) - 1)
+    data["authors"] = authors[:1] + rng.sample(authors[1:], keep - 1) if rng.random() < 0.7 else authors[-keep:]
+    return True
+
+
+def _truncate_title(data: Dict[str, Any], rng: random.Random) -> bool:
+    words = (data.get("title") or "").split()
+    if len(words) < 4:
+        return False
+    data["title"] = " ".join(words[:max(2, int(len(words) * rng.uniform(0.4, 0.8)))])
+    return True
+
+
+def _wrong_year(data: Dict[str, Any], rng: random.Random) -> bool:
+    if not data.get("year"):
+        return False
+    data["year"] = int(data["year"]) + rng.choice((-2, -1, 1, 2))
+    return True
+
+
+def _missing_doi(data: Dict[str, Any], rng: random.Random) -> bool:
+    if not data.get("doi"):
+        return False
+    data.pop("doi")
+    return True
+
+
+def _abbreviate_journal(data: Dict[str, Any], rng: random.Random) -> bool:
+    abbreviated = abbreviate_journal(data.get("journal") or "")
+    if not abbreviated or abbreviated == data.get("journal"):
+        return False
+    data["journal"] = abbreviated
+    return True
+
+
+FIELD_CORRUPTIONS: Dict[str, Callable[[Dict[str, Any], random.Random], bool]] = {
+    "dropped_authors": _drop_authors,
+    "truncated_title": _truncate_title,
+    "wrong_year": _wrong_year,
+    "missing_doi": _missing_doi,
+    "abbreviated_journal": _abbreviate_journal,
+}
+TEXT_CORRUPTIONS: Dict[str, Callable[[str], str]] = {
+    "chinese_punctuation": lambda text: text.translate(_CHINESE_PUNCTUATION),
+}
+CORRUPTIONS = tuple(FIELD_CORRUPTIONS) + tuple(TEXT_CORRUPTIONS)
+
+
+def corrupt_reference(
+    article: Dict[str, Any],
+    style: str,
+    corruptions: List[str],
+    rng: random.Random,
+    format_service: Optional[FormatService] = None
+) -> Dict[str, Any]:
+    """按指定格式生成一条参考文献并施加错误
+
+    返回 text（参考文献文本）、pmid（实际引用的文章）、style、corruptions（实际生效的错误）、
+    keywords（文本中可识别的字段，即理想的关键词提取结果）。
+    """
+    format_service = format_service or FormatService()
+    data: Dict[str, Any] = {
+        "title": article["title"],
+        "authors": [f"{a['last']} {a['initials']}" for a in article["authors"]],
+        "journal": article["journal"],
+        "year": article["year"],
+        "volume": article.get("volume") or None,
+        "issue": article.get("issue") or None,
+        "pages": article.get("pages") or None,
+        "doi": article.get("doi") or None,
+    }
+    data = {key: value for key, value in data.items() if value}
+
+    applied = []
+    for name in corruptions:
+        if name in FIELD_CORRUPTIONS and FIELD_CORRUPTIONS[name](data, rng):
+            applied.append(name)
+    text = format_service.format_reference({"data": data}, style, index=1)
+    # 国标和顺序编码制带有序号（如 "[1], " 或 "1., "），参考文献列表会重新编号
+    text = re.sub(r"^(\[\d+\]|\d+\.)\s*,?\s*", "", text)
+    for name in corruptions:
+        if name in TEXT_CORRUPTIONS:
+            text = TEXT_CORRUPTIONS[name](text)
+            applied.append(name)
+
+    keywords = dict(data)
+    visible = _VISIBLE_AUTHORS.get(style)
+    if visible and keywords.get("authors"):
+        keywords["authors"] = keywords["authors"][:visible(len(keywords["authors"]))]
+    if keywords.get("doi") and keywords["doi"] not in text:
+        # 部分格式（如MLA、顺序编码制）不包含DOI
+        keywords.pop("doi")
+    return {"text": text, "pmid": article["pmid"], "style": style, "corruptions": applied, "keywords": keywords}
+
+
+def generate_corrupted_corpus(
+    articles: List[Dict[str, Any]],
+    num_references: int = 200,
+    corruption_rate: float = 0.6,
+    max_corruptions: int = 3,
+    negative_rate: float = 0.1,
+    refs_per_bibliography: int = 20,
+    seed: int = 42
+) -> Corpus:
+    """生成损坏参考文献语料
+
+    每条参考文献以 corruption_rate 的概率施加 1~max_corruptions 种错误，格式在 FormatService
+    支持的格式中均匀选择。negative_rate 比例的文章不放入文章库（库外参考文献，ground truth 为None）。
+    """
+    rng = random.Random(seed)
+    articles = list(articles)
+    rng.shuffle(articles)
+    num_negative = int(len(articles) * negative_rate)
+    outside, inside = articles[:num_negative], articles[num_negative:]
+    outside_pmids = {a["pmid"] for a in outside}
+
+    format_service = FormatService()
+    references = []
+    for _ in range(num_references):
+        article = rng.choice(articles)
+        corruptions: List[str] = []
+        if rng.random() < corruption_rate:
+            corruptions = rng.sample(CORRUPTIONS, rng.randint(1, max_corruptions))
+        reference = corrupt_reference(article, rng.choice(FormatService.SUPPORTED_FORMATS), corruptions, rng, format_service)
+        if article["pmid"] in outside_pmids:
+            reference["pmid"] = None
+        references.append(reference)
+
+    size = max(1, refs_per_bibliography)
+    bibliographies = [bibliography_text(references[i:i + size]) for i in range(0, len(references), size)]
+    return Corpus(inside, references, bibliographies)
+
+
+def source_articles(source: str, count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """文章来源：generated（按种子生成）、SQLite共享缓存数据库路径（*.db），或 Corpus JSON 文件"""
+    if source == "generated":
+        return generate_articles(count, seed)
+    if source.endswith(".db"):
+        return load_cached_articles(source, count)
+    return Corpus.load(source).articles[:count]
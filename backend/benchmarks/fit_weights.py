@@ -0,0 +1,166 @@
+"""学习本地语义重排序的字段权重
+
+用 corrupted_corpus.py 生成带标注的损坏参考文献（每条都知道实际引用的文章），为每条参考文献构建
+一组候选文章：正确文章（标签1）和若干篇易混淆的文章（第一作者或期刊相同，标签0，与实际检索到的
+候选文章相近），用 SemanticRerankService.fit_weights 学习字段权重。
+
+默认从关键词中去掉DOI/PMID再学习：带DOI/PMID的参考文献由检索流程的DOI/PMID策略处理，
+重排序主要面对没有（或不可信的）标识符的参考文献；DOI/PMID的权重不由样本学习。
+
+按参考文献划分训练集和验证集，输出默认权重和学习后权重在验证集上的首位命中率，以及按检索流程的
+分类阈值（>0.9 直接返回，0.5~0.9 进入候选池）统计的正确文章/易混淆文章比例，
+并保存权重文件（SEMANTIC_WEIGHTS_PATH 指向该文件即可使用）。
+
+在 backend 目录下运行：
+    python -m benchmarks.fit_weights --output data/semantic_weights.json
+    python -m benchmarks.fit_weights --source data/cache.db   # 使用共享缓存中已获取的真实PubMed文章
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import random
+
+from benchmarks.corrupted_corpus import generate_corrupted_corpus, source_articles
+from app.services.semantic_service import SemanticRerankService
+from app.services.similarity_service import SimilarityService
+
+
+def article_record(article: Dict[str, Any]) -> Dict[str, Any]:
+    """语料中的文章 -> 检索服务内部的文章记录（与 pubmed_xml.extract_article 的结果格式相同）"""
+    return {
+        "pmid": article["pmid"],
+        "title": article["title"],
+        "authors": [f"{author['last']}, {author['fore']}" for author in article["authors"]],
+        "journal": article["journal"],
+        "year": str(article["year"]),
+        "volume": article.get("volume"),
+        "issue": article.get("issue"),
+        "pages": article.get("pages"),
+        "doi": article.get("doi"),
+        "abstract": article.get("abstract"),
+    }
+
+
+def build_groups(articles: List[Dict[str, Any]], references: List[Dict[str, Any]], negatives: int,
+                 seed: int, keep_identifiers: bool = False) -> List[List[Tuple[Dict[str, Any], Dict[str, Any], float]]]:
+    """每条参考文献一组样本：[(关键词, 候选文章, 标签), ...]，第一个为正确文章"""
+    rng = random.Random(seed)
+    by_pmid = {article["pmid"]: article for article in articles}
+    groups = []
+    for reference in references:
+        target = by_pmid.get(reference["pmid"])
+        if target is None:
+            continue
+        keywords = dict(reference["keywords"])
+        if not keep_identifiers:
+            keywords.pop("doi", None)
+            keywords.pop("pmid", None)
+        if keywords.get("year") is not None:
+            keywords["year"] = str(keywords["year"])
+        # 易混淆的文章：第一作者相同（标题相近的系列文章）或期刊相同，不足时随机补充
+        confusable = [
+            article for article in articles
+            if article["pmid"] != target["pmid"] and (
+                article["authors"][0]["last"] == target["authors"][0]["last"] or article["journal"] == target["journal"]
+            )
+        ]
+        rng.shuffle(confusable)
+        chosen = confusable[:negatives]
+        while len(chosen) < min(negatives, len(articles) - 1):
+            article = rng.choice(articles)
+            if article["pmid"] != target["pmid"] and article not in chosen:
+                chosen.append(article)
+        group = [(keywords, article_record(target), 1.0)]
+        group.extend((keywords, article_record(article), 0.0) for article in chosen)
+        groups.append(group)
+    return groups
+
+
+def evaluate(service: SemanticRerankService,
+             groups: List[List[Tuple[Dict[str, Any], Dict[str, Any], float]]]) -> Dict[str, float]:
+    """首位命中率，以及正确文章/易混淆文章达到高置信度（>0.9）、进入候选池（>=0.5）的比例"""
+    hits = positive_high = positive_candidate = negative_high = negative_candidate = negatives = 0
+    for group in groups:
+        keywords = group[0][0]
+        ranked = service.rerank(keywords, [candidate for _, candidate, _ in group])
+        target = group[0][1]["pmid"]
+        hits += ranked[0][1]["pmid"] == target
+        for score, candidate in ranked:
+            if candidate["pmid"] == target:
+                positive_high += score > 0.9
+                positive_candidate += score >= 0.5
+            else:
+                negatives += 1
+                negative_high += score > 0.9
+                negative_candidate += score >= 0.5
+    total = max(len(groups), 1)
+    negatives = max(negatives, 1)
+    return {
+        "top1": round(hits / total, 4),
+        "positive_high": round(positive_high / total, 4),
+        "positive_candidate": round(positive_candidate / total, 4),
+        "negative_high": round(negative_high / negatives, 4),
+        "negative_candidate": round(negative_candidate / negatives, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="学习本地语义重排序的字段权重")
+    parser.add_argument("--source", default="generated", help="文章来源：generated、共享缓存数据库（*.db）或语料JSON")
+    parser.add_argument("--articles", type=int, default=400, help="文章库大小")
+    parser.add_argument("--references", type=int, default=600, help="参考文献条数")
+    parser.add_argument("--negatives", type=int, default=5, help="每条参考文献的易混淆候选文章数")
+    parser.add_argument("--corruption-rate", type=float, default=0.6)
+    parser.add_argument("--max-corruptions", type=int, default=3)
+    parser.add_argument("--validation", type=float, default=0.3, help="验证集比例（按参考文献划分）")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--regularization", type=float, default=0.5, help="权重偏离默认权重的惩罚系数")
+    parser.add_argument("--keep-identifiers", action="store_true", help="学习时保留关键词中的DOI/PMID")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="data/semantic_weights.json", help="权重文件的保存路径")
+    args = parser.parse_args()
+
+    articles = source_articles(args.source, args.articles, args.seed)
+    if not articles:
+        parser.error(f"未从 {args.source} 读取到文章")
+    corpus = generate_corrupted_corpus(
+        articles, args.references, args.corruption_rate, args.max_corruptions, negative_rate=0.0, seed=args.seed
+    )
+    groups = build_groups(corpus.articles, corpus.references, args.negatives, args.seed, args.keep_identifiers)
+    random.Random(args.seed).shuffle(groups)
+    split = int(len(groups) * (1 - args.validation))
+    train, validation = groups[:split], groups[split:]
+    print(f"语料: 文章库 {len(corpus.articles)} 篇, 训练 {len(train)} 条 / 验证 {len(validation)} 条参考文献"
+          f"（每条 {args.negatives} 篇易混淆文章）")
+
+    # 从内置默认权重开始学习（不读取 SEMANTIC_WEIGHTS_PATH）
+    service = SemanticRerankService(SimilarityService(), weights_path="")
+    baseline = evaluate(service, validation)
+    service.fit_weights(
+        [sample for group in train for sample in group], args.epochs, args.learning_rate, args.regularization
+    )
+    fitted = evaluate(service, validation)
+
+    print(f"{'字段':<20} {'默认':>8} {'学习后':>8}")
+    for name in service.FEATURES:
+        print(f"{name:<20} {SemanticRerankService.DEFAULT_WEIGHTS[name]:>8.3f} {service.weights[name]:>8.3f}")
+    print("\n验证集（正确文章 / 易混淆文章）:")
+    print(f"{'':<8} {'首位命中':>8} {'正确>0.9':>9} {'正确>=0.5':>10} {'混淆>0.9':>9} {'混淆>=0.5':>10}")
+    for name, metrics in (("默认", baseline), ("学习后", fitted)):
+        print(f"{name:<8} {metrics['top1']:>8} {metrics['positive_high']:>9} {metrics['positive_candidate']:>10} "
+              f"{metrics['negative_high']:>9} {metrics['negative_candidate']:>10}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    service.save_weights(args.output)
+    with open(args.output, encoding="utf-8") as f:
+        data = json.load(f)
+    data["validation"] = {"default": baseline, "fitted": fitted}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"\n权重已保存: {args.output}（设置 SEMANTIC_WEIGHTS_PATH 使用）")
+
+
+if __name__ == "__main__":
+    main()
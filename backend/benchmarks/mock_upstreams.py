@@ -0,0 +1,493 @@
+"""本地模拟的 NCBI E-utilities（esearch/efetch/esummary/ecitmatch）、DOI转换服务（ID Converter）和 DashScope 文本生成接口
+
+按语料（见 corpus.py）回答请求，可配置响应延迟和错误注入，并统计每个接口的调用次数。
+
+单独运行（供手工调试或以其他方式压测时使用）：
+    python -m benchmarks.mock_upstreams --port 8765 --eutils-latency 0.1 --llm-latency 0.8
+
+应用通过环境变量指向模拟服务：
+    PUBMED_BASE_URL=http://127.0.0.1:8765/entrez/eutils
+    DASHSCOPE_HTTP_BASE_URL=http://127.0.0.1:8765/api/v1
+    DOI_RESOLVER_URL=http://127.0.0.1:8765/idconv/api/v1/articles/
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+from benchmarks.corpus import Corpus, generate_corpus, load_example_corpus, normalize_text
+
+# PubMed 检索时忽略的常见词
+_STOPWORDS = {"a", "an", "the", "of", "in", "for", "and", "on", "with", "to", "by", "at", "from", "as", "is", "or"}
+
+_CLAUSE = re.compile(r"^(?P<value>.+?)\[(?P<field>[^\]]+)\]$")
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in re.findall(r"[a-z0-9]+", (text or "").lower()) if t not in _STOPWORDS]
+
+
+class UpstreamConfig:
+    """模拟服务的延迟和错误注入配置（延迟单位为秒，jitter 为延迟的相对标准差）"""
+
+    def __init__(
+        self,
+        eutils_latency: float = 0.1,
+        llm_latency: float = 0.8,
+        resolver_latency: float = 0.05,
+        jitter: float = 0.2,
+        eutils_error_rate: float = 0.0,
+        llm_error_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.eutils_latency = eutils_latency
+        self.llm_latency = llm_latency
+        self.resolver_latency = resolver_latency
+        self.jitter = jitter
+        self.eutils_error_rate = eutils_error_rate
+        self.llm_error_rate = llm_error_rate
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class MockUpstreams:
+    """按语料回答 E-utilities 和 DashScope 请求"""
+
+    def __init__(self, corpus: Corpus, config: Optional[UpstreamConfig] = None):
+        self.config = config or UpstreamConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {}
+
+        self.articles: Dict[str, Dict[str, Any]] = {}
+        self.dois: Dict[str, str] = {}
+        self._search_index: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        for article in corpus.articles:
+            self.articles[article["pmid"]] = article
+            if article.get("doi"):
+                self.dois[article["doi"].lower()] = article["pmid"]
+            self._search_index.append((article, {
+                "title": set(_tokens(article["title"])),
+                "journal": set(_tokens(article["journal"])) | set(_tokens(article.get("journal_abbr", ""))),
+                "journal_names": {normalize_text(article["journal"]), normalize_text(article.get("journal_abbr", ""))},
+                "authors": [f"{a['last']} {a['initials']}".lower() for a in article["authors"]],
+                "all": set(_tokens(" ".join([article["title"], article["journal"], article.get("abstract", "")]))),
+            }))
+        self.references: Dict[str, Dict[str, Any]] = {normalize_text(r["text"]): r for r in corpus.references}
+
+    # ---------- 统计、延迟和错误注入 ----------
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def reset_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats, self.stats = self.stats, {}
+        return stats
+
+    async def _delay(self, latency: float) -> None:
+        if latency > 0:
+            with self._lock:
+                value = self._rng.gauss(latency, latency * self.config.jitter)
+            await asyncio.sleep(max(0.0, value))
+
+    def _inject_error(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    # ---------- E-utilities ----------
+
+    def _match_clause(self, value: str, field: str, article: Dict[str, Any], index: Dict[str, Any]) -> bool:
+        value = value.strip()
+        while value.startswith("(") and value.endswith(")"):
+            value = value[1:-1].strip()
+        quoted = len(value) > 1 and value.startswith('"') and value.endswith('"')
+        value = value.strip('"').strip()
+        field = field.strip().lower()
+
+        if field == "title":
+            words = _tokens(value)
+            return bool(words) and all(w in index["title"] for w in words)
+        if field in ("author", "au"):
+            name = value.lower()
+            return any(a == name or a.startswith(name + " ") or (not quoted and a.startswith(name)) for a in index["authors"])
+        if field in ("journal", "ta"):
+            if quoted:
+                return normalize_text(value) in index["journal_names"]
+            words = _tokens(value)
+            return bool(words) and all(w in index["journal"] for w in words)
+        if field in ("publication date", "dp", "pdat"):
+            start, _, end = value.partition(":")
+            try:
+                return int(start[:4]) <= article["year"] <= int((end or start)[:4])
+            except ValueError:
+                return False
+        if field in ("doi", "aid", "lid"):
+            return (article.get("doi") or "").lower() == value.lower()
+        if field in ("pmid", "uid"):
+            return article["pmid"] == value
+        if field in ("volume", "vi"):
+            return str(article.get("volume") or "") == value
+        if field in ("issue", "ip"):
+            return str(article.get("issue") or "") == value
+        words = _tokens(value)
+        return bool(words) and all(w in index["all"] for w in words)
+
+    def esearch(self, term: str) -> List[str]:
+        """按检索式返回匹配的PMID（按语料顺序，子句之间为AND）"""
+        clauses = []
+        for part in re.split(r"\s+AND\s+", term.strip()):
+            match = _CLAUSE.match(part.strip())
+            clauses.append((match.group("value"), match.group("field")) if match else (part, "all fields"))
+        return [
+            article["pmid"] for article, index in self._search_index
+            if all(self._match_clause(value, field, article, index) for value, field in clauses)
+        ]
+
+    def efetch_xml(self, pmids: List[str]) -> str:
+        """PubMed efetch 格式的XML（DOI 与真实数据一样位于 ELocationID 和 PubmedData/ArticleIdList）"""
+        parts = ['<?xml version="1.0" ?>\n<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2024//EN" '
+                 '"https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_240101.dtd">\n<PubmedArticleSet>']
+        for pmid in pmids:
+            article = self.articles.get(pmid)
+            if article is not None:
+                parts.append(self._article_xml(article))
+        parts.append("</PubmedArticleSet>")
+        return "\n".join(parts)
+
+    def esummary_json(self, pmids: List[str]) -> Dict[str, Any]:
+        """PubMed esummary（version 2.0 JSON）格式的文档摘要，作者为"姓 缩写"，不存在的PMID返回 error"""
+        result: Dict[str, Any] = {"uids": []}
+        for pmid in pmids:
+            result["uids"].append(pmid)
+            a = self.articles.get(pmid)
+            if a is None:
+                result[pmid] = {"uid": pmid, "error": "cannot get document summary"}
+                continue
+            result[pmid] = {
+                "uid": pmid,
+                "pubdate": str(a["year"]),
+                "source": a.get("journal_abbr", ""),
+                "authors": [{"name": f"{au['last']} {au['initials']}", "authtype": "Author", "clusterid": ""}
+                            for au in a["authors"]],
+                "title": f"{a['title']}.",
+                "volume": a.get("volume") or "",
+                "issue": a.get("issue") or "",
+                "pages": a.get("pages") or "",
+                "articleids": [{"idtype": "pubmed", "idtypen": 1, "value": pmid}]
+                              + ([{"idtype": "doi", "idtypen": 3, "value": a["doi"]}] if a.get("doi") else []),
+                "fulljournalname": a["journal"],
+                "elocationid": f"doi: {a['doi']}" if a.get("doi") else "",
+                "sortpubdate": f"{a['year']}/01/01 00:00",
+            }
+        return {"header": {"type": "esummary", "version": "0.3"}, "result": result}
+
+    @staticmethod
+    def _article_xml(a: Dict[str, Any]) -> str:
+        authors = "".join(
+            f'<Author ValidYN="Y"><LastName>{escape(au["last"])}</LastName><ForeName>{escape(au["fore"])}</ForeName>'
+            f'<Initials>{escape(au["initials"])}</Initials></Author>'
+            for au in a["authors"]
+        )
+        start_page, _, end_page = (a.get("pages") or "").partition("-")
+        pagination = f"<StartPage>{escape(start_page)}</StartPage>"
+        if end_page:
+            pagination += f"<EndPage>{escape(end_page)}</EndPage>"
+        issue = f"<Issue>{escape(a['issue'])}</Issue>" if a.get("issue") else ""
+        doi = escape(a.get("doi") or "")
+        return (
+            f'<PubmedArticle><MedlineCitation Status="MEDLINE" Owner="NLM"><PMID Version="1">{a["pmid"]}</PMID>'
+            f'<Article PubModel="Print"><Journal><JournalIssue CitedMedium="Internet"><Volume>{escape(a.get("volume") or "")}</Volume>'
+            f'{issue}<PubDate><Year>{a["year"]}</Year></PubDate></JournalIssue>'
+            f'<Title>{escape(a["journal"])}</Title><ISOAbbreviation>{escape(a.get("journal_abbr", ""))}</ISOAbbreviation></Journal>'
+            f'<ArticleTitle>{escape(a["title"])}.</ArticleTitle><Pagination>{pagination}'
+            f'<MedlinePgn>{escape(a.get("pages") or "")}</MedlinePgn></Pagination>'
+            f'<ELocationID EIdType="doi" ValidYN="Y">{doi}</ELocationID>'
+            f'<Abstract><AbstractText>{escape(a.get("abstract") or "")}</AbstractText></Abstract>'
+            f'<AuthorList CompleteYN="Y">{authors}</AuthorList><Language>eng</Language></Article>'
+            f'<MedlineJournalInfo><MedlineTA>{escape(a.get("journal_abbr", ""))}</MedlineTA></MedlineJournalInfo>'
+            f'</MedlineCitation><PubmedData><ArticleIdList><ArticleId IdType="pubmed">{a["pmid"]}</ArticleId>'
+            f'<ArticleId IdType="doi">{doi}</ArticleId></ArticleIdList></PubmedData></PubmedArticle>'
+        )
+
+    def ecitmatch(self, bdata: str) -> str:
+        """引文匹配：每行 journal|year|volume|first_page|author|key|，返回的行末尾附加PMID或NOT_FOUND"""
+        lines = []
+        for line in re.split(r"[\r\n]+", bdata.strip()):
+            if not line:
+                continue
+            fields = (line.split("|") + [""] * 6)[:6]
+            journal, year, volume, first_page, author, _ = (f.strip() for f in fields)
+            found = "NOT_FOUND"
+            for article, index in self._search_index:
+                if journal and normalize_text(journal) not in index["journal_names"]:
+                    continue
+                if year and str(article["year"]) != year:
+                    continue
+                if volume and str(article.get("volume") or "") != volume:
+                    continue
+                if first_page and (article.get("pages") or "").split("-")[0] != first_page:
+                    continue
+                if author and not any(a.startswith(author.lower()) for a in index["authors"]):
+                    continue
+                found = article["pmid"]
+                break
+            lines.append(f"{line.rstrip('|')}|{found}")
+        return "\n".join(lines) + "\n"
+
+    # ---------- DashScope ----------
+
+    def generate(self, prompt: str) -> str:
+        """按提示词类型（拆分/关键词提取/相似度评估）生成模拟的大模型输出"""
+        if "输入文本：\n" in prompt:
+            return json.dumps(self._split(_between(prompt, "输入文本：\n", "\n\n请返回JSON数组格式")), ensure_ascii=False)
+        if "参考文献文本：\n" in prompt:
+            return json.dumps(self._extract(_between(prompt, "参考文献文本：\n", "\n\n请返回JSON格式")), ensure_ascii=False)
+        if "原始参考文献：\n" in prompt:
+            original = _between(prompt, "原始参考文献：\n", "\n\n候选文章：")
+            candidates = re.split(r"\n\n候选文章 \d+:\n", "\n\n" + _between(prompt, "候选文章：\n", "\n\n请为每篇候选文章"))[1:]
+            return json.dumps({"results": self._evaluate(original, candidates)}, ensure_ascii=False)
+        return "{}"
+
+    def _split(self, text: str) -> List[Dict[str, Any]]:
+        results = []
+        for line in text.splitlines():
+            cleaned = re.sub(r"^\s*(\[\d+\]|\d+[.、)])\s*", "", line).strip()
+            # 参考文献至少包含一个年份，跳过标题等无关行
+            if len(cleaned) < 20 or not re.search(r"\b(19|20)\d{2}\b", cleaned):
+                continue
+            known = self.references.get(normalize_text(cleaned))
+            results.append({
+                "id": f"ref_{len(results) + 1}",
+                "text": cleaned,
+                "format_type": known.get("style", "original") if known else "original",
+            })
+        return results
+
+    def _extract(self, text: str) -> Dict[str, Any]:
+        known = self.references.get(normalize_text(text))
+        if known is not None:
+            return dict(known["keywords"])
+        # 语料外的文本：按 "作者. 标题. 期刊. 年份;卷(期):页码" 粗略解析
+        result: Dict[str, Any] = {}
+        segments = [s.strip() for s in re.split(r"\.\s+", text) if s.strip()]
+        if segments:
+            result["authors"] = [a.strip() for a in segments[0].split(",") if a.strip()]
+        if len(segments) > 1:
+            result["title"] = segments[1]
+        if len(segments) > 2:
+            result["journal"] = segments[2]
+        year = re.search(r"\b(19|20)\d{2}\b", text)
+        if year:
+            result["year"] = int(year.group())
+        doi = re.search(r"10\.\d{4,9}/\S+[^\s.]", text)
+        if doi:
+            result["doi"] = doi.group()
+        pmid = re.search(r"PMID:?\s*(\d+)", text)
+        if pmid:
+            result["pmid"] = pmid.group(1)
+        return result
+
+    def _evaluate(self, original: str, candidates: List[str]) -> List[Dict[str, Any]]:
+        def fields(block: str) -> Dict[str, str]:
+            values = {}
+            for line in block.splitlines():
+                key, _, value = line.partition(": ")
+                values[key.strip()] = value.strip()
+            return values
+
+        source = fields(original)
+        source_title = set(_tokens(source.get("标题", "")))
+        results = []
+        for idx, block in enumerate(candidates, 1):
+            candidate = fields(block)
+            title = set(_tokens(candidate.get("标题", "")))
+            union = source_title | title
+            score = 0.7 * (len(source_title & title) / len(union) if union else 0.0)
+            if source.get("年份") and source.get("年份") == candidate.get("年份"):
+                score += 0.15
+            first_author = source.get("作者", "").split(",")[0].strip().lower()
+            if first_author and first_author in candidate.get("作者", "").lower():
+                score += 0.15
+            results.append({"index": idx, "similarity": round(score, 4), "reason": "模拟评估"})
+        return results
+
+    # ---------- HTTP 服务 ----------
+
+    def create_app(self) -> FastAPI:
+        app = FastAPI(title="模拟上游服务（基准测试）")
+
+        @app.get("/entrez/eutils/esearch.fcgi")
+        async def esearch(request: Request):
+            self.count("esearch")
+            await self._delay(self.config.eutils_latency)
+            if self._inject_error(self.config.eutils_error_rate):
+                self.count("esearch_injected_errors")
+                return JSONResponse({"error": "API rate limit exceeded"}, status_code=429)
+            params = request.query_params
+            pmids = self.esearch(params.get("term", ""))
+            retmax = int(params.get("retmax", "20"))
+            return JSONResponse({
+                "header": {"type": "esearch", "version": "0.3"},
+                "esearchresult": {
+                    "count": str(len(pmids)), "retmax": str(min(retmax, len(pmids))), "retstart": "0",
+                    "idlist": pmids[:retmax],
+                },
+            })
+
+        @app.get("/entrez/eutils/efetch.fcgi")
+        async def efetch(request: Request):
+            self.count("efetch")
+            await self._delay(self.config.eutils_latency)
+            if self._inject_error(self.config.eutils_error_rate):
+                self.count("efetch_injected_errors")
+                return JSONResponse({"error": "API rate limit exceeded"}, status_code=429)
+            pmids = [p.strip() for p in request.query_params.get("id", "").split(",") if p.strip()]
+            self.count("efetch_ids", len(pmids))
+            content = self.efetch_xml(pmids).encode()
+            self.count("efetch_bytes", len(content))
+            return Response(content, media_type="text/xml")
+
+        @app.get("/entrez/eutils/esummary.fcgi")
+        async def esummary(request: Request):
+            self.count("esummary")
+            await self._delay(self.config.eutils_latency)
+            if self._inject_error(self.config.eutils_error_rate):
+                self.count("esummary_injected_errors")
+                return JSONResponse({"error": "API rate limit exceeded"}, status_code=429)
+            pmids = [p.strip() for p in request.query_params.get("id", "").split(",") if p.strip()]
+            self.count("esummary_ids", len(pmids))
+            content = json.dumps(self.esummary_json(pmids), ensure_ascii=False).encode()
+            self.count("esummary_bytes", len(content))
+            return Response(content, media_type="application/json")
+
+        @app.get("/entrez/eutils/ecitmatch.cgi")
+        async def ecitmatch(request: Request):
+            self.count("ecitmatch")
+            await self._delay(self.config.eutils_latency)
+            if self._inject_error(self.config.eutils_error_rate):
+                self.count("ecitmatch_injected_errors")
+                return PlainTextResponse("API rate limit exceeded", status_code=429)
+            return PlainTextResponse(self.ecitmatch(request.query_params.get("bdata", "")))
+
+        @app.get("/idconv/api/v1/articles/")
+        async def idconv(request: Request):
+            self.count("doi_resolver")
+            await self._delay(self.config.resolver_latency)
+            records = []
+            for doi in request.query_params.get("ids", "").split(","):
+                pmid = self.dois.get(doi.strip().lower())
+                records.append({"doi": doi, "pmid": int(pmid)} if pmid else
+                               {"doi": doi, "status": "error", "errmsg": "Identifier not found in PMC"})
+            return JSONResponse({"status": "ok", "records": records})
+
+        @app.post("/api/v1/services/aigc/text-generation/generation")
+        async def generation(request: Request):
+            self.count("dashscope")
+            body = await request.json()
+            await self._delay(self.config.llm_latency)
+            request_id = str(uuid.uuid4())
+            if self._inject_error(self.config.llm_error_rate):
+                self.count("dashscope_injected_errors")
+                return JSONResponse(
+                    {"code": "Throttling.RateQuota", "message": "Requests rate limit exceeded", "request_id": request_id},
+                    status_code=429
+                )
+            payload = body.get("input", {})
+            prompt = payload.get("prompt") or "\n".join(m.get("content", "") for m in payload.get("messages", []))
+            text = self.generate(prompt)
+            return JSONResponse({
+                "output": {"text": text, "finish_reason": "stop"},
+                "usage": {"input_tokens": len(prompt), "output_tokens": len(text), "total_tokens": len(prompt) + len(text)},
+                "request_id": request_id,
+            })
+
+        @app.get("/_stats")
+        async def stats():
+            with self._lock:
+                return dict(self.stats)
+
+        @app.post("/_reset")
+        async def reset():
+            return self.reset_stats()
+
+        return app
+
+
+def _between(text: str, start: str, end: str) -> str:
+    begin = text.index(start) + len(start)
+    stop = text.find(end, begin)
+    return text[begin:stop if stop >= 0 else len(text)]
+
+
+def serve_in_background(app, host: str = "127.0.0.1", port: int = 0):
+    """在后台线程中运行 uvicorn（port=0 时自动选择端口），返回 (server, 实际端口)"""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("模拟服务启动失败")
+        time.sleep(0.01)
+    actual_port = server.servers[0].sockets[0].getsockname()[1]
+    return server, actual_port
+
+
+def add_upstream_arguments(parser: argparse.ArgumentParser) -> None:
+    group = parser.add_argument_group("模拟上游服务")
+    group.add_argument("--eutils-latency", type=float, default=0.1, help="E-utilities 平均响应延迟（秒）")
+    group.add_argument("--llm-latency", type=float, default=0.8, help="DashScope 平均响应延迟（秒）")
+    group.add_argument("--resolver-latency", type=float, default=0.05, help="DOI转换服务平均响应延迟（秒）")
+    group.add_argument("--jitter", type=float, default=0.2, help="延迟的相对标准差")
+    group.add_argument("--eutils-error-rate", type=float, default=0.0, help="E-utilities 返回429的比例")
+    group.add_argument("--llm-error-rate", type=float, default=0.0, help="DashScope 返回429的比例")
+
+
+def config_from_args(args: argparse.Namespace) -> UpstreamConfig:
+    return UpstreamConfig(
+        eutils_latency=args.eutils_latency,
+        llm_latency=args.llm_latency,
+        resolver_latency=args.resolver_latency,
+        jitter=args.jitter,
+        eutils_error_rate=args.eutils_error_rate,
+        llm_error_rate=args.llm_error_rate,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地模拟 NCBI E-utilities 和 DashScope")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--corpus", help="语料JSON文件（Corpus.save 生成）；不指定时生成默认语料")
+    parser.add_argument("--seed", type=int, default=42)
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = Corpus.load(args.corpus)
+    else:
+        corpus = generate_corpus(seed=args.seed).extend(load_example_corpus())
+
+    import uvicorn
+    uvicorn.run(MockUpstreams(corpus, config_from_args(args)).create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""匹配准确率 vs 延迟基准测试
+
+用 corrupted_corpus.py 生成带标注的损坏参考文献，对每种匹配模式分别启动一个全新的应用进程
+（冷缓存），直接以参考文献的字段调用 /api/search，统计：
+- 精确率（返回首篇文章正确的比例，按有返回结果的参考文献计）、召回率（按有对应文章的参考文献计）、F1
+- 正确文章出现在返回结果中任意位置的比例
+- 每条参考文献的平均上游调用次数（E-utilities、DashScope）
+- 检索延迟 p50/p95/p99
+- 按错误类型和参考文献格式分组的首位命中率
+
+在 backend 目录下运行：
+    python -m benchmarks.run_accuracy --modes traditional,smart --output accuracy.json
+    python -m benchmarks.run_accuracy --source data/cache.db   # 使用共享缓存中已获取的真实PubMed文章
+    python -m benchmarks.run_accuracy --modes traditional,local  # 对比本地PubMed镜像
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.corpus import Corpus
+from benchmarks.corrupted_corpus import CORRUPTIONS, generate_corrupted_corpus, source_articles
+from benchmarks.mock_upstreams import MockUpstreams, add_upstream_arguments, config_from_args, serve_in_background
+from benchmarks.run_benchmark import latency_summary, parse_env, running_app
+from app.services.local_pubmed import LocalPubMedStore
+
+# 匹配模式：检索请求中的参数，以及应用进程的额外环境变量。新的匹配模式在此登记即可参与对比
+# mirror: 该模式需要由文章库导入的本地PubMed镜像（LOCAL_PUBMED_DB）
+MATCHING_MODES: Dict[str, Dict[str, Any]] = {
+    "traditional": {"body": {"use_smart_matching": False}, "env": {}},
+    "smart": {"body": {"use_smart_matching": True}, "env": {}},
+    "semantic": {"body": {"use_smart_matching": False, "use_semantic_matching": True}, "env": {}},
+    "local": {"body": {"use_smart_matching": False}, "env": {"PUBMED_BACKEND": "local"}, "mirror": True},
+    "local_racing": {
+        "body": {"use_smart_matching": False},
+        "env": {"PUBMED_BACKEND": "local,eutils,doi_resolver", "LOOKUP_RACING": "true"},
+        "mirror": True,
+    },
+}
+
+# 计入"上游调用"的模拟服务接口
+UPSTREAM_ENDPOINTS = ("esearch", "efetch", "esummary", "ecitmatch", "dashscope", "efetch_bytes", "esummary_bytes")
+
+
+def build_mirror(mock: MockUpstreams, db_path: str) -> None:
+    """把模拟服务的文章库（efetch 格式的XML）导入本地PubMed镜像"""
+    xml = mock.efetch_xml(list(mock.articles))
+    LocalPubMedStore(db_path).ingest(io.BytesIO(xml.encode("utf-8")), name="benchmark.xml")
+
+
+def score_results(references: List[Dict[str, Any]], results: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """按 ground truth 计算精确率、召回率，以及按错误类型和格式分组的首位命中率"""
+    predicted = correct = positives = found_anywhere = false_positives = 0
+    groups: Dict[str, Dict[str, Dict[str, int]]] = {"corruption": {}, "style": {}}
+
+    def tally(group: str, key: str, hit: bool) -> None:
+        entry = groups[group].setdefault(key, {"total": 0, "top1_correct": 0})
+        entry["total"] += 1
+        entry["top1_correct"] += int(hit)
+
+    for reference, result in zip(references, results):
+        articles = (result or {}).get("matched_articles") or []
+        top_pmid = articles[0].get("pmid") if articles else None
+        truth = reference.get("pmid")
+        if top_pmid is not None:
+            predicted += 1
+        if truth is None:
+            # 库外参考文献：返回任何文章都是误报
+            false_positives += int(top_pmid is not None)
+            continue
+        positives += 1
+        hit = top_pmid == truth
+        correct += int(hit)
+        found_anywhere += int(any(a.get("pmid") == truth for a in articles))
+        for name in reference.get("corruptions") or ["none"]:
+            tally("corruption", name, hit)
+        tally("style", reference.get("style", "unknown"), hit)
+
+    precision = correct / predicted if predicted else None
+    recall = correct / positives if positives else None
+    f1 = 2 * precision * recall / (precision + recall) if precision and recall else None
+    for group in groups.values():
+        for entry in group.values():
+            entry["top1_rate"] = round(entry["top1_correct"] / entry["total"], 4)
+    return {
+        "references": len(references),
+        "positives": positives,
+        "predicted": predicted,
+        "top1_correct": correct,
+        "false_positives": false_positives,
+        "precision": round(precision, 4) if precision is not None else None,
+        "recall": round(recall, 4) if recall is not None else None,
+        "f1": round(f1, 4) if f1 is not None else None,
+        "recall_any_position": round(found_anywhere / positives, 4) if positives else None,
+        "by_corruption": groups["corruption"],
+        "by_style": groups["style"],
+    }
+
+
+async def run_mode(app_url: str, mock_url: str, corpus: Corpus, body: Dict[str, Any], concurrency: int) -> Dict[str, Any]:
+    """对一个匹配模式检索全部参考文献"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+
+    async def search(client: httpx.AsyncClient, idx: int, reference: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    f"{app_url}/api/search/ref_{idx + 1}", json={**reference["keywords"], **body}
+                )
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return None
+            latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+            return None
+        return response.json()
+
+    async with httpx.AsyncClient(timeout=httpx.Timeout(600.0), limits=httpx.Limits(max_connections=concurrency + 4)) as client:
+        await client.post(f"{mock_url}/_reset")
+        start = time.perf_counter()
+        results = await asyncio.gather(*[search(client, idx, ref) for idx, ref in enumerate(corpus.references)])
+        duration = time.perf_counter() - start
+        upstream = (await client.get(f"{mock_url}/_stats")).json()
+
+    count = len(corpus.references) or 1
+    calls = {name: upstream.get(name, 0) for name in UPSTREAM_ENDPOINTS}
+    return {
+        "duration_s": round(duration, 3),
+        "references_per_s": round(len(corpus.references) / duration, 3) if duration else 0.0,
+        "latency": latency_summary(latencies),
+        "upstream_calls": calls,
+        "upstream_calls_per_reference": {name: round(value / count, 3) for name, value in calls.items()},
+        "errors": errors,
+        "accuracy": score_results(corpus.references, results),
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{'模式':<12} {'精确率':>8} {'召回率':>8} {'F1':>8} {'任意位置':>8} {'误报':>5} "
+          f"{'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'E-utils/条':>11} {'KB/条':>8} {'大模型/条':>10}")
+    for name, result in report["modes"].items():
+        accuracy, latency, per_ref = result["accuracy"], result["latency"], result["upstream_calls_per_reference"]
+        eutils = per_ref["esearch"] + per_ref["efetch"] + per_ref["esummary"] + per_ref["ecitmatch"]
+        # efetch 和 esummary 的响应大小
+        kilobytes = (per_ref["efetch_bytes"] + per_ref["esummary_bytes"]) / 1024
+        print(f"{name:<12} {str(accuracy['precision']):>8} {str(accuracy['recall']):>8} {str(accuracy['f1']):>8} "
+              f"{str(accuracy['recall_any_position']):>8} {accuracy['false_positives']:>5} "
+              f"{latency.get('p50_ms', '-'):>9} {latency.get('p95_ms', '-'):>9} {latency.get('p99_ms', '-'):>9} "
+              f"{eutils:>11.2f} {kilobytes:>8.1f} {per_ref['dashscope']:>10.2f}")
+    print("\n按错误类型的首位命中率:")
+    for corruption in ("none",) + CORRUPTIONS:
+        cells = []
+        for name, result in report["modes"].items():
+            entry = result["accuracy"]["by_corruption"].get(corruption)
+            cells.append(f"{name}={entry['top1_rate']}({entry['total']})" if entry else f"{name}=-")
+        print(f"  {corruption:<22} " + "  ".join(cells))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="损坏参考文献的匹配准确率与延迟对比")
+    parser.add_argument("--modes", default="traditional,smart",
+                        help=f"逗号分隔的匹配模式（可选: {', '.join(MATCHING_MODES)}）")
+    parser.add_argument("--source", default="generated",
+                        help="文章来源: generated、共享缓存数据库路径（*.db）或 Corpus JSON 文件")
+    parser.add_argument("--articles", type=int, default=500, help="使用的文章数")
+    parser.add_argument("--references", type=int, default=200, help="生成的参考文献数")
+    parser.add_argument("--corruption-rate", type=float, default=0.6, help="施加错误的参考文献比例")
+    parser.add_argument("--max-corruptions", type=int, default=3, help="每条参考文献最多施加的错误种数")
+    parser.add_argument("--negative-rate", type=float, default=0.1, help="不放入文章库的文章比例（库外参考文献）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=8, help="同时进行的检索请求数")
+    parser.add_argument("--ncbi-rate-limit", type=float, default=50.0, help="应用的 NCBI_RATE_LIMIT")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="传给应用进程的其他环境变量")
+    parser.add_argument("--save-corpus", help="保存生成的语料（JSON）")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MATCHING_MODES]
+    if unknown:
+        parser.error(f"未知的匹配模式: {', '.join(unknown)}")
+
+    articles = source_articles(args.source, args.articles, args.seed)
+    if not articles:
+        parser.error(f"未从 {args.source} 读取到文章")
+    corpus = generate_corrupted_corpus(
+        articles, args.references, args.corruption_rate, args.max_corruptions, args.negative_rate, seed=args.seed
+    )
+    if args.save_corpus:
+        corpus.save(args.save_corpus)
+    print(f"语料: 文章库 {len(corpus.articles)} 篇, 参考文献 {len(corpus.references)} 条"
+          f"（库外 {sum(1 for r in corpus.references if r['pmid'] is None)} 条）")
+
+    mock = MockUpstreams(corpus, config_from_args(args))
+    mock_server, mock_port = serve_in_background(mock.create_app())
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    results = {}
+    mirror_dir = tempfile.TemporaryDirectory(prefix="accuracy-mirror-")
+    mirror_db = os.path.join(mirror_dir.name, "pubmed.db")
+    if any(MATCHING_MODES[mode].get("mirror") for mode in modes):
+        build_mirror(mock, mirror_db)
+    try:
+        for mode in modes:
+            # 每个模式使用全新的应用进程，上游调用次数和延迟都从冷缓存开始统计
+            env = {**MATCHING_MODES[mode]["env"], **parse_env(args.env)}
+            if MATCHING_MODES[mode].get("mirror"):
+                env.setdefault("LOCAL_PUBMED_DB", mirror_db)
+            with running_app(mock_url, args.ncbi_rate_limit, extra_env=env) as (app_url, log_path):
+                print(f"运行模式 {mode}（应用日志: {log_path}）")
+                results[mode] = asyncio.run(
+                    run_mode(app_url, mock_url, corpus, MATCHING_MODES[mode]["body"], args.concurrency)
+                )
+    finally:
+        mock_server.should_exit = True
+        mirror_dir.cleanup()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "save_corpus")},
+        "upstream": mock.config.to_dict(),
+        "modes": results,
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
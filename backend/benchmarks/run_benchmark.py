@@ -0,0 +1,354 @@
+"""离线重放基准测试
+
+启动本地模拟上游服务（mock_upstreams.py）和指向它的应用进程，按参考文献列表重放
+/api/split → /api/search → /api/format 流程，统计每一轮的吞吐量、各接口延迟分位数、
+上游调用次数和缓存命中率。相同的参数和随机种子总是重放相同的语料，结果可以与基线对比。
+
+在 backend 目录下运行：
+    python -m benchmarks.run_benchmark --output baseline.json
+    python -m benchmarks.run_benchmark --baseline baseline.json --output current.json
+"""
+from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.corpus import Corpus, generate_corpus, load_example_corpus, normalize_text
+from benchmarks.mock_upstreams import MockUpstreams, add_upstream_arguments, config_from_args, serve_in_background
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_METRIC_LINE = re.compile(r'^(?P<name>[a-z_]+)\{(?P<labels>[^}]*)\} (?P<value>[0-9.eE+-]+)$')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+def parse_counters(text: str, name: str) -> Dict[str, float]:
+    """从 /metrics 输出中取出一个计数器，键为标签值（按标签顺序用 / 连接）"""
+    counters: Dict[str, float] = {}
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match and match.group("name") == name:
+            labels = re.findall(r'="((?:[^"\\]|\\.)*)"', match.group("labels"))
+            counters["/".join(labels)] = float(match.group("value"))
+    return counters
+
+
+def cache_hit_rates(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Dict[str, Any]]:
+    """按缓存统计本轮的命中次数和命中率（refval_cache_requests_total 的增量）"""
+    caches: Dict[str, Dict[str, Any]] = {}
+    for key, value in after.items():
+        cache, _, result = key.rpartition("/")
+        delta = value - before.get(key, 0.0)
+        entry = caches.setdefault(cache, {"hits": 0, "misses": 0})
+        entry["hits" if result in ("hit", "shared_hit") else "misses"] += int(delta)
+    for entry in caches.values():
+        total = entry["hits"] + entry["misses"]
+        entry["hit_rate"] = round(entry["hits"] / total, 4) if total else None
+    return caches
+
+
+class BenchmarkRunner:
+    """对运行中的应用重放一轮工作负载"""
+
+    def __init__(self, app_url: str, mock_url: str, corpus: Corpus, args: argparse.Namespace):
+        self.app_url = app_url
+        self.mock_url = mock_url
+        self.corpus = corpus
+        self.args = args
+        self.expected = {normalize_text(r["text"]): r.get("pmid") for r in corpus.references}
+
+    async def run_pass(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        await client.post(f"{self.mock_url}/_reset")
+        metrics_before = (await client.get(f"{self.app_url}/metrics")).text
+
+        self._latencies: Dict[str, List[float]] = {"split": [], "search": [], "format": []}
+        self._errors: Dict[str, int] = {}
+        self._accuracy = {"evaluated": 0, "top1_correct": 0}
+        self._semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[self._run_bibliography(client, text) for text in self.corpus.bibliographies])
+        duration = time.perf_counter() - start
+
+        upstream = (await client.get(f"{self.mock_url}/_stats")).json()
+        metrics_after = (await client.get(f"{self.app_url}/metrics")).text
+        requests_total = sum(len(v) for v in self._latencies.values())
+        references = len(self._latencies["search"])
+        evaluated = self._accuracy["evaluated"]
+        return {
+            "duration_s": round(duration, 3),
+            "throughput": {
+                "requests_per_s": round(requests_total / duration, 3) if duration else 0.0,
+                "references_per_s": round(references / duration, 3) if duration else 0.0,
+            },
+            "latency": {endpoint: latency_summary(values) for endpoint, values in self._latencies.items()},
+            "errors": self._errors,
+            "upstream_calls": upstream,
+            "cache": cache_hit_rates(
+                parse_counters(metrics_before, "refval_cache_requests_total"),
+                parse_counters(metrics_after, "refval_cache_requests_total"),
+            ),
+            "accuracy": {
+                **self._accuracy,
+                "top1_rate": round(self._accuracy["top1_correct"] / evaluated, 4) if evaluated else None,
+            },
+        }
+
+    async def _request(self, client: httpx.AsyncClient, endpoint: str, path: str, body: Dict[str, Any]) -> Optional[Any]:
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{self.app_url}{path}", json=body)
+            except httpx.HTTPError as e:
+                key = f"{endpoint}:{type(e).__name__}"
+                self._errors[key] = self._errors.get(key, 0) + 1
+                return None
+            self._latencies[endpoint].append(time.perf_counter() - start)
+        if response.status_code != 200:
+            key = f"{endpoint}:{response.status_code}"
+            self._errors[key] = self._errors.get(key, 0) + 1
+            return None
+        return response.json()
+
+    async def _run_bibliography(self, client: httpx.AsyncClient, text: str) -> None:
+        split = await self._request(client, "split", "/api/split", {"text": text})
+        if not split:
+            return
+        references = split.get("references", [])
+        await asyncio.gather(*[self._search(client, reference) for reference in references])
+        await self._request(client, "format", "/api/format", {
+            "target_format": self.args.target_format,
+            "references": [
+                {"id": r["id"], "text": r["original_text"], "data": r.get("extracted_keywords") or {}}
+                for r in references
+            ],
+        })
+
+    async def _search(self, client: httpx.AsyncClient, reference: Dict[str, Any]) -> None:
+        body = {
+            **(reference.get("extracted_keywords") or {}),
+            "use_smart_matching": self.args.smart_matching,
+            "use_semantic_matching": self.args.semantic_matching,
+        }
+        result = await self._request(client, "search", f"/api/search/{reference['id']}", body)
+        expected = self.expected.get(normalize_text(reference.get("original_text", "")))
+        if result is None or expected is None:
+            return
+        self._accuracy["evaluated"] += 1
+        articles = result.get("matched_articles") or []
+        if articles and articles[0].get("pmid") == expected:
+            self._accuracy["top1_correct"] += 1
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(port: int, env: Dict[str, str], workers: int, log_path: str) -> subprocess.Popen:
+    log_file = open(log_path, "w", encoding="utf-8")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log_file, stderr=subprocess.STDOUT
+    )
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"应用进程已退出（返回码 {process.returncode}），请查看应用日志")
+        try:
+            if httpx.get(f"{url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("等待应用启动超时")
+
+
+def parse_env(items: List[str]) -> Dict[str, str]:
+    """解析 --env KEY=VALUE 参数"""
+    env = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        env[key.strip()] = value
+    return env
+
+
+@contextmanager
+def running_app(mock_url: str, ncbi_rate_limit: float, workers: int = 1, extra_env: Optional[Dict[str, str]] = None):
+    """启动指向模拟服务的应用进程（使用独立的临时数据目录，缓存为冷缓存，退出时删除），返回 (应用地址, 日志路径)"""
+    with tempfile.TemporaryDirectory(prefix="refval-bench-") as workdir:
+        env = {
+            **os.environ,
+            "PUBMED_BASE_URL": f"{mock_url}/entrez/eutils",
+            "DASHSCOPE_HTTP_BASE_URL": f"{mock_url}/api/v1",
+            "DOI_RESOLVER_URL": f"{mock_url}/idconv/api/v1/articles/",
+            "DASHSCOPE_API_KEY": "benchmark",
+            "NCBI_RATE_LIMIT": str(ncbi_rate_limit),
+            "JOB_DB_PATH": os.path.join(workdir, "jobs.db"),
+            "CACHE_DB_PATH": os.path.join(workdir, "cache.db"),
+            "LOG_LEVEL": "WARNING",
+            **(extra_env or {}),
+        }
+        port = free_port()
+        app_url = f"http://127.0.0.1:{port}"
+        log_path = os.path.join(workdir, "app.log")
+        process = start_app(port, env, workers, log_path)
+        try:
+            wait_until_ready(app_url, process)
+            yield app_url, log_path
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def build_corpus(args: argparse.Namespace) -> Corpus:
+    corpus = Corpus()
+    if not args.no_examples:
+        corpus.extend(load_example_corpus())
+    if args.references > 0:
+        corpus.extend(generate_corpus(args.articles, args.references, args.refs_per_bibliography, args.seed))
+    return corpus
+
+
+def _delta(new: Optional[float], old: Optional[float]) -> str:
+    if new is None or old is None:
+        return ""
+    if old == 0:
+        return "" if new == 0 else "(新增)"
+    return f"({(new - old) / old * 100:+.1f}%)"
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    """打印每一轮的结果；指定基线时在每项指标后附加相对基线的变化"""
+    baseline_passes = (baseline or {}).get("passes", [])
+    for idx, result in enumerate(report["passes"]):
+        old = baseline_passes[idx] if idx < len(baseline_passes) else {}
+        print(f"\n=== 第 {idx + 1} 轮（{'冷缓存' if idx == 0 else '热缓存'}）: {result['duration_s']}s {_delta(result['duration_s'], old.get('duration_s'))}")
+        for key, value in result["throughput"].items():
+            print(f"  {key:<22} {value:>10} {_delta(value, old.get('throughput', {}).get(key))}")
+        for endpoint, summary in result["latency"].items():
+            old_summary = old.get("latency", {}).get(endpoint, {})
+            cells = [
+                f"{name}={summary.get(name + '_ms')}ms{_delta(summary.get(name + '_ms'), old_summary.get(name + '_ms'))}"
+                for name in ("p50", "p95", "p99")
+            ]
+            print(f"  {endpoint:<8} n={summary['count']:<5} " + "  ".join(cells))
+        print("  上游调用: " + ", ".join(
+            f"{key}={value}{_delta(value, old.get('upstream_calls', {}).get(key))}"
+            for key, value in sorted(result["upstream_calls"].items())
+        ))
+        print("  缓存命中率: " + ", ".join(
+            f"{cache}={entry['hit_rate']}({entry['hits']}/{entry['hits'] + entry['misses']})"
+            for cache, entry in sorted(result["cache"].items())
+        ))
+        accuracy = result["accuracy"]
+        print(f"  首位命中: {accuracy['top1_correct']}/{accuracy['evaluated']} "
+              f"{_delta(accuracy['top1_rate'], old.get('accuracy', {}).get('top1_rate'))}")
+        if result["errors"]:
+            print(f"  错误: {result['errors']}")
+
+
+async def _run_passes(runner: BenchmarkRunner, passes: int) -> List[Dict[str, Any]]:
+    results = []
+    limits = httpx.Limits(max_connections=runner.args.concurrency + 4)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(600.0), limits=limits) as client:
+        for _ in range(passes):
+            results.append(await runner.run_pass(client))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="离线重放基准测试（本地模拟 NCBI 和 DashScope）")
+    parser.add_argument("--articles", type=int, default=500, help="生成的文章库大小")
+    parser.add_argument("--references", type=int, default=100, help="生成的参考文献数（0表示只使用示例参考文献）")
+    parser.add_argument("--refs-per-bibliography", type=int, default=20, help="每个参考文献列表（一次 /api/split）的条数")
+    parser.add_argument("--no-examples", action="store_true", help="不包含 EXAMPLE_REFERENCES.txt")
+    parser.add_argument("--seed", type=int, default=42, help="语料和模拟延迟的随机种子")
+    parser.add_argument("--passes", type=int, default=2, help="重放轮数（第一轮为冷缓存，之后为热缓存）")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时进行的请求数")
+    parser.add_argument("--workers", type=int, default=1, help="应用的 uvicorn 工作进程数")
+    parser.add_argument("--smart-matching", action="store_true", help="检索时启用智能匹配（大模型评估）")
+    parser.add_argument("--semantic-matching", action="store_true", help="检索时启用本地语义重排序")
+    parser.add_argument("--target-format", default="nlm", help="/api/format 的目标格式")
+    parser.add_argument("--ncbi-rate-limit", type=float, default=50.0,
+                        help="应用的 NCBI_RATE_LIMIT（默认放宽，避免测量结果被真实配额主导）")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="传给应用进程的其他环境变量（如 CACHE_BACKEND=sqlite），可重复")
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    parser.add_argument("--baseline", help="基线结果JSON，打印相对基线的变化")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args)
+    mock = MockUpstreams(corpus, config_from_args(args))
+    mock_server, mock_port = serve_in_background(mock.create_app())
+    mock_url = f"http://127.0.0.1:{mock_port}"
+
+    try:
+        with running_app(mock_url, args.ncbi_rate_limit, args.workers, parse_env(args.env)) as (app_url, log_path):
+            print(f"语料: {len(corpus.articles)} 篇文章, {len(corpus.references)} 条参考文献, "
+                  f"{len(corpus.bibliographies)} 个参考文献列表; 应用日志: {log_path}")
+            passes = asyncio.run(_run_passes(BenchmarkRunner(app_url, mock_url, corpus, args), args.passes))
+    finally:
+        mock_server.should_exit = True
+
+    report = {
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "baseline")
+        },
+        "upstream": mock.config.to_dict(),
+        "passes": passes,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""相似度评分进程池的基准测试
+
+模拟并发检索：每条参考文献对一批候选文章调用 scoring_executor.score_batch（与检索流程相同，生成字段差异），
+分别在事件循环内计算和交给进程池计算，统计总耗时和事件循环延迟（每1ms唤醒一次的计时协程实际等待的额外时间）。
+事件循环延迟即评分期间其他请求（SSE推送、/metrics、新的检索请求）需要等待的时间。
+
+批量大小默认取检索的实际批量：本地存储的近似标题（5篇）、SCORING_OFFLOAD_THRESHOLD 附近，
+以及一个检索策略的一批候选文章（SEARCH_LIMIT=20 篇）。
+
+在 backend 目录下运行：
+    python -m benchmarks.run_scoring --references 40 --sizes 5,10,20
+"""
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.corpus import generate_articles
+from benchmarks.fit_weights import article_record
+from app.services import scoring_executor
+from app.services.similarity_service import SimilarityService
+
+KEYWORD_FIELDS = ("title", "authors", "journal", "year", "volume", "pages")
+
+
+async def run(service: SimilarityService, articles: List[Dict[str, Any]], references: int, size: int,
+              semantic: bool, offload: bool) -> Dict[str, float]:
+    """并发评分 references 批候选文章，返回总耗时和事件循环延迟（毫秒）"""
+    scoring_executor.SCORING_OFFLOAD_THRESHOLD = size - 1 if offload else len(articles)
+    lags: List[float] = []
+    done = False
+
+    async def ticker():
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    async def score(idx: int):
+        # 请求陆续到达
+        await asyncio.sleep(0.002 * idx)
+        keywords = {name: articles[idx][name] for name in KEYWORD_FIELDS}
+        candidates = [dict(article) for article in articles[idx:idx + size]]
+        await scoring_executor.score_batch(
+            service, keywords, candidates, use_semantic_matching=semantic, diff_original=keywords
+        )
+
+    task = asyncio.ensure_future(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(score(idx) for idx in range(references)))
+    total = (time.perf_counter() - start) * 1000
+    done = True
+    await task
+    lags.sort()
+    return {
+        "total_ms": round(total, 1),
+        "lag_p50_ms": round(lags[len(lags) // 2], 1),
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99)], 1),
+        "lag_max_ms": round(lags[-1], 1),
+    }
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    articles = [article_record(article) for article in generate_articles(args.references + max(sizes), args.seed)]
+    service = SimilarityService()
+    if scoring_executor._get_pool() is None:
+        raise SystemExit("SCORING_POOL_SIZE=0，进程池已禁用")
+    # 预热：启动工作进程
+    await run(service, articles, 4, max(sizes), False, True)
+    results = []
+    try:
+        for size in sizes:
+            for semantic in (False, True):
+                for offload in (False, True):
+                    metrics = await run(service, articles, args.references, size, semantic, offload)
+                    results.append({"size": size, "semantic": semantic, "offload": offload, **metrics})
+    finally:
+        scoring_executor.shutdown_scoring_pool()
+    return {"config": vars(args), "pool_size": scoring_executor.SCORING_POOL_SIZE, "results": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="相似度评分：事件循环内计算 vs 进程池")
+    parser.add_argument("--references", type=int, default=40, help="并发评分的参考文献数")
+    parser.add_argument("--sizes", default="5,10,20", help="每批候选文章数（逗号分隔）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args))
+    print(f"{args.references} 条参考文献并发评分（进程池 {report['pool_size']} 个进程）")
+    print(f"{'批量':>4} {'语义':>4} {'方式':<8} {'总耗时ms':>9} {'循环延迟p50':>11} {'p99':>8} {'最大':>8}")
+    for entry in report["results"]:
+        print(f"{entry['size']:>4} {'是' if entry['semantic'] else '否':>4} {'进程池' if entry['offload'] else '事件循环':<8} "
+              f"{entry['total_ms']:>9} {entry['lag_p50_ms']:>11} {entry['lag_p99_ms']:>8} {entry['lag_max_ms']:>8}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
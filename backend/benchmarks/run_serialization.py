@@ -0,0 +1,190 @@
+"""检索响应的序列化基准测试
+
+对比两种构建和序列化检索响应的方式，统计每个响应的CPU时间和响应大小：
+- legacy：逐篇构建 PubMedArticle 模型（pydantic 校验）-> .dict() -> jsonable_encoder -> json.dumps
+  （FastAPI 对路由返回的 dict 的默认处理）
+- fast：routes._build_search_result 直接构建字典 -> app.responses.dumps（有 orjson 时使用 orjson）
+并统计 gzip / brotli（已安装时）压缩后的大小和压缩耗时。两种方式的输出解析后须完全相同。
+
+在 backend 目录下运行：
+    python -m benchmarks.run_serialization --references 50 --articles-per-reference 5
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import copy
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.corpus import generate_articles
+
+
+def internal_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    """语料中的文章 -> 检索服务内部的文章记录（与 pubmed_xml.extract_article 的结果格式相同）"""
+    return {
+        "pmid": article["pmid"],
+        "title": article["title"],
+        "authors": [f"{author['last']}, {author['fore']}" for author in article["authors"]],
+        "journal": article["journal"],
+        "year": article["year"],
+        "volume": article["volume"],
+        "issue": article["issue"],
+        "pages": article["pages"],
+        "doi": article["doi"],
+        "abstract": article["abstract"],
+    }
+
+
+def build_searches(references: int, per_reference: int, seed: int) -> List[Dict[str, Any]]:
+    """生成检索结果：每条参考文献对应若干篇已评分的文章（带 _similarity_score 等内部字段）"""
+    from app.api.routes import similarity_service
+
+    rng = random.Random(seed)
+    articles = [internal_article(a) for a in generate_articles(references * per_reference, seed)]
+    searches = []
+    for idx in range(references):
+        group = articles[idx * per_reference:(idx + 1) * per_reference]
+        target = group[0]
+        keywords = {
+            "title": target["title"],
+            "authors": target["authors"][:3],
+            "journal": target["journal"],
+            "year": target["year"],
+            "volume": target["volume"],
+            "issue": None,
+            "pages": target["pages"],
+            "pmid": None,
+            "doi": None,
+        }
+        scored = []
+        for article in group:
+            article = dict(article)
+            article_keywords = {key: article.get(key) for key in keywords}
+            article["_similarity_score"] = rng.uniform(0.5, 1.0)
+            article["_differences"] = similarity_service.find_differences(keywords, article_keywords)
+            scored.append(article)
+        searches.append({"reference_id": f"ref-{idx}", "keywords": keywords, "articles": scored})
+    return searches
+
+
+def legacy_response(reference_id: str, keywords: Dict[str, Any], articles: List[Dict[str, Any]]) -> bytes:
+    """修改前的响应构建方式：pydantic 模型 + jsonable_encoder + json.dumps"""
+    from fastapi.encoders import jsonable_encoder
+    from app.models import PubMedArticle, ReferenceKeyword
+
+    matched = []
+    for article in articles:
+        article_keywords = {key: article.get(key) for key in ReferenceKeyword.model_fields}
+        matched.append(PubMedArticle(
+            **article_keywords,
+            abstract=article.get("abstract"),
+            keywords=ReferenceKeyword(**article_keywords),
+            similarity_score=article.pop("_similarity_score"),
+            differences=article.pop("_differences", None) or {},
+            match_type=article.pop("_match_type", None),
+        ))
+    content = {
+        "reference_id": reference_id,
+        "matched_articles": [article.model_dump() for article in matched],
+        "status": "matched" if matched else "not_found",
+    }
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_response(reference_id: str, keywords: Dict[str, Any], articles: List[Dict[str, Any]]) -> bytes:
+    from app.api.routes import _build_search_result
+    from app.responses import dumps
+
+    return dumps(_build_search_result(reference_id, keywords, articles))
+
+
+def measure(render: Callable[..., bytes], searches: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    """每个响应的CPU时间（每轮取中位数，再取各轮的最小值）"""
+    rounds = []
+    bodies: List[bytes] = []
+    for _ in range(repeat):
+        # 构建响应会移除文章中的内部字段，每轮使用副本（复制不计时）
+        inputs = copy.deepcopy(searches)
+        timings = []
+        bodies = []
+        for search in inputs:
+            start = time.process_time()
+            body = render(search["reference_id"], search["keywords"], search["articles"])
+            timings.append(time.process_time() - start)
+            bodies.append(body)
+        rounds.append(statistics.median(timings))
+    return {"cpu_ms": round(min(rounds) * 1000, 3), "bodies": bodies}
+
+
+def compression_stats(bodies: List[bytes]) -> Dict[str, Dict[str, float]]:
+    from app.responses import brotli, compress
+
+    stats = {"identity": {"bytes": statistics.mean(len(body) for body in bodies), "cpu_ms": 0.0}}
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and brotli is None:
+            continue
+        start = time.process_time()
+        sizes = [len(compress(body, encoding)) for body in bodies]
+        stats[encoding] = {
+            "bytes": statistics.mean(sizes),
+            "cpu_ms": (time.process_time() - start) * 1000 / len(bodies),
+        }
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="检索响应的序列化耗时与压缩率")
+    parser.add_argument("--references", type=int, default=50, help="响应数（参考文献数）")
+    parser.add_argument("--articles-per-reference", type=int, default=5, help="每个响应中的文章数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="结果JSON的保存路径")
+    args = parser.parse_args()
+
+    # 导入路由模块会创建服务单例，使用临时数据目录和内存缓存
+    workdir = tempfile.TemporaryDirectory(prefix="refval-serialization-")
+    os.environ.setdefault("JOB_DB_PATH", os.path.join(workdir.name, "jobs.db"))
+    os.environ.setdefault("CACHE_DB_PATH", os.path.join(workdir.name, "cache.db"))
+    os.environ.setdefault("CACHE_BACKEND", "memory")
+    try:
+        from app.responses import orjson
+
+        searches = build_searches(args.references, args.articles_per_reference, args.seed)
+        legacy = measure(legacy_response, searches, args.repeat)
+        fast = measure(fast_response, searches, args.repeat)
+    finally:
+        workdir.cleanup()
+    mismatched = sum(1 for a, b in zip(legacy["bodies"], fast["bodies"]) if json.loads(a) != json.loads(b))
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "encoder": "orjson" if orjson is not None else "json",
+        "legacy": {"cpu_ms": legacy["cpu_ms"], "compression": compression_stats(legacy["bodies"])},
+        "fast": {"cpu_ms": fast["cpu_ms"], "compression": compression_stats(fast["bodies"])},
+        "mismatched": mismatched,
+    }
+
+    print(f"每个响应 {args.articles_per_reference} 篇文章，共 {args.references} 个响应（编码器: {report['encoder']}）")
+    print(f"{'方式':<8} {'CPU ms/响应':>12} {'原始KB':>8} {'gzip KB':>8} {'gzip ms':>8} {'br KB':>7} {'br ms':>7}")
+    for name in ("legacy", "fast"):
+        entry = report[name]
+        compression = entry["compression"]
+        br = compression.get("br")
+        print(f"{name:<8} {entry['cpu_ms']:>12.3f} {compression['identity']['bytes'] / 1024:>8.1f} "
+              f"{compression['gzip']['bytes'] / 1024:>8.1f} {compression['gzip']['cpu_ms']:>8.3f} "
+              f"{br['bytes'] / 1024 if br else 0:>7.1f} {br['cpu_ms'] if br else 0:>7.3f}")
+    speedup = legacy["cpu_ms"] / fast["cpu_ms"] if fast["cpu_ms"] else 0
+    print(f"加速比: {speedup:.1f}x；输出不一致的响应: {mismatched}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
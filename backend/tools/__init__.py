@@ -0,0 +1 @@
+"""运维工具：本地PubMed镜像导入等"""
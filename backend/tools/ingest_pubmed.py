@@ -0,0 +1,107 @@
+"""把NCBI PubMed年度基线和每日更新文件导入本地镜像（LOCAL_PUBMED_DB）
+
+文件以流式方式解析（PubMed XML，gzip压缩），字段提取与 efetch 响应解析相同。
+已导入的文件按文件名记录，重复运行只导入新的文件，可以作为每日定时任务。
+
+在 backend 目录下运行：
+    # 导入本地文件
+    python -m tools.ingest_pubmed data/baseline/pubmed24n0001.xml.gz ...
+    # 从NCBI下载并导入全部年度基线文件，再导入每日更新文件
+    python -m tools.ingest_pubmed --remote baseline
+    python -m tools.ingest_pubmed --remote updatefiles
+"""
+from typing import List
+import argparse
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+
+import httpx
+
+from app.services.local_pubmed import LOCAL_PUBMED_DB, LocalPubMedStore
+
+logger = logging.getLogger("tools.ingest_pubmed")
+
+NCBI_PUBMED_FTP = "https://ftp.ncbi.nlm.nih.gov/pubmed"
+_FILE_PATTERN = re.compile(r'href="(pubmed\d+n\d+\.xml\.gz)"')
+
+
+def list_remote_files(client: httpx.Client, base_url: str, directory: str) -> List[str]:
+    """列出NCBI目录（baseline 或 updatefiles）中的PubMed XML文件，按文件名排序"""
+    response = client.get(f"{base_url}/{directory}/")
+    response.raise_for_status()
+    return sorted(set(_FILE_PATTERN.findall(response.text)))
+
+
+def download(client: httpx.Client, url: str, path: str) -> None:
+    """下载文件并按NCBI提供的 .md5 文件校验"""
+    digest = hashlib.md5()
+    with client.stream("GET", url) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_bytes(1 << 20):
+                digest.update(chunk)
+                f.write(chunk)
+    md5 = client.get(f"{url}.md5")
+    if md5.status_code == 200:
+        expected = md5.text.strip().rsplit("=", 1)[-1].strip()
+        if expected and expected != digest.hexdigest():
+            raise ValueError(f"MD5校验失败: {url}")
+
+
+def ingest_remote(store: LocalPubMedStore, base_url: str, directory: str, limit: int, force: bool) -> int:
+    count = 0
+    with httpx.Client(timeout=httpx.Timeout(60.0, read=300.0), follow_redirects=True) as client:
+        names = list_remote_files(client, base_url, directory)
+        logger.info("%s 目录共 %s 个文件", directory, len(names))
+        for name in names:
+            if limit and count >= limit:
+                break
+            if not force and store.is_ingested(name):
+                continue
+            with tempfile.TemporaryDirectory() as workdir:
+                path = os.path.join(workdir, name)
+                logger.info("下载 %s", name)
+                download(client, f"{base_url}/{directory}/{name}", path)
+                store.ingest(path, name=name)
+            count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="导入PubMed基线/更新文件到本地镜像")
+    parser.add_argument("files", nargs="*", help="本地 PubMed XML 文件（.xml 或 .xml.gz），按文件名顺序导入")
+    parser.add_argument("--remote", choices=("baseline", "updatefiles"), help="从NCBI下载并导入该目录中尚未导入的文件")
+    parser.add_argument("--base-url", default=NCBI_PUBMED_FTP, help="PubMed文件下载地址（NCBI或其镜像）")
+    parser.add_argument("--limit", type=int, default=0, help="最多导入的远程文件数（0表示不限）")
+    parser.add_argument("--db", default=LOCAL_PUBMED_DB, help="镜像数据库路径（默认 LOCAL_PUBMED_DB）")
+    parser.add_argument("--force", action="store_true", help="重新导入已导入过的文件")
+    parser.add_argument("--optimize", action="store_true", help="导入后合并全文索引")
+    args = parser.parse_args()
+    if not args.files and not args.remote:
+        parser.error("需要指定文件或 --remote")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    store = LocalPubMedStore(args.db)
+    start = time.perf_counter()
+    imported = 0
+    for path in sorted(args.files, key=os.path.basename):
+        if not args.force and store.is_ingested(os.path.basename(path)):
+            logger.info("跳过已导入的文件: %s", path)
+            continue
+        store.ingest(path)
+        imported += 1
+    if args.remote:
+        imported += ingest_remote(store, args.base_url.rstrip("/"), args.remote, args.limit, args.force)
+    if args.optimize:
+        logger.info("合并全文索引")
+        store.optimize()
+    logger.info("完成: 导入 %s 个文件，耗时 %.1f 秒，镜像中共 %s 篇文章",
+                imported, time.perf_counter() - start, store.count())
+
+
+if __name__ == "__main__":
+    main()
@@ -32,45 +32,62 @@ function App() {
     // 使用requestAnimationFrame确保状态立即更新到UI
     await new Promise(resolve => requestAnimationFrame(resolve));
 
-    // 为每条参考文献搜索匹配的文章
-    const updatedRefs = [];
-    for (let idx = 0; idx < refs.length; idx++) {
-      const ref = refs[idx];
-      // 更新进度状态
-      setProgressStatus(`正在检索第 ${idx + 1}/${refs.length} 条参考文献...`);
-      
-      console.log(`\n【前端 App】处理第 ${idx + 1}/${refs.length} 条: ${ref.id}`);
-      console.log(`  原始文本: ${ref.original_text.substring(0, 80)}...`);
-      console.log(`  提取的关键词:`, ref.extracted_keywords);
-      
+    // 流式检索所有参考文献（服务端并发检索，每条完成后立即推送）
+    setProgressStatus(`正在检索 ${refs.length} 条参考文献...`);
+    console.log(`  发送流式检索请求: POST /api/search/stream (${refs.length} 条)`);
+    let batchResults: Record<string, { matched_articles: PubMedArticle[]; status: string; error?: string; search_id?: string; duplicate_of?: string }> = {};
+    try {
+      let completed = 0;
+      await referenceAPI.searchReferencesStream(refs, useSmartMatching, (event, data) => {
+        if (event === 'result') {
+          completed += 1;
+          batchResults[data.reference_id] = data;
+          setProgressStatus(`已完成 ${completed}/${refs.length} 条参考文献检索...`);
+        } else if (event === 'progress' && data.stage === 'strategy') {
+          console.log(`  [${data.reference_id}] 检索策略: ${data.strategy}`);
+        }
+      });
+    } catch (error) {
+      // 流式检索不可用时回退到批量检索
+      console.error(`【前端 App】流式检索失败，回退到批量检索:`, error);
       try {
-        console.log(`  发送检索请求: POST /api/search/${ref.id}`);
-        const result = await referenceAPI.searchReference(
-          ref.id,
-          ref.extracted_keywords,
-          useSmartMatching
-        );
-        
-        console.log(`  检索结果: status=${result.status}, 匹配文章数=${result.matched_articles.length}`);
-        result.matched_articles.forEach((article: any, artIdx: number) => {
-          console.log(`    [${artIdx + 1}] PMID=${article.pmid}, 相似度=${article.similarity_score}, 标题=${article.title?.substring(0, 50)}...`);
-        });
-        
-        updatedRefs.push({
-          ...ref,
-          matched_articles: result.matched_articles,
-          status: result.status as any,
-        });
-      } catch (error) {
-        console.error(`【前端 App】搜索 ${ref.id} 失败:`, error);
-        updatedRefs.push({
+        batchResults = await referenceAPI.searchReferencesBatch(refs, useSmartMatching);
+      } catch (batchError) {
+        console.error(`【前端 App】批量检索失败:`, batchError);
+      }
+    }
+
+    const updatedRefs = refs.map((ref, idx) => {
+      const result = batchResults[ref.id];
+      console.log(`\n【前端 App】第 ${idx + 1}/${refs.length} 条: ${ref.id}`);
+      console.log(`  原始文本: ${ref.original_text.substring(0, 80)}...`);
+      if (!result) {
+        return {
           ...ref,
           matched_articles: [],
           status: 'not_found' as any,
-        });
+        };
       }
-    }
+      if (result.error) {
+        console.error(`【前端 App】搜索 ${ref.id} 失败:`, result.error);
+      }
+      console.log(`  检索结果: status=${result.status}, 匹配文章数=${result.matched_articles.length}`);
+      result.matched_articles.forEach((article: any, artIdx: number) => {
+        console.log(`    [${artIdx + 1}] PMID=${article.pmid}, 相似度=${article.similarity_score}, 标题=${article.title?.substring(0, 50)}...`);
+      });
+      return {
+        ...ref,
+        matched_articles: result.matched_articles,
+        status: result.status as any,
+        search_id: result.search_id,
+        duplicate_of: result.duplicate_of,
+      };
+    });
 
+    const duplicateCount = updatedRefs.filter(ref => ref.duplicate_of).length;
+    if (duplicateCount > 0) {
+      console.log(`【前端 App】检测到 ${duplicateCount} 条重复参考文献（同一篇文献只检索一次）`);
+    }
     console.log(`\n【前端 App】所有参考文献处理完成`);
     setReferences(updatedRefs);
     
@@ -248,21 +248,24 @@ export const DataDisplayArea: React.FC<DataDisplayAreaProps> = ({
     
     try {
       setVerifyProgress('正在检索PubMed数据库...');
+      const ref = references.find(r => r.id === refId);
+      // 传回上次检索的 search_id，服务端只重新执行检索条件变化的策略
       const result = await referenceAPI.searchReference(
         refId,
         editingData,
-        useSmartMatching
+        useSmartMatching,
+        ref?.search_id
       );
       
       setVerifyProgress('检索完成，正在更新结果...');
       
-      const ref = references.find(r => r.id === refId);
       if (ref) {
         const updatedRef: ReferenceItem = {
           ...ref,
           extracted_keywords: editingData,
           matched_articles: result.matched_articles,
           status: result.status as any,
+          search_id: result.search_id,
         };
         onUpdate(refId, updatedRef);
       }
@@ -409,7 +412,17 @@ export const DataDisplayArea: React.FC<DataDisplayAreaProps> = ({
                   <div className="grid grid-cols-12 gap-4 items-center">
                     {/* 原文献 */}
                     <div className="col-span-4">
-                      <div className="text-xs text-gray-500 mb-1">原文献</div>
+                      <div className="text-xs text-gray-500 mb-1">
+                        原文献
+                        {ref.duplicate_of && (
+                          <span
+                            className="ml-2 px-2 py-0.5 text-xs bg-yellow-100 text-yellow-700 rounded"
+                            title="与列表中前面的参考文献为同一篇文献"
+                          >
+                            与 {ref.duplicate_of} 重复
+                          </span>
+                        )}
+                      </div>
                       <div className="font-medium text-sm text-gray-800">
                         {getShortTitle(ref.extracted_keywords.title)}
                       </div>
@@ -17,19 +17,78 @@ export const referenceAPI = {
     return response.data.references;
   },
 
-  // 搜索参考文献
+  // 搜索参考文献（传入上次检索返回的 searchId 时为增量检索：只重新执行检索条件变化的策略）
   searchReference: async (
     referenceId: string,
     keywords: ReferenceKeyword,
-    useSmartMatching: boolean = false
-  ): Promise<{ matched_articles: PubMedArticle[]; status: string }> => {
+    useSmartMatching: boolean = false,
+    searchId?: string
+  ): Promise<{ matched_articles: PubMedArticle[]; status: string; search_id?: string }> => {
     const response = await api.post(`/search/${referenceId}`, {
       ...keywords,
-      use_smart_matching: useSmartMatching
+      use_smart_matching: useSmartMatching,
+      search_id: searchId,
+      incremental: true
     });
     return response.data;
   },
 
+  // 批量搜索参考文献（服务端并发检索，结果按参考文献ID返回）
+  searchReferencesBatch: async (
+    references: ReferenceItem[],
+    useSmartMatching: boolean = false
+  ): Promise<Record<string, { matched_articles: PubMedArticle[]; status: string; error?: string; search_id?: string; duplicate_of?: string }>> => {
+    const response = await api.post('/search/batch', {
+      references,
+      use_smart_matching: useSmartMatching,
+      incremental: true
+    });
+    return response.data.results;
+  },
+
+  // 流式批量搜索参考文献（SSE），每条参考文献检索完成后立即回调
+  // 可传入 AbortSignal 取消检索（连接断开后服务端会停止剩余检索）
+  searchReferencesStream: async (
+    references: ReferenceItem[],
+    useSmartMatching: boolean,
+    onEvent: (event: string, data: any) => void,
+    signal?: AbortSignal
+  ): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/search/stream`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      // incremental：结果带 search_id，用户修改关键词后重新检索时为增量检索
+      body: JSON.stringify({ references, use_smart_matching: useSmartMatching, incremental: true }),
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`流式检索失败: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      // SSE 消息以空行分隔
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary >= 0) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        let data = '';
+        message.split('\n').forEach((line) => {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (data) onEvent(event, JSON.parse(data));
+        boundary = buffer.indexOf('\n\n');
+      }
+    }
+  },
+
   // 格式化参考文献
   formatReferences: async (
     references: any[],
@@ -34,6 +34,8 @@ export interface ReferenceItem {
   extracted_keywords: ReferenceKeyword;
   matched_articles: PubMedArticle[];
   status: "pending" | "matched" | "not_found" | "completed";
+  search_id?: string; // 增量检索的会话ID，修改关键词后重新检索时传回
+  duplicate_of?: string; // 与列表中前面的某条参考文献为同一篇文献时，为该参考文献的ID
 }
 
 export interface ProcessedReference {